@@ -0,0 +1,155 @@
+# app/core/admissao.py
+"""
+Controle de admissão: descarta carga cedo quando o pool está saturado.
+
+Sem ele, com o pool esgotado os requests ficam na fila do pool até o
+pool_timeout (30 s) e só então falham, e a latência sobe para todas as rotas.
+
+O pool do engine (PoolMedido) mede quanto cada checkout esperou por uma
+conexão. A cada ADMISSAO_INTERVALO_SEGUNDOS o controle olha a menor espera da
+janela (ou a idade da espera mais antiga ainda na fila): se nem a melhor
+espera ficou abaixo de ADMISSAO_ALVO_ESPERA_SEGUNDOS, há fila permanente, não
+só um pico, e o worker entra em sobrecarga até a próxima janela.
+
+Prioridades (pelo path, antes do roteamento):
+- crítica: login/auth e baixa de títulos (/.../baixar) — sempre admitidas;
+- baixa: relatórios, exportações e importações — 503 imediato em sobrecarga;
+- normal: o resto — 503 só acima de ADMISSAO_MAX_EM_ANDAMENTO requests.
+
+Recusas respondem 503 com Retry-After, como a drenagem do desligamento.
+"""
+import math
+import time
+from collections import Counter
+
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core import metricas
+from app.core.config import settings
+
+# Fora do controle (não contam nem são recusados): sondas e streams longos sem conexão do pool
+PATHS_ISENTOS = ("/health", "/metrics", "/eventos")
+PATHS_CRITICOS = ("/auth",)
+SUFIXOS_CRITICOS = ("/baixar",)
+PATHS_BAIXA_PRIORIDADE = ("/relatorios", "/importacoes")
+SUFIXOS_BAIXA_PRIORIDADE = ("/export",)
+
+
+class ControleAdmissao:
+    def __init__(self):
+        self.em_andamento = 0
+        self.esperas: dict[int, float] = {}  # checkouts aguardando conexão -> início
+        self.proxima_espera = 0
+        self.menor_espera = math.inf         # menor espera concluída na janela atual
+        self.fim_janela = 0.0
+        self.atraso = 0.0                    # atraso da última janela avaliada
+        self.sobrecarregado = False
+        self.rejeitados: Counter = Counter()  # prioridade -> recusas
+
+    # ===== Pool =====
+
+    def iniciar_espera(self) -> int:
+        self.proxima_espera += 1
+        self.esperas[self.proxima_espera] = time.perf_counter()
+        return self.proxima_espera
+
+    def concluir_espera(self, chave: int) -> None:
+        espera = time.perf_counter() - self.esperas.pop(chave)
+        if espera < self.menor_espera:
+            self.menor_espera = espera
+
+    # ===== Decisão =====
+
+    def avaliar(self) -> None:
+        agora = time.perf_counter()
+        if agora < self.fim_janela:
+            return
+        atraso = self.menor_espera
+        if self.esperas:
+            atraso = min(atraso, agora - min(self.esperas.values()))
+        self.atraso = 0.0 if atraso == math.inf else atraso
+        self.sobrecarregado = self.atraso > settings.ADMISSAO_ALVO_ESPERA_SEGUNDOS
+        self.menor_espera = math.inf
+        self.fim_janela = agora + settings.ADMISSAO_INTERVALO_SEGUNDOS
+
+    def admitir(self, prioridade: str) -> bool:
+        if prioridade == "critica":
+            return True
+        self.avaliar()
+        if prioridade == "baixa" and self.sobrecarregado:
+            return False
+        return self.em_andamento < settings.ADMISSAO_MAX_EM_ANDAMENTO
+
+
+controle = ControleAdmissao()
+
+
+class PoolMedido(AsyncAdaptedQueuePool):
+    """Pool do engine principal que registra a espera de cada checkout no controle"""
+
+    def _do_get(self):
+        chave = controle.iniciar_espera()
+        try:
+            return super()._do_get()
+        finally:
+            controle.concluir_espera(chave)
+
+
+def classificar(path: str) -> str:
+    if path.startswith(PATHS_CRITICOS) or path.endswith(SUFIXOS_CRITICOS):
+        return "critica"
+    if path.startswith(PATHS_BAIXA_PRIORIDADE) or path.endswith(SUFIXOS_BAIXA_PRIORIDADE):
+        return "baixa"
+    return "normal"
+
+
+class AdmissaoMiddleware:
+    """Recusa (503 + Retry-After) o que não deve entrar na fila do pool saturado"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(PATHS_ISENTOS):
+            await self.app(scope, receive, send)
+            return
+
+        prioridade = classificar(scope["path"].rstrip("/"))
+        if not controle.admitir(prioridade):
+            controle.rejeitados[prioridade] += 1
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"retry-after", str(settings.ADMISSAO_RETRY_AFTER_SEGUNDOS).encode()),
+                ],
+            })
+            await send({
+                "type": "http.response.body",
+                "body": '{"detail":"Servidor sobrecarregado, tente novamente em instantes"}'.encode(),
+            })
+            return
+
+        controle.em_andamento += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controle.em_andamento -= 1
+
+
+def registrar_metricas() -> None:
+    # Atraso e sobrecarga são do worker (não somáveis): label worker
+    registro = metricas.registro
+    registro.registrar_gauge(
+        "admissao_atraso_pool_segundos", "Espera por conexão do pool na última janela",
+        lambda: {metricas.label_worker(): controle.atraso},
+    )
+    registro.registrar_gauge(
+        "admissao_sobrecarga", "1 quando o worker está recusando requests de baixa prioridade",
+        lambda: {metricas.label_worker(): float(controle.sobrecarregado)},
+    )
+    registro.registrar_gauge(
+        "admissao_rejeitados", "Requests recusados (503) pelo controle de admissão",
+        lambda: {f'prioridade="{prioridade}"': float(total) for prioridade, total in controle.rejeitados.items()},
+    )
@@ -0,0 +1,298 @@
+# app/core/agendador.py
+"""
+Agendador de jobs periódicos dentro do processo (fora do caminho dos requests).
+
+Cada job tem uma expressão cron de 5 campos ("min hora dia mês dia-da-semana")
+e roda com um jitter aleatório, para os workers não baterem no banco juntos.
+
+Jobs exclusivos rodam em um único worker por horário agendado: o worker pega um
+advisory lock transacional do Postgres e confere em rfe900agd se o horário já
+foi executado por outro worker. O estado da última execução fica na tabela (visível
+para qualquer worker); contadores e duração também viram métricas em /metrics.
+"""
+import asyncio
+import json
+import logging
+import random
+import time
+import zlib
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Optional
+
+from sqlalchemy import select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import metricas
+from app.core.config import settings
+from app.database import engine
+from app.models.agendamento import Agendamento
+
+logger = logging.getLogger("app.agendador")
+
+FuncaoJob = Callable[[], Awaitable[Optional[dict[str, Any]]]]
+
+
+# ========== CRON ==========
+
+class Cron:
+    """Expressão cron de 5 campos: *, */n, a, a-b, a-b/n e listas separadas por vírgula"""
+
+    LIMITES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 6))
+
+    def __init__(self, expressao: str):
+        campos = expressao.split()
+        if len(campos) != 5:
+            raise ValueError(f"Expressão cron inválida (esperados 5 campos): {expressao!r}")
+        self.expressao = expressao
+        # Domingo pode ser 0 ou 7
+        campos[4] = ",".join("0" if parte == "7" else parte for parte in campos[4].split(","))
+        self.minutos, self.horas, self.dias, self.meses, self.dias_semana = (
+            self.parse_campo(campo, minimo, maximo)
+            for campo, (minimo, maximo) in zip(campos, self.LIMITES)
+        )
+        self.dia_restrito = campos[2] != "*"
+        self.semana_restrita = campos[4] != "*"
+
+    @staticmethod
+    def parse_campo(campo: str, minimo: int, maximo: int) -> set[int]:
+        valores = set()
+        for parte in campo.split(","):
+            faixa, _, passo = parte.partition("/")
+            passo = int(passo) if passo else 1
+            if faixa == "*":
+                inicio, fim = minimo, maximo
+            elif "-" in faixa:
+                inicio, fim = (int(v) for v in faixa.split("-", 1))
+            else:
+                inicio = int(faixa)
+                fim = maximo if passo > 1 else inicio
+            if inicio < minimo or fim > maximo or inicio > fim or passo < 1:
+                raise ValueError(f"Campo cron fora do intervalo {minimo}-{maximo}: {parte!r}")
+            valores.update(range(inicio, fim + 1, passo))
+        return valores
+
+    def dia_ok(self, momento: datetime) -> bool:
+        no_mes = momento.day in self.dias
+        na_semana = (momento.weekday() + 1) % 7 in self.dias_semana
+        # Como no cron: com os dois campos restritos, basta um deles bater
+        if self.dia_restrito and self.semana_restrita:
+            return no_mes or na_semana
+        return no_mes and na_semana
+
+    def proxima(self, depois: datetime) -> datetime:
+        """Próximo horário (minuto cheio) estritamente depois de `depois`"""
+        momento = depois.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limite = momento + timedelta(days=366 * 5)
+        while momento < limite:
+            if momento.month not in self.meses:
+                momento = (momento.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self.dia_ok(momento):
+                momento = momento.replace(hour=0, minute=0) + timedelta(days=1)
+            elif momento.hour not in self.horas:
+                momento = momento.replace(minute=0) + timedelta(hours=1)
+            elif momento.minute not in self.minutos:
+                momento += timedelta(minutes=1)
+            else:
+                return momento
+        raise ValueError(f"Expressão cron sem próxima execução: {self.expressao!r}")
+
+
+# ========== JOBS ==========
+
+class Job:
+    def __init__(self, nome: str, cron: str, funcao: FuncaoJob, exclusivo: bool = True):
+        self.nome = nome
+        self.cron = Cron(cron)
+        self.funcao = funcao
+        self.exclusivo = exclusivo  # False: roda em todos os workers (ex.: caches locais)
+
+        # Estatísticas deste worker
+        self.execucoes = 0
+        self.falhas = 0
+        self.ignoradas = 0  # horários executados por outro worker
+        self.ultimo_status: Optional[str] = None
+        self.ultima_execucao: Optional[datetime] = None
+        self.ultima_duracao = 0.0
+        self.ultimo_sucesso: Optional[float] = None  # time.time(), para a métrica
+        self.ultimo_resultado: Optional[dict] = None
+        self.ultimo_erro: Optional[str] = None
+        self.proxima_execucao: Optional[datetime] = None
+
+    def to_dict(self) -> dict:
+        return {
+            "cron": self.cron.expressao,
+            "exclusivo": self.exclusivo,
+            "proxima_execucao": self.proxima_execucao,
+            "worker": {
+                "execucoes": self.execucoes,
+                "falhas": self.falhas,
+                "ignoradas": self.ignoradas,
+                "ultimo_status": self.ultimo_status,
+                "ultima_execucao": self.ultima_execucao,
+                "ultima_duracao_ms": round(self.ultima_duracao * 1000, 2),
+                "ultimo_resultado": self.ultimo_resultado,
+                "ultimo_erro": self.ultimo_erro,
+            },
+        }
+
+
+jobs: dict[str, Job] = {}
+tarefas: list[asyncio.Task] = []
+
+
+def registrar_job(nome: str, cron: str, funcao: FuncaoJob, exclusivo: bool = True) -> Job:
+    job = jobs[nome] = Job(nome, cron, funcao, exclusivo)
+    return job
+
+
+def chave_lock(nome: str) -> int:
+    return zlib.crc32(f"agendador:{nome}".encode())
+
+
+async def rodar(job: Job, agendado: datetime) -> None:
+    """Executa a função do job e atualiza as estatísticas locais"""
+    job.ultima_execucao = agendado
+    inicio = time.perf_counter()
+    try:
+        job.ultimo_resultado = await job.funcao()
+        job.ultimo_status, job.ultimo_erro = "OK", None
+        job.ultimo_sucesso = time.time()
+    except Exception as e:
+        job.falhas += 1
+        job.ultimo_status, job.ultimo_erro = "ERRO", f"{type(e).__name__}: {e}"[:1000]
+        job.ultimo_resultado = None
+        logger.exception("Job %s falhou", job.nome)
+    job.execucoes += 1
+    job.ultima_duracao = time.perf_counter() - inicio
+
+
+async def executar_exclusivo(job: Job, agendado: datetime) -> None:
+    async with engine.connect() as conn:
+        obtido = (await conn.execute(
+            text("SELECT pg_try_advisory_xact_lock(:chave)"), {"chave": chave_lock(job.nome)}
+        )).scalar()
+        if not obtido:
+            job.ignoradas += 1  # outro worker está rodando este job agora
+            return
+
+        ultimo = (await conn.execute(
+            select(Agendamento.datexe).where(Agendamento.nomagd == job.nome)
+        )).scalar()
+        if ultimo is not None and ultimo >= agendado:
+            job.ignoradas += 1  # horário já executado por outro worker
+            return
+
+        datini = datetime.now()
+        await rodar(job, agendado)
+
+        valores = {
+            "datexe": agendado,
+            "datini": datini,
+            "datfim": datetime.now(),
+            "statagd": job.ultimo_status,
+            "durexe": int(job.ultima_duracao * 1000),
+            "resagd": json.dumps(job.ultimo_resultado, default=str) if job.ultimo_resultado is not None else None,
+            "erragd": job.ultimo_erro,
+        }
+        erro = 1 if job.ultimo_status == "ERRO" else 0
+        stmt = pg_insert(Agendamento).values(nomagd=job.nome, qtdexe=1, qtderr=erro, **valores)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Agendamento.nomagd],
+            set_={
+                **valores,
+                "qtdexe": Agendamento.qtdexe + 1,
+                "qtderr": Agendamento.qtderr + erro,
+            },
+        )
+        await conn.execute(stmt)
+        await conn.commit()  # libera o advisory lock
+
+
+async def loop_job(job: Job) -> None:
+    while True:
+        agendado = job.cron.proxima(datetime.now())
+        job.proxima_execucao = agendado
+        espera = (agendado - datetime.now()).total_seconds() + random.uniform(0, settings.AGENDADOR_JITTER_SEGUNDOS)
+        await asyncio.sleep(max(espera, 0))
+        try:
+            if job.exclusivo:
+                await executar_exclusivo(job, agendado)
+            else:
+                await rodar(job, agendado)
+        except Exception:  # banco fora do ar etc.: tenta de novo no próximo horário
+            logger.exception("Agendador não conseguiu executar o job %s", job.nome)
+
+
+# ========== CICLO DE VIDA ==========
+
+def iniciar() -> None:
+    """Sobe um loop por job (chamado no lifespan de cada worker)"""
+    if tarefas:
+        return
+    loop = asyncio.get_running_loop()
+    for job in jobs.values():
+        tarefas.append(loop.create_task(loop_job(job), name=f"agendador:{job.nome}"))
+
+
+async def parar() -> None:
+    """Cancela os loops; job em execução é interrompido e sua transação desfeita"""
+    for tarefa in tarefas:
+        tarefa.cancel()
+    await asyncio.gather(*tarefas, return_exceptions=True)
+    tarefas.clear()
+
+
+# ========== STATUS E MÉTRICAS ==========
+
+async def status_jobs(db: AsyncSession) -> dict[str, dict]:
+    """Estado de cada job: última execução global (tabela) + números deste worker"""
+    result = await db.execute(select(Agendamento).where(Agendamento.nomagd.in_(list(jobs))))
+    ultimas = {row.nomagd: row for row in result.scalars().all()}
+
+    status_por_job = {}
+    for nome, job in jobs.items():
+        dados = job.to_dict()
+        ultima = ultimas.get(nome)
+        dados["ultima_execucao"] = None if ultima is None else {
+            "agendado": ultima.datexe,
+            "inicio": ultima.datini,
+            "fim": ultima.datfim,
+            "status": ultima.statagd,
+            "duracao_ms": ultima.durexe,
+            "resultado": json.loads(ultima.resagd) if ultima.resagd else None,
+            "erro": ultima.erragd,
+            "execucoes": ultima.qtdexe,
+            "falhas": ultima.qtderr,
+        }
+        status_por_job[nome] = dados
+    return status_por_job
+
+
+def registrar_metricas() -> None:
+    # Label worker: no modo multiprocesso os snapshots são somados, e duração/timestamp
+    # de workers diferentes não podem ser somados entre si
+
+    def por_job(valor: Callable[[Job], Optional[float]]) -> Callable[[], dict[str, float]]:
+        def callback() -> dict[str, float]:
+            worker = metricas.label_worker()
+            valores = {}
+            for nome, job in jobs.items():
+                atual = valor(job)
+                if atual is not None:
+                    valores[f'job="{metricas.escapar_label(nome)}",{worker}'] = float(atual)
+            return valores
+        return callback
+
+    registro = metricas.registro
+    registro.registrar_gauge("agendador_execucoes", "Execuções dos jobs neste worker", por_job(lambda j: j.execucoes))
+    registro.registrar_gauge("agendador_falhas", "Execuções com erro neste worker", por_job(lambda j: j.falhas))
+    registro.registrar_gauge(
+        "agendador_ignoradas", "Horários executados por outro worker", por_job(lambda j: j.ignoradas)
+    )
+    registro.registrar_gauge(
+        "agendador_ultima_duracao_segundos", "Duração da última execução", por_job(lambda j: j.ultima_duracao)
+    )
+    registro.registrar_gauge(
+        "agendador_ultimo_sucesso_timestamp", "Unix time da última execução OK", por_job(lambda j: j.ultimo_sucesso)
+    )
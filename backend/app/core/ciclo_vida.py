@@ -0,0 +1,198 @@
+# app/core/ciclo_vida.py
+"""
+Ciclo de vida do app (lifespan do FastAPI).
+
+Na subida: abre DB_POOL_AQUECER conexões do pool e executa nelas as consultas
+quentes (listagens de contas e relatórios, com um tenant inexistente), o que
+deixa o cache de compilação do SQLAlchemy e os prepared statements do driver
+prontos antes do primeiro request.
+
+Depois sobe a verificação de saúde, o agendador, os workers de relatórios e a
+conexão de LISTEN (eventos em tempo real e invalidação dos caches locais).
+
+Na descida há duas fases. A drenagem começa no sinal de desligamento
+(iniciar_desligamento, chamado pelo worker de app/servidor.py): readiness e
+requests novos passam a responder 503, e o uvicorn espera as conexões abertas
+por até SHUTDOWN_DRENAGEM_SEGUNDOS (timeout_graceful_shutdown). Só depois
+disso o uvicorn roda o fim do lifespan, que para as tarefas em background e
+fecha o pool.
+"""
+import asyncio
+import logging
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
+from datetime import date
+
+from fastapi import FastAPI
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import agendador, eventos, invalidacao, metricas, notificacoes, relatorios_jobs, replica, saude
+from app.core.config import settings
+from app.core.queries_lentas import encerrar_explain, iniciar_escritor_log
+from app.database import engine
+from app.models.contas_pagar import ContaPagar
+from app.models.contas_receber import ContaReceber
+from app.models.pessoa import Pessoa
+from app.models.user import User
+
+logger = logging.getLogger("app.ciclo_vida")
+
+# Paths que continuam respondendo durante a drenagem
+PATHS_SEMPRE_ATIVOS = ("/health", "/metrics")
+
+
+class ControleRequests:
+    def __init__(self):
+        self.em_andamento = 0
+        self.drenando = False
+
+
+controle = ControleRequests()
+
+
+# ========== AQUECIMENTO ==========
+
+def consultas_quentes() -> list:
+    """Mesmas consultas (e variações de filtro padrão) dos endpoints mais usados"""
+    from app.routers import contas_pagar, contas_receber, relatorios
+
+    # Tenant inexistente: as consultas compilam e rodam, mas não devolvem linhas
+    usuario = User(codemp=0, codfil=0, issuper=False)
+    hoje = date.today()
+
+    return [
+        contas_pagar.aplicar_filtros_listagem(
+            select(ContaPagar, Pessoa.nompes).join(Pessoa, ContaPagar.codfor == Pessoa.codpes, isouter=True),
+            usuario,
+        ).order_by(ContaPagar.datven.desc()).offset(0).limit(100),
+        contas_receber.aplicar_filtros_listagem(
+            select(ContaReceber, Pessoa.nompes).join(Pessoa, ContaReceber.codcli == Pessoa.codpes, isouter=True),
+            usuario,
+        ).order_by(ContaReceber.datven.desc()).offset(0).limit(100),
+        select(ContaPagar, Pessoa.nompes).outerjoin(Pessoa, ContaPagar.codfor == Pessoa.codpes).where(
+            *relatorios.filtros_fluxo_pagar(usuario, hoje, hoje, False, False)
+        ),
+        select(ContaReceber, Pessoa.nompes).outerjoin(Pessoa, ContaReceber.codcli == Pessoa.codpes).where(
+            *relatorios.filtros_fluxo_receber(usuario, hoje, hoje, False, False)
+        ),
+        select(ContaPagar, Pessoa.nompes).outerjoin(Pessoa, ContaPagar.codfor == Pessoa.codpes).where(
+            *relatorios.filtros_vencidas_pagar(usuario, hoje, None)
+        ),
+        select(ContaReceber, Pessoa.nompes).outerjoin(Pessoa, ContaReceber.codcli == Pessoa.codpes).where(
+            *relatorios.filtros_vencidas_receber(usuario, hoje, None)
+        ),
+    ]
+
+
+async def aquecer_pool() -> dict:
+    """Abre as conexões ao mesmo tempo (para não reaproveitar a mesma) e roda as consultas quentes"""
+    quantidade = min(settings.DB_POOL_AQUECER, settings.DB_POOL_SIZE)
+    if quantidade <= 0:
+        return {"conexoes": 0, "consultas": 0}
+
+    inicio = time.perf_counter()
+    consultas = consultas_quentes() if settings.DB_AQUECER_CONSULTAS else []
+    async with AsyncExitStack() as stack:
+        conexoes = await asyncio.gather(
+            *(stack.enter_async_context(engine.connect()) for _ in range(quantidade))
+        )
+        for conn in conexoes:
+            await conn.execute(text("SELECT 1"))
+            # Sessão ORM sobre a conexão: mesmo caminho de compilação dos routers
+            session = AsyncSession(bind=conn)
+            for consulta in consultas:
+                await session.execute(consulta)
+            await session.close()
+            await conn.rollback()
+
+    logger.info(
+        "Pool aquecido: %d conexões, %d consultas em %.0f ms",
+        quantidade, len(consultas), (time.perf_counter() - inicio) * 1000,
+    )
+    return {"conexoes": quantidade, "consultas": len(consultas)}
+
+
+# ========== DRENAGEM ==========
+
+def iniciar_desligamento() -> None:
+    """
+    Início da drenagem, antes de o uvicorn esperar as conexões abertas (o
+    lifespan só roda depois dessa espera, tarde demais para recusar requests)
+    """
+    if controle.drenando:
+        return
+    controle.drenando = True
+    saude.estado.drenando = True
+    # Streams de eventos (SSE/WebSocket) não terminam sozinhos: segurariam a espera até o prazo
+    eventos.encerrar_clientes()
+    logger.info("Desligamento: drenando %d requests em andamento", controle.em_andamento)
+
+
+class DrenagemMiddleware:
+    """Conta os requests em andamento e recusa novos (503) durante o desligamento"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if controle.drenando and not scope["path"].startswith(PATHS_SEMPRE_ATIVOS):
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"connection", b"close"),
+                    (b"retry-after", b"1"),
+                ],
+            })
+            await send({
+                "type": "http.response.body",
+                "body": '{"detail":"Servidor em desligamento"}'.encode(),
+            })
+            return
+
+        controle.em_andamento += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controle.em_andamento -= 1
+
+
+# ========== LIFESPAN ==========
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        await aquecer_pool()
+    except Exception as e:  # banco fora do ar na subida: o readiness acusa, o app sobe mesmo assim
+        logger.warning("Aquecimento do pool falhou: %s", e)
+    saude.iniciar_verificacao(engine)
+    replica.registrar()
+    replica.iniciar()  # até a primeira verificação, leituras no primário
+    if settings.AGENDADOR_ATIVO:
+        agendador.iniciar()
+    relatorios_jobs.iniciar()
+    invalidacao.registrar()
+    if settings.EVENTOS_ATIVO:
+        eventos.registrar()
+    notificacoes.iniciar()
+    metricas.iniciar()
+    iniciar_escritor_log()
+
+    yield
+
+    # Aqui a drenagem já terminou (ou o prazo esgotou): só limpeza
+    await notificacoes.parar()
+    await agendador.parar()
+    await relatorios_jobs.parar()  # jobs interrompidos voltam para a fila
+    await saude.parar_verificacao()
+    await replica.parar()  # fecha também o pool da réplica
+    await encerrar_explain()
+    await metricas.parar()  # snapshot final: o acumulado dos mortos inclui o fim deste worker
+    await engine.dispose()
+    logger.info("Pool de conexões fechado")
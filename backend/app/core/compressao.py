@@ -0,0 +1,157 @@
+# app/core/compressao.py
+"""
+Compressão das respostas (brotli ou gzip), só acima de COMPRESSAO_MINIMO_BYTES.
+
+- Brotli é opcional: sem o pacote `brotli`, só gzip
+- O gzip parte de um compressobj pré-configurado que é copiado a cada
+  resposta (evita refazer a inicialização do zlib por request)
+- Respostas já codificadas (ex.: download de relatórios em .gz), tipos já
+  comprimidos (xlsx) e SSE passam direto
+- Respostas em streaming são comprimidas bloco a bloco (flush a cada bloco)
+"""
+import zlib
+from typing import Optional
+
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # opcional
+    brotli = None
+
+TIPOS_COMPRIMIVEIS = (
+    "application/json",
+    "application/x-columnar+json",
+    "application/msgpack",
+    "application/x-ndjson",
+    "application/xml",
+    "application/javascript",
+    "text/",
+)
+TIPOS_EXCLUIDOS = ("text/event-stream",)
+
+# Template do gzip (wbits=31: cabeçalho e trailer gzip)
+GZIP_TEMPLATE = zlib.compressobj(settings.COMPRESSAO_GZIP_NIVEL, zlib.DEFLATED, 31, 8)
+
+
+class CompressorGzip:
+    encoding = b"gzip"
+
+    def __init__(self):
+        self.obj = GZIP_TEMPLATE.copy()
+
+    def comprimir(self, dados: bytes) -> bytes:
+        return self.obj.compress(dados) + self.obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finalizar(self, dados: bytes = b"") -> bytes:
+        return self.obj.compress(dados) + self.obj.flush(zlib.Z_FINISH)
+
+
+class CompressorBrotli:
+    encoding = b"br"
+
+    def __init__(self):
+        self.obj = brotli.Compressor(quality=settings.COMPRESSAO_BROTLI_QUALIDADE, mode=brotli.MODE_TEXT)
+
+    def comprimir(self, dados: bytes) -> bytes:
+        return self.obj.process(dados) + self.obj.flush()
+
+    def finalizar(self, dados: bytes = b"") -> bytes:
+        return self.obj.process(dados) + self.obj.finish()
+
+
+def escolher_encoding(accept_encoding: str) -> Optional[type]:
+    aceitos = set()
+    for parte in accept_encoding.lower().split(","):
+        nome, _, parametros = parte.strip().partition(";")
+        if parametros.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        aceitos.add(nome.strip())
+
+    if brotli is not None and "br" in aceitos:
+        return CompressorBrotli
+    if "gzip" in aceitos:
+        return CompressorGzip
+    return None
+
+
+def comprimivel(headers: list[tuple[bytes, bytes]]) -> bool:
+    tipo = ""
+    for nome, valor in headers:
+        nome = nome.lower()
+        if nome == b"content-encoding":
+            return False
+        if nome == b"content-type":
+            tipo = valor.decode("latin-1").lower()
+    return tipo.startswith(TIPOS_COMPRIMIVEIS) and not tipo.startswith(TIPOS_EXCLUIDOS)
+
+
+class CompressaoMiddleware:
+    """Middleware ASGI de compressão por tamanho e tipo de conteúdo"""
+
+    def __init__(self, app, minimo_bytes: int = 1024):
+        self.app = app
+        self.minimo_bytes = minimo_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept = ""
+        for nome, valor in scope["headers"]:
+            if nome == b"accept-encoding":
+                accept = valor.decode("latin-1")
+                break
+        classe = escolher_encoding(accept)
+        if classe is None:
+            await self.app(scope, receive, send)
+            return
+
+        inicio: Optional[dict] = None
+        compressor = None
+        repassar = False
+
+        async def send_comprimido(message):
+            nonlocal inicio, compressor, repassar
+
+            if message["type"] == "http.response.start":
+                inicio = message  # segura até ver o primeiro bloco do corpo
+                return
+
+            if message["type"] != "http.response.body" or repassar:
+                await send(message)
+                return
+
+            corpo = message.get("body", b"")
+            mais = message.get("more_body", False)
+
+            if compressor is None:
+                headers = list(inicio.get("headers", []))
+                # Pequena demais (resposta completa) ou tipo não comprimível: passa direto
+                if not comprimivel(headers) or (not mais and len(corpo) < self.minimo_bytes):
+                    repassar = True
+                    await send(inicio)
+                    await send(message)
+                    return
+
+                compressor = classe()
+                headers = [(n, v) for n, v in headers if n.lower() != b"content-length"]
+                headers.append((b"content-encoding", compressor.encoding))
+                headers.append((b"vary", b"Accept-Encoding"))
+
+                if not mais:
+                    dados = compressor.finalizar(corpo)
+                    headers.append((b"content-length", str(len(dados)).encode()))
+                    await send({**inicio, "headers": headers})
+                    await send({"type": "http.response.body", "body": dados})
+                    return
+
+                await send({**inicio, "headers": headers})
+
+            if mais:
+                await send({"type": "http.response.body", "body": compressor.comprimir(corpo), "more_body": True})
+            else:
+                await send({"type": "http.response.body", "body": compressor.finalizar(corpo)})
+
+        await self.app(scope, receive, send_comprimido)
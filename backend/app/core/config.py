@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -6,6 +8,130 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
 
+    # Réplica de leitura (opcional): listagens e relatórios leem dela via get_read_db
+    DATABASE_READ_URL: Optional[str] = None
+    REPLICA_ATRASO_MAXIMO_SEGUNDOS: float = 5.0   # acima disso, as leituras voltam ao primário
+    REPLICA_VERIFICACAO_SEGUNDOS: float = 5.0
+    REPLICA_LEITURA_PROPRIA_SEGUNDOS: int = 10    # após uma escrita, o usuário lê do primário
+
+    # Pool de conexões do engine principal
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_AQUECER: int = 3          # conexões abertas na subida (limitado a DB_POOL_SIZE)
+    DB_AQUECER_CONSULTAS: bool = True  # pré-compila as consultas quentes na subida
+
+    # Limite de concorrência por tenant (codemp, codfil) nos endpoints pesados, por worker
+    TENANT_CONCORRENCIA: int = 4               # unidades por tenant
+    TENANT_ESPERA_MAXIMA_SEGUNDOS: float = 10.0  # depois disso, 429
+    TENANT_PESOS: dict[str, int] = {           # unidades por operação (ausente = 1)
+        "fluxo_caixa": 2,
+        "contas_vencidas": 2,
+        "exportacao": 2,
+        "importacao": 2,
+        "atualizar_vencidas": 4,
+    }
+
+    # statement_timeout (SET LOCAL) por classe de endpoint, em ms
+    STATEMENT_TIMEOUT_MS: dict[str, int] = {
+        "interativo": 15000,   # CRUD e listagens
+        "relatorio": 120000,   # relatórios síncronos
+        "lote": 900000,        # exportações, importações, jobs e varreduras
+    }
+    CANCELAR_NA_DESCONEXAO: bool = True  # GET/HEAD: cliente saiu -> cancela o request e a query
+
+    # Controle de admissão (503 cedo com o pool saturado, em vez de esperar o pool_timeout)
+    ADMISSAO_ATIVO: bool = True
+    ADMISSAO_ALVO_ESPERA_SEGUNDOS: float = 0.1  # espera mínima por conexão que indica fila permanente
+    ADMISSAO_INTERVALO_SEGUNDOS: float = 1.0    # janela de avaliação
+    ADMISSAO_MAX_EM_ANDAMENTO: int = 200        # por worker; acima disso recusa também as rotas normais
+    ADMISSAO_RETRY_AFTER_SEGUNDOS: int = 2
+
+    # Compressão das respostas (brotli se o pacote estiver instalado, senão gzip)
+    COMPRESSAO_MINIMO_BYTES: int = 1024
+    COMPRESSAO_GZIP_NIVEL: int = 5
+    COMPRESSAO_BROTLI_QUALIDADE: int = 4
+
+    # Servidor de produção (python -m app.servidor)
+    WORKERS: int = 0                      # 0 = quantidade de CPUs
+    BIND_HOST: str = "0.0.0.0"
+    BIND_PORT: int = 8000
+    WORKER_MAX_REQUESTS: int = 10000      # recicla o worker após N requests...
+    WORKER_MAX_REQUESTS_JITTER: int = 1000  # ...mais um aleatório, para não reciclar todos juntos
+    WORKER_TIMEOUT: int = 60
+    WORKER_KEEPALIVE: int = 5
+
+    # Agendador de jobs de manutenção (cron: "min hora dia mês dia-da-semana")
+    AGENDADOR_ATIVO: bool = True
+    AGENDADOR_JITTER_SEGUNDOS: float = 30.0
+    AGENDADOR_CRON_VENCIDAS: str = "5 * * * *"      # contas vencidas -> VENCIDO
+    AGENDADOR_CRON_LICENCAS: str = "0 7 * * *"      # aviso de licenças vencidas/a vencer
+    AGENDADOR_CRON_CACHE: str = "*/15 * * * *"      # aquecimento do pool/cache (todos os workers)
+    AGENDADOR_CRON_LIMPEZA_RELATORIOS: str = "20 * * * *"  # retenção dos relatórios assíncronos
+    AGENDADOR_CRON_LIMPEZA_EXCLUSOES: str = "40 3 * * *"   # retenção das exclusões do /changes
+    LICENCA_AVISO_DIAS: int = 30
+
+    # Relatórios assíncronos (POST /relatorios/jobs)
+    RELATORIOS_DIR: str = "relatorios_jobs"   # resultados comprimidos (gzip)
+    RELATORIOS_WORKERS: int = 1               # tarefas consumindo a fila, por processo
+    RELATORIOS_POLL_SEGUNDOS: float = 2.0
+    RELATORIOS_MAX_POR_TENANT: int = 1        # em processamento ao mesmo tempo
+    RELATORIOS_MAX_FILA_POR_TENANT: int = 10  # pendentes + em processamento
+    RELATORIOS_TIMEOUT_SEGUNDOS: int = 900
+    RELATORIOS_RETENCAO_HORAS: int = 24
+
+    # Sincronização incremental (GET .../changes)
+    SYNC_JANELA_SEGUNDOS: int = 60   # sobreposição do token: cobre transações que commitam atrasadas
+    SYNC_RETENCAO_DIAS: int = 30     # exclusões guardadas; token mais antigo -> 410 (recarregar tudo)
+    SYNC_LIMITE_MAXIMO: int = 2000
+
+    # POST /batch (vários GETs em um request)
+    BATCH_MAX_ITENS: int = 20
+    BATCH_CONCORRENCIA: int = 4   # sub-requests simultâneos (= conexões do pool por batch)
+    BATCH_TIMEOUT: float = 30.0   # segundos por sub-request; estourou = 504 no item
+
+    # Eventos em tempo real (/eventos/stream e /eventos/ws, fan-out por LISTEN/NOTIFY)
+    EVENTOS_ATIVO: bool = True
+    EVENTOS_DEBOUNCE_SEGUNDOS: float = 0.5   # agrupa eventos antes de recalcular o dashboard
+    EVENTOS_HEARTBEAT_SEGUNDOS: float = 25.0
+    EVENTOS_FILA_CLIENTE: int = 100          # mensagens pendentes antes de derrubar um cliente lento
+    EVENTOS_MAX_CHAVES: int = 200            # chaves por evento (payload do NOTIFY até 8000 bytes)
+
+    # Conexão dedicada de LISTEN (uma por processo)
+    NOTIFY_PING_SEGUNDOS: float = 30.0
+    NOTIFY_RECONEXAO_MIN_SEGUNDOS: float = 1.0
+    NOTIFY_RECONEXAO_MAX_SEGUNDOS: float = 30.0
+
+    # Caches locais por worker, coerentes entre processos via invalidação (LISTEN/NOTIFY)
+    CACHE_USUARIOS_TTL_SEGUNDOS: float = 60.0   # usuário autenticado (evita o SELECT por request)
+    CACHE_USUARIOS_MAXIMO: int = 10000
+
+    # Desligamento: prazo para os requests em andamento terminarem
+    SHUTDOWN_DRENAGEM_SEGUNDOS: float = 20.0
+
+    # Instrumentação de SQL por request (header Server-Timing)
+    SQL_INSTRUMENTACAO: bool = True
+    SQL_INSTRUMENTACAO_AMOSTRA: float = 1.0  # fração dos requests instrumentados (0.0 a 1.0)
+
+    # Log de queries lentas (requer SQL_INSTRUMENTACAO)
+    SLOW_QUERY_MS: int = 500
+    SLOW_QUERY_LOG: str = "logs/queries_lentas.log"
+    SLOW_QUERY_EXPLAIN: bool = True
+    SLOW_QUERY_ROTAS: list[str] = ["/contas-pagar", "/contas-receber", "/relatorios", "/cadastros-gerais"]
+
+    # Detector de N+1: "off", "log" (staging) ou "erro" (desenvolvimento)
+    QUERY_DETECTOR: str = "off"
+    QUERY_DETECTOR_REPETICOES: int = 5   # mesmo statement no mesmo request
+    QUERY_DETECTOR_ORCAMENTO: int = 50   # total de queries por request
+
+    # Métricas (/metrics): com vários workers, diretório compartilhado para os snapshots
+    METRICS_MULTIPROC_DIR: Optional[str] = None
+
+    # Probes /health/live e /health/ready (estado do banco verificado em background)
+    HEALTH_INTERVALO_SEGUNDOS: float = 5.0
+    HEALTH_TIMEOUT_SEGUNDOS: float = 2.0
+    HEALTH_POOL_SATURACAO_MAX: float = 0.95  # fração do pool (size + overflow) em uso
+    HEALTH_VERIFICAR_MIGRACOES: bool = True  # exige revisão do banco == head do Alembic
+
     # Lê automaticamente do .env na raiz do backend
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -0,0 +1,83 @@
+# app/core/detector_queries.py
+"""
+Detector de N+1 e queries repetidas (desenvolvimento, staging e CI).
+
+Com o detector ligado, cada statement executado no request é contado. Ao fim
+do request, se o mesmo statement rodou mais de QUERY_DETECTOR_REPETICOES
+vezes ou o total passou de QUERY_DETECTOR_ORCAMENTO, o request é sinalizado:
+no modo "log" vira um warning, no modo "erro" um log de nível ERROR.
+
+O aviso sai depois da resposta enviada, então nunca vira exceção: o cliente já
+recebeu o status e o servidor só registraria um erro de ASGI. Quem faz o teste
+falhar é o plugin do pytest (app.core.pytest_queries), via ouvintes.
+"""
+import logging
+from collections import Counter
+from typing import Callable, Optional
+
+from app.core.config import settings
+from app.core.instrumentacao import registrar_finalizador_contagem
+from app.core.queries_lentas import normalizar_sql
+
+logger = logging.getLogger("app.detector_queries")
+
+OuvinteRequest = Callable[[str, Counter], None]
+
+
+class DetectorQueries:
+    def __init__(self):
+        self.modo = "off"
+        self.max_repeticoes = settings.QUERY_DETECTOR_REPETICOES
+        self.orcamento = settings.QUERY_DETECTOR_ORCAMENTO
+        # Recebem a contagem de cada request (usado pelo plugin do pytest)
+        self.ouvintes: list[OuvinteRequest] = []
+
+    def ativar(self, modo: str) -> None:
+        if modo not in ("off", "log", "erro"):
+            raise ValueError(f"Modo do detector inválido: {modo}")
+        self.modo = modo
+        registrar_finalizador_contagem(None if modo == "off" else finalizar_request)
+
+
+detector = DetectorQueries()
+
+
+def verificar(contagem: Counter, max_repeticoes: Optional[int], orcamento: Optional[int]) -> list[str]:
+    """Lista os problemas encontrados na contagem de um request"""
+    problemas = []
+
+    total = sum(contagem.values())
+    if orcamento is not None and total > orcamento:
+        problemas.append(f"{total} queries (orçamento: {orcamento})")
+
+    if max_repeticoes is not None:
+        # Agrupa pelo SQL normalizado: IN (...) com tamanhos diferentes contam juntos
+        repetidas = Counter()
+        for statement, vezes in contagem.items():
+            repetidas[normalizar_sql(statement)] += vezes
+        for sql, vezes in repetidas.most_common():
+            if vezes <= max_repeticoes:
+                break
+            problemas.append(f"{vezes}x (limite: {max_repeticoes}): {sql[:300]}")
+
+    return problemas
+
+
+def finalizar_request(rota: str, contagem: Counter) -> None:
+    """Chamado pelo middleware de instrumentação ao fim de cada request"""
+    for ouvinte in list(detector.ouvintes):
+        ouvinte(rota, contagem)
+
+    problemas = verificar(contagem, detector.max_repeticoes, detector.orcamento)
+    if not problemas:
+        return
+
+    mensagem = f"Possível N+1 em {rota}: " + " | ".join(problemas)
+    logger.log(logging.ERROR if detector.modo == "erro" else logging.WARNING, mensagem)
+
+
+def configurar_detector() -> None:
+    """Liga o detector no modo de QUERY_DETECTOR (chamado na inicialização)"""
+    # "off" não desliga um detector já ativado (ex.: pelo plugin do pytest)
+    if settings.QUERY_DETECTOR != "off":
+        detector.ativar(settings.QUERY_DETECTOR)
@@ -0,0 +1,106 @@
+# app/core/etag.py
+"""
+ETags fracos e GET condicional (If-None-Match -> 304).
+
+Listagens: a dependência etag_lista(...) lê o contador de alterações das
+tabelas envolvidas (rfe902ver, mantido por triggers no banco, por tenant) e
+monta o ETag com a query string e o escopo do usuário. Se o cliente já tem a
+versão, responde 304 antes de rodar a query da listagem e a serialização.
+
+Detalhe: verificar_etag_registro(...) usa datalt (ou datcri) do registro.
+"""
+import hashlib
+from datetime import date, datetime
+from typing import Callable, Optional
+
+from fastapi import Depends, HTTPException, Request, Response, status
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.respostas import formato_aceito
+from app.database import get_read_db
+from app.models.user import User
+from app.models.versao_tabela import VersaoTabela
+from app.routers.auth import get_current_user
+
+CACHE_CONTROL = "private, no-cache"  # o navegador guarda, mas sempre revalida
+
+
+def gerar_etag(*partes) -> str:
+    digest = hashlib.sha1("|".join(str(parte) for parte in partes).encode()).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def etag_confere(request: Request, etag: str) -> bool:
+    """Comparação fraca com o If-None-Match (lista separada por vírgula ou *)"""
+    cabecalho = request.headers.get("if-none-match")
+    if not cabecalho:
+        return False
+    valor = etag.removeprefix("W/")
+    for candidato in cabecalho.split(","):
+        candidato = candidato.strip()
+        if candidato == "*" or candidato.removeprefix("W/") == valor:
+            return True
+    return False
+
+
+def responder_etag(request: Request, response: Response, etag: str) -> None:
+    """304 se o cliente já tem a versão; senão anota o ETag na resposta"""
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if etag_confere(request, etag):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+
+
+async def versao_tabelas(db: AsyncSession, tabelas: tuple[str, ...], current_user: User) -> int:
+    """Soma dos contadores das tabelas no escopo do usuário (superadmin: todos os tenants)"""
+    query = select(func.coalesce(func.sum(VersaoTabela.numver), 0)).where(VersaoTabela.tabver.in_(tabelas))
+    if not current_user.issuper:
+        query = query.where(
+            VersaoTabela.codemp == current_user.codemp,
+            VersaoTabela.codfil == current_user.codfil,
+        )
+    result = await db.execute(query)
+    return result.scalar()
+
+
+def etag_lista(*tabelas: str, usuario: Callable = get_current_user):
+    """
+    Dependência de GET condicional para listagens.
+
+    `tabelas` são todas as tabelas cujo conteúdo aparece na resposta (ex.: contas
+    + pessoas, pelo nome do fornecedor). `usuario` permite usar require_superadmin.
+    """
+    async def dependencia(
+        request: Request,
+        response: Response,
+        db: AsyncSession = Depends(get_read_db),  # mesma sessão da listagem (réplica ou primário)
+        current_user: User = Depends(usuario),
+    ) -> str:
+        versao = await versao_tabelas(db, tabelas, current_user)
+        etag = gerar_etag(
+            request.url.path,
+            sorted(request.query_params.multi_items()),
+            formato_aceito(request.headers.get("accept", "")),  # JSON, colunar e msgpack têm ETags distintos
+            current_user.codemp,
+            current_user.codfil,
+            current_user.issuper,
+            versao,
+            date.today(),  # filtros relativos a "hoje" (ex.: vencidas) mudam na virada do dia
+        )
+        responder_etag(request, response, etag)
+        return etag
+
+    return dependencia
+
+
+def verificar_etag_registro(
+    request: Request,
+    response: Response,
+    tabela: str,
+    chave: int,
+    datalt: Optional[datetime],
+    datcri: Optional[datetime] = None,
+) -> None:
+    """ETag do detalhe a partir da última alteração do registro"""
+    responder_etag(request, response, gerar_etag(tabela, chave, datalt or datcri))
@@ -0,0 +1,205 @@
+# app/core/eventos.py
+"""
+Canal de eventos por tenant (GET /eventos/stream e WebSocket /eventos/ws).
+
+Os routers publicam, dentro da transação da alteração, um delta compacto
+(tenant, entidade, ação, chaves) no canal rfe_eventos do Postgres; cada worker
+recebe pelo LISTEN (app/core/notificacoes.py) e repassa aos clientes conectados
+daquele tenant. Superadmins recebem os eventos de todos os tenants.
+
+Junto com o delta, o worker recalcula o DashboardResumo do tenant (agrupando os
+eventos de EVENTOS_DEBOUNCE_SEGUNDOS) e envia só os campos que mudaram. Tenant
+sem cliente conectado neste worker não custa nada: o evento é descartado.
+
+Mensagens para o cliente: {"evento": "conta" | "dashboard" | "resincronizar", "dados": {...}}.
+"resincronizar" é enviado após uma queda do LISTEN (eventos podem ter se perdido).
+"""
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Iterable, Optional
+
+import orjson
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import notificacoes
+from app.core.config import settings
+from app.core.respostas import dumps
+from app.database import AsyncSessionLocal
+from app.models.user import User
+
+logger = logging.getLogger("app.eventos")
+
+CANAL = "rfe_eventos"
+
+Tenant = Optional[tuple[int, int]]  # None: visão do superadmin (todos os tenants)
+
+
+class Cliente:
+    def __init__(self, usuario: User):
+        self.tenant: Tenant = None if usuario.issuper else (usuario.codemp, usuario.codfil)
+        self.fila: asyncio.Queue = asyncio.Queue(maxsize=settings.EVENTOS_FILA_CLIENTE)
+        self.encerrado = False
+
+    def enviar(self, evento: str, dados: dict) -> None:
+        if self.encerrado:
+            return
+        try:
+            self.fila.put_nowait({"evento": evento, "dados": dados})
+        except asyncio.QueueFull:
+            # Cliente lento: encerra; ao reconectar ele recebe o snapshot completo
+            logger.warning("Cliente de eventos lento encerrado (tenant %s)", self.tenant)
+            self.encerrar()
+
+    def encerrar(self) -> None:
+        """Fim do stream: esvazia a fila e deixa o marcador None"""
+        self.encerrado = True
+        while not self.fila.empty():
+            self.fila.get_nowait()
+        self.fila.put_nowait(None)
+
+
+encerrando = False  # desligamento: quem se inscrever agora já sai encerrado
+clientes: dict[Tenant, set[Cliente]] = defaultdict(set)
+snapshots: dict[Tenant, dict] = {}   # último dashboard enviado, por tenant
+recalculos: dict[Tenant, asyncio.Task] = {}
+travas: dict[Tenant, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+
+# ========== PUBLICAÇÃO (ROUTERS) ==========
+
+async def publicar_evento(
+    db: AsyncSession,
+    codemp: Optional[int],
+    codfil: Optional[int],
+    entidade: str,
+    acao: str,
+    chaves: Iterable[int] = (),
+) -> None:
+    """
+    NOTIFY na transação da sessão: só é entregue se ela for commitada.
+    codemp None = todos os tenants (ex.: varredura de vencidas do agendador).
+    """
+    if not settings.EVENTOS_ATIVO:
+        return
+    chaves = list(chaves)
+    payload = {"e": codemp, "f": codfil, "t": entidade, "a": acao, "k": chaves[:settings.EVENTOS_MAX_CHAVES]}
+    await db.execute(select(func.pg_notify(CANAL, dumps(payload).decode())))
+
+
+# ========== RECEBIMENTO (LISTEN) ==========
+
+def receber(payload: str) -> None:
+    try:
+        evento = orjson.loads(payload)
+    except orjson.JSONDecodeError:
+        logger.warning("Evento inválido descartado: %r", payload[:200])
+        return
+
+    if evento.get("e") is None:
+        alvos = list(clientes)
+    else:
+        alvos = [(evento["e"], evento["f"]), None]
+
+    delta = {"entidade": evento.get("t"), "acao": evento.get("a"), "chaves": evento.get("k", [])}
+    for alvo in alvos:
+        if not clientes.get(alvo):
+            continue
+        for cliente in list(clientes[alvo]):
+            cliente.enviar("conta", delta)
+        agendar_dashboard(alvo)
+
+
+def resincronizar() -> None:
+    """Após queda do LISTEN: clientes recarregam listas e o dashboard é recalculado"""
+    for alvo, conectados in list(clientes.items()):
+        for cliente in list(conectados):
+            cliente.enviar("resincronizar", {})
+        agendar_dashboard(alvo)
+
+
+# ========== DASHBOARD ==========
+
+async def calcular_snapshot(tenant: Tenant) -> dict:
+    from app.routers.relatorios import calcular_dashboard
+
+    if tenant is None:
+        usuario = User(codemp=0, codfil=0, issuper=True)
+    else:
+        usuario = User(codemp=tenant[0], codfil=tenant[1], issuper=False)
+    async with AsyncSessionLocal() as db:
+        resumo = await calcular_dashboard(db, usuario)
+    return resumo.model_dump(mode="json")
+
+
+def agendar_dashboard(tenant: Tenant) -> None:
+    if tenant not in recalculos:
+        recalculos[tenant] = asyncio.get_running_loop().create_task(atualizar_dashboard(tenant))
+
+
+async def atualizar_dashboard(tenant: Tenant) -> None:
+    try:
+        await asyncio.sleep(settings.EVENTOS_DEBOUNCE_SEGUNDOS)
+        recalculos.pop(tenant, None)  # eventos a partir daqui agendam outro recálculo
+        async with travas[tenant]:
+            if not clientes.get(tenant):
+                return
+            novo = await calcular_snapshot(tenant)
+            anterior = snapshots.get(tenant, {})
+            delta = {campo: valor for campo, valor in novo.items() if anterior.get(campo) != valor}
+            snapshots[tenant] = novo
+        if delta:
+            for cliente in list(clientes.get(tenant, ())):
+                cliente.enviar("dashboard", delta)
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        logger.exception("Falha ao recalcular o dashboard do tenant %s", tenant)
+    finally:
+        if recalculos.get(tenant) is asyncio.current_task():
+            recalculos.pop(tenant, None)
+
+
+# ========== CLIENTES ==========
+
+async def inscrever(usuario: User) -> Cliente:
+    """Registra o cliente e enfileira o dashboard completo como primeira mensagem"""
+    cliente = Cliente(usuario)
+    async with travas[cliente.tenant]:
+        snapshot = snapshots.get(cliente.tenant)
+        if snapshot is None:
+            snapshot = snapshots[cliente.tenant] = await calcular_snapshot(cliente.tenant)
+        clientes[cliente.tenant].add(cliente)
+    cliente.enviar("dashboard", snapshot)
+    if encerrando:  # inscrição em andamento quando o desligamento começou
+        cliente.encerrar()
+    return cliente
+
+
+def desinscrever(cliente: Cliente) -> None:
+    conectados = clientes.get(cliente.tenant)
+    if conectados is None:
+        return
+    conectados.discard(cliente)
+    if not conectados:
+        # Sem clientes o snapshot deixa de ser mantido pelos eventos
+        del clientes[cliente.tenant]
+        snapshots.pop(cliente.tenant, None)
+
+
+def registrar() -> None:
+    notificacoes.registrar_canal(CANAL, receber)
+    notificacoes.ao_reconectar(resincronizar)
+
+
+def encerrar_clientes() -> None:
+    """Desligamento (no sinal, ver ciclo_vida.iniciar_desligamento): encerra os streams abertos"""
+    global encerrando
+    encerrando = True
+    for conectados in list(clientes.values()):
+        for cliente in list(conectados):
+            cliente.encerrar()
+    for tarefa in recalculos.values():
+        tarefa.cancel()
+    recalculos.clear()
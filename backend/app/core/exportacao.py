@@ -0,0 +1,187 @@
+# app/core/exportacao.py
+"""
+Exportação em streaming (CSV e XLSX) direto de um cursor server-side.
+
+As linhas são lidas em partições de EXPORT_YIELD_PER e escritas na resposta
+à medida que chegam, então a memória não cresce com o tamanho do tenant.
+A sessão vem de `fabrica` (primário por padrão; os endpoints passam
+fabrica_leitura(request) para ler da réplica).
+"""
+import csv
+import io
+import zipfile
+from datetime import date, datetime
+from decimal import Decimal
+from typing import AsyncIterator, Literal, Sequence
+from xml.sax.saxutils import escape
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.sql import Select
+
+from app.core.tempo_limite import aplicar_timeout
+from app.database import AsyncSessionLocal
+
+EXPORT_YIELD_PER = 1000
+
+FormatoExportacao = Literal["csv", "xlsx"]
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+async def stream_partitions(
+    query: Select, fabrica: async_sessionmaker = AsyncSessionLocal
+) -> AsyncIterator[tuple[list[str], Sequence]]:
+    """Executa a query com cursor server-side e devolve (colunas, partição) a cada lote"""
+    async with fabrica() as db:
+        await aplicar_timeout(db, "lote")
+        result = await db.stream(query.execution_options(yield_per=EXPORT_YIELD_PER))
+        colunas = list(result.keys())
+        yield colunas, []  # garante o cabeçalho mesmo sem linhas
+        async for particao in result.partitions():
+            yield colunas, particao
+
+
+# ========== CSV ==========
+
+def formatar_csv(valor) -> str:
+    if valor is None:
+        return ""
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    return str(valor)
+
+
+async def gerar_csv(query: Select, fabrica: async_sessionmaker = AsyncSessionLocal) -> AsyncIterator[bytes]:
+    """CSV separado por ';' com BOM (abre direto no Excel)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=";")
+    cabecalho_enviado = False
+
+    yield "\ufeff".encode()
+    async for colunas, particao in stream_partitions(query, fabrica):
+        if not cabecalho_enviado:
+            writer.writerow(colunas)
+            cabecalho_enviado = True
+        writer.writerows([formatar_csv(v) for v in row] for row in particao)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+# ========== XLSX ==========
+
+class ZipStreamBuffer:
+    """Destino não-seekable para o ZipFile: acumula bytes até serem drenados"""
+
+    def __init__(self):
+        self.dados = bytearray()
+
+    def write(self, b) -> int:
+        self.dados += b
+        return len(b)
+
+    def flush(self) -> None:
+        pass
+
+    def drenar(self) -> bytes:
+        saida = bytes(self.dados)
+        self.dados.clear()
+        return saida
+
+
+XLSX_ARQUIVOS_FIXOS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Dados" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+
+def celula_xlsx(valor) -> str:
+    """Número vira célula numérica; o resto vira texto inline"""
+    if valor is None:
+        return "<c/>"
+    if isinstance(valor, (int, float, Decimal)) and not isinstance(valor, bool):
+        return f"<c><v>{valor}</v></c>"
+    if isinstance(valor, (date, datetime)):
+        valor = valor.isoformat()
+    return f'<c t="inlineStr"><is><t>{escape(str(valor))}</t></is></c>'
+
+
+def linha_xlsx(valores) -> str:
+    return "<row>" + "".join(celula_xlsx(v) for v in valores) + "</row>"
+
+
+async def gerar_xlsx(query: Select, fabrica: async_sessionmaker = AsyncSessionLocal) -> AsyncIterator[bytes]:
+    """XLSX mínimo (uma planilha, strings inline) escrito incrementalmente no zip"""
+    saida = ZipStreamBuffer()
+
+    with zipfile.ZipFile(saida, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for nome, conteudo in XLSX_ARQUIVOS_FIXOS.items():
+            zf.writestr(nome, conteudo)
+
+        with zf.open("xl/worksheets/sheet1.xml", mode="w", force_zip64=True) as planilha:
+            planilha.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                b'<sheetData>'
+            )
+            cabecalho_enviado = False
+            async for colunas, particao in stream_partitions(query, fabrica):
+                if not cabecalho_enviado:
+                    planilha.write(linha_xlsx(colunas).encode())
+                    cabecalho_enviado = True
+                planilha.write("".join(linha_xlsx(row) for row in particao).encode())
+                yield saida.drenar()
+            planilha.write(b"</sheetData></worksheet>")
+
+    yield saida.drenar()
+
+
+def exportar(
+    query: Select,
+    formato: FormatoExportacao,
+    nome_arquivo: str,
+    fabrica: async_sessionmaker = AsyncSessionLocal,
+) -> StreamingResponse:
+    """Resposta em streaming no formato pedido"""
+    gerador = gerar_xlsx(query, fabrica) if formato == "xlsx" else gerar_csv(query, fabrica)
+    return StreamingResponse(
+        gerador,
+        media_type=MEDIA_TYPES[formato],
+        headers={"Content-Disposition": f'attachment; filename="{nome_arquivo}.{formato}"'},
+    )
@@ -0,0 +1,262 @@
+# app/core/instrumentacao.py
+"""
+Instrumentação de SQL por request.
+
+Os hooks de cursor do SQLAlchemy acumulam, em um ContextVar, a quantidade de
+queries, o tempo total no banco e a query mais lenta do request. O middleware
+devolve isso no header Server-Timing e agrega os números por rota.
+
+O caminho quente só faz perf_counter e somas: nenhuma string é formatada
+durante as queries. Requests fora da amostragem só medem a duração, usada
+para avisar o observador de queries lentas (ver app/core/queries_lentas.py).
+
+Todo request autenticado (amostrado ou não) também soma no agregado do seu
+tenant: requests, queries, tempo de banco e linhas retornadas, além da espera
+e das recusas dos limites por tenant (app/core/limites_tenant.py). É a base
+para planejamento de capacidade (/superadmin/sql/tenants e /metrics).
+"""
+import random
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+from sqlalchemy import URL, event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+class EstatisticasSQL:
+    """Números de SQL de um único request"""
+    __slots__ = ("queries", "tempo_db", "tempo_mais_lenta", "mais_lenta")
+
+    def __init__(self):
+        self.queries = 0
+        self.tempo_db = 0.0
+        self.tempo_mais_lenta = 0.0
+        self.mais_lenta: Optional[str] = None  # referência ao statement, sem cópia
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.tempo_db * 1000:.2f};desc="{self.queries} queries"'
+
+
+class AgregadoRota:
+    """Acumulado de SQL por rota (método + path template)"""
+    __slots__ = ("requests", "queries", "tempo_db", "tempo_mais_lenta", "mais_lenta")
+
+    def __init__(self):
+        self.requests = 0
+        self.queries = 0
+        self.tempo_db = 0.0
+        self.tempo_mais_lenta = 0.0
+        self.mais_lenta: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "queries": self.queries,
+            "queries_por_request": round(self.queries / self.requests, 2) if self.requests else 0,
+            "tempo_db_ms": round(self.tempo_db * 1000, 2),
+            "tempo_db_medio_ms": round(self.tempo_db * 1000 / self.requests, 2) if self.requests else 0,
+            "mais_lenta_ms": round(self.tempo_mais_lenta * 1000, 2),
+            "mais_lenta": self.mais_lenta,
+        }
+
+
+class AgregadoTenant:
+    """Uso acumulado por tenant (codemp, codfil) neste worker"""
+    __slots__ = ("requests", "queries", "tempo_db", "linhas", "tempo_espera", "rejeitados")
+
+    def __init__(self):
+        self.requests = 0
+        self.queries = 0
+        self.tempo_db = 0.0
+        self.linhas = 0
+        self.tempo_espera = 0.0  # aguardando vaga no limite do tenant
+        self.rejeitados = 0      # 429 por espera esgotada
+
+    def to_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "queries": self.queries,
+            "tempo_db_ms": round(self.tempo_db * 1000, 2),
+            "tempo_db_medio_ms": round(self.tempo_db * 1000 / self.requests, 2) if self.requests else 0,
+            "linhas": self.linhas,
+            "tempo_espera_ms": round(self.tempo_espera * 1000, 2),
+            "rejeitados": self.rejeitados,
+        }
+
+
+class ContextoRequest:
+    """Dados do request visíveis para os hooks de SQL"""
+    __slots__ = ("scope", "tenant", "stats", "contagem", "uso_tenant")
+
+    def __init__(self, scope: dict, stats: Optional[EstatisticasSQL], contagem: Optional[Counter] = None):
+        self.scope = scope
+        self.tenant: Optional[tuple[int, int]] = None  # preenchido em get_current_user
+        self.stats = stats  # None quando o request não entrou na amostragem
+        self.contagem = contagem  # statement -> execuções (só com o detector ligado)
+        self.uso_tenant: Optional[AgregadoTenant] = None  # idem, junto com o tenant
+
+
+contexto_atual: ContextVar[Optional[ContextoRequest]] = ContextVar("contexto_sql", default=None)
+
+agregados_por_rota: dict[str, AgregadoRota] = {}
+agregados_por_tenant: dict[tuple[int, int], AgregadoTenant] = {}
+
+# Observador chamado quando uma query passa do limite (segundos), com a URL do banco que a rodou
+ObservadorLento = Callable[[ContextoRequest, str, object, float, URL], None]
+limite_query_lenta: Optional[float] = None
+observador_query_lenta: Optional[ObservadorLento] = None
+
+
+# Contagem de statements por request (detector de N+1, ver app/core/detector_queries.py)
+FinalizadorContagem = Callable[[str, Counter], None]
+finalizador_contagem: Optional[FinalizadorContagem] = None
+
+# execution_options de statements de infraestrutura (ex.: SET LOCAL do tempo_limite), fora da contagem
+FORA_DA_CONTAGEM = "fora_da_contagem"
+
+
+def registrar_finalizador_contagem(finalizador: Optional[FinalizadorContagem]) -> None:
+    """Liga (ou desliga, com None) a contagem de statements por request"""
+    global finalizador_contagem
+    finalizador_contagem = finalizador
+
+
+def registrar_observador_lento(limite_segundos: float, observador: ObservadorLento) -> None:
+    global limite_query_lenta, observador_query_lenta
+    limite_query_lenta = limite_segundos
+    observador_query_lenta = observador
+
+
+def agregado_tenant(tenant: tuple[int, int]) -> AgregadoTenant:
+    agregado = agregados_por_tenant.get(tenant)
+    if agregado is None:
+        agregado = agregados_por_tenant[tenant] = AgregadoTenant()
+    return agregado
+
+
+def definir_tenant_request(codemp: int, codfil: int) -> None:
+    """Anota o tenant do usuário autenticado no contexto do request"""
+    contexto = contexto_atual.get()
+    if contexto is not None and contexto.tenant is None:
+        contexto.tenant = (codemp, codfil)
+        contexto.uso_tenant = agregado_tenant(contexto.tenant)
+        contexto.uso_tenant.requests += 1
+
+
+# ========== HOOKS DO ENGINE ==========
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if contexto_atual.get() is None:
+        return
+    conn.info.setdefault("inicio_queries", []).append(time.perf_counter())
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    contexto = contexto_atual.get()
+    if contexto is None:
+        return
+    inicios = conn.info.get("inicio_queries")
+    if not inicios:
+        return
+
+    duracao = time.perf_counter() - inicios.pop()
+
+    stats = contexto.stats
+    if stats is not None:
+        stats.queries += 1
+        stats.tempo_db += duracao
+        if duracao > stats.tempo_mais_lenta:
+            stats.tempo_mais_lenta = duracao
+            stats.mais_lenta = statement
+
+    if contexto.contagem is not None and not (context and context.execution_options.get(FORA_DA_CONTAGEM)):
+        contexto.contagem[statement] += 1
+
+    uso = contexto.uso_tenant
+    if uso is not None:
+        uso.queries += 1
+        uso.tempo_db += duracao
+        if cursor.description is not None and cursor.rowcount > 0:  # SELECT/RETURNING, quando o driver informa
+            uso.linhas += cursor.rowcount
+
+    if limite_query_lenta is not None and duracao >= limite_query_lenta and not executemany:
+        observador_query_lenta(contexto, statement, parameters, duracao, conn.engine.url)
+
+
+def instalar_instrumentacao(engine: AsyncEngine) -> None:
+    """Registra os hooks de cursor no engine (uma vez, na inicialização)"""
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", after_cursor_execute)
+
+
+# ========== AGREGAÇÃO POR ROTA ==========
+
+def nome_rota(scope: dict) -> str:
+    """Método + path template da rota (ex.: "GET /contas-pagar/{codcap}")"""
+    route = scope.get("route")
+    path = getattr(route, "path", None) or "<sem rota>"
+    return f"{scope.get('method', '')} {path}"
+
+
+def registrar_rota(scope: dict, stats: EstatisticasSQL) -> None:
+    chave = nome_rota(scope)
+    agregado = agregados_por_rota.get(chave)
+    if agregado is None:
+        agregado = agregados_por_rota[chave] = AgregadoRota()
+
+    agregado.requests += 1
+    agregado.queries += stats.queries
+    agregado.tempo_db += stats.tempo_db
+    if stats.tempo_mais_lenta > agregado.tempo_mais_lenta:
+        agregado.tempo_mais_lenta = stats.tempo_mais_lenta
+        agregado.mais_lenta = stats.mais_lenta
+
+
+def estatisticas_por_rota() -> dict[str, dict]:
+    """Agregados ordenados pelo tempo total no banco (maior primeiro)"""
+    ordenados = sorted(agregados_por_rota.items(), key=lambda item: item[1].tempo_db, reverse=True)
+    return {rota: agregado.to_dict() for rota, agregado in ordenados}
+
+
+def estatisticas_por_tenant() -> dict[str, dict]:
+    """Uso por tenant ("codemp/codfil"), ordenado pelo tempo total no banco"""
+    ordenados = sorted(agregados_por_tenant.items(), key=lambda item: item[1].tempo_db, reverse=True)
+    return {f"{codemp}/{codfil}": agregado.to_dict() for (codemp, codfil), agregado in ordenados}
+
+
+# ========== MIDDLEWARE ==========
+
+class InstrumentacaoSQLMiddleware:
+    """Middleware ASGI que ativa a coleta e adiciona o header Server-Timing"""
+
+    def __init__(self, app, amostragem: float = 1.0):
+        self.app = app
+        self.amostragem = amostragem
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        amostrado = self.amostragem >= 1.0 or random.random() < self.amostragem
+        stats = EstatisticasSQL() if amostrado else None
+        contagem = Counter() if finalizador_contagem is not None else None
+        token = contexto_atual.set(ContextoRequest(scope, stats, contagem))
+
+        async def send_com_timing(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", stats.server_timing().encode("latin-1")))
+                message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_com_timing if amostrado else send)
+        finally:
+            contexto_atual.reset(token)
+            if amostrado:
+                registrar_rota(scope, stats)
+            if contagem is not None and finalizador_contagem is not None:
+                finalizador_contagem(nome_rota(scope), contagem)
@@ -0,0 +1,146 @@
+# app/core/invalidacao.py
+"""
+Invalidação de caches locais entre workers/hosts (canal rfe_invalidacao).
+
+Cada worker mantém seus caches em memória (CacheLocal). Quem altera um dado
+publica, dentro da própria transação, (tenant, entidade, chave) com
+publicar_invalidacao; o NOTIFY só sai no commit e chega a todos os processos
+pela conexão de LISTEN (app/core/notificacoes.py), que removem a entrada.
+
+Coerência:
+- chave None invalida o tenant inteiro da entidade; codemp None, a entidade toda;
+- enquanto o LISTEN está fora, os caches não são consultados nem preenchidos
+  (toda leitura vai ao banco);
+- ao reconectar, as notificações do intervalo se perderam: todos os caches são
+  esvaziados antes de voltarem a ser usados;
+- um valor lido do banco antes de uma invalidação não é guardado depois dela
+  (marca()/guardar(marca=...)), senão o dado antigo voltaria ao cache.
+"""
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+import orjson
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import metricas, notificacoes
+from app.core.respostas import dumps
+
+logger = logging.getLogger("app.invalidacao")
+
+CANAL = "rfe_invalidacao"
+
+caches: dict[str, "CacheLocal"] = {}
+
+
+class CacheLocal:
+    """Cache LRU com TTL por processo; entradas por (codemp, codfil, chave)"""
+
+    def __init__(self, nome: str, entidade: str, ttl: float, maximo: int):
+        self.nome = nome
+        self.entidade = entidade
+        self.ttl = ttl
+        self.maximo = maximo
+        self.itens: OrderedDict[tuple, tuple[float, Any]] = OrderedDict()
+        self.geracao = 0  # incrementa a cada invalidação
+        self.acertos = 0
+        self.falhas = 0
+        caches[nome] = self
+
+    def obter(self, codemp: int, codfil: int, chave: Hashable) -> Optional[Any]:
+        if not notificacoes.ativo:
+            return None
+        item = self.itens.get((codemp, codfil, chave))
+        if item is None or item[0] < time.monotonic():
+            self.falhas += 1
+            return None
+        self.itens.move_to_end((codemp, codfil, chave))
+        self.acertos += 1
+        return item[1]
+
+    def marca(self) -> int:
+        """Chamar antes de ler do banco e repassar ao guardar()"""
+        return self.geracao
+
+    def guardar(self, codemp: int, codfil: int, chave: Hashable, valor: Any, marca: int) -> None:
+        if not notificacoes.ativo or marca != self.geracao:
+            return
+        self.itens[(codemp, codfil, chave)] = (time.monotonic() + self.ttl, valor)
+        self.itens.move_to_end((codemp, codfil, chave))
+        while len(self.itens) > self.maximo:
+            self.itens.popitem(last=False)
+
+    def invalidar(self, codemp: Optional[int], codfil: Optional[int], chave: Optional[Hashable]) -> None:
+        self.geracao += 1
+        if codemp is None:
+            self.itens.clear()
+        elif chave is not None:
+            self.itens.pop((codemp, codfil, chave), None)
+        else:
+            for item in [item for item in self.itens if item[:2] == (codemp, codfil)]:
+                del self.itens[item]
+
+    def limpar(self) -> None:
+        self.geracao += 1
+        self.itens.clear()
+
+
+# ========== PUBLICAÇÃO (ROUTERS) ==========
+
+async def publicar_invalidacao(
+    db: AsyncSession,
+    codemp: Optional[int],
+    codfil: Optional[int],
+    entidade: str,
+    chave: Optional[Hashable] = None,
+) -> None:
+    """NOTIFY na transação da sessão: os workers só invalidam se ela for commitada"""
+    payload = {"e": codemp, "f": codfil, "t": entidade, "k": chave}
+    await db.execute(select(func.pg_notify(CANAL, dumps(payload).decode())))
+
+
+# ========== RECEBIMENTO (LISTEN) ==========
+
+def receber(payload: str) -> None:
+    try:
+        mensagem = orjson.loads(payload)
+    except orjson.JSONDecodeError:
+        logger.warning("Invalidação inválida descartada: %r", payload[:200])
+        return
+    for cache in caches.values():
+        if cache.entidade == mensagem.get("t"):
+            cache.invalidar(mensagem.get("e"), mensagem.get("f"), mensagem.get("k"))
+
+
+def limpar_tudo() -> None:
+    """Após queda do LISTEN: invalidações do intervalo se perderam"""
+    for cache in caches.values():
+        cache.limpar()
+    logger.info("Caches locais esvaziados após reconexão do LISTEN")
+
+
+def registrar() -> None:
+    notificacoes.registrar_canal(CANAL, receber)
+    notificacoes.ao_reconectar(limpar_tudo)
+    registrar_metricas()
+
+
+def registrar_metricas() -> None:
+    # Label worker: cada processo tem seus próprios caches
+    worker = os.getpid()
+
+    def por_cache(valor: Callable[[CacheLocal], float]) -> Callable[[], dict[str, float]]:
+        def callback() -> dict[str, float]:
+            return {
+                f'cache="{metricas.escapar_label(nome)}",worker="{worker}"': float(valor(cache))
+                for nome, cache in caches.items()
+            }
+        return callback
+
+    registro = metricas.registro
+    registro.registrar_gauge("cache_local_itens", "Entradas nos caches locais", por_cache(lambda c: len(c.itens)))
+    registro.registrar_gauge("cache_local_acertos", "Leituras atendidas pelo cache", por_cache(lambda c: c.acertos))
+    registro.registrar_gauge("cache_local_falhas", "Leituras que foram ao banco", por_cache(lambda c: c.falhas))
@@ -0,0 +1,131 @@
+# app/core/limites_tenant.py
+"""
+Limite de concorrência por tenant (bulkhead) nos endpoints pesados de banco.
+
+Todos os tenants dividem o mesmo pool (app/database.py): um fluxo de caixa de
+um ano ou um atualizar-vencidas de superadmin não podem ocupar todas as
+conexões. Cada tenant (codemp, codfil) tem TENANT_CONCORRENCIA unidades por
+worker; cada operação consome o peso configurado em TENANT_PESOS (padrão 1).
+
+A fila é FIFO: uma operação pesada esperando não é ultrapassada pelas leves
+que chegam depois. Quem espera mais que TENANT_ESPERA_MAXIMA_SEGUNDOS recebe
+429 com Retry-After. Espera e recusas entram no uso do tenant
+(instrumentacao.agregado_tenant).
+
+Uso, nos routers:
+
+    dependencies=[Depends(limite_tenant("fluxo_caixa"))]
+"""
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Callable
+
+from fastapi import Depends, HTTPException, status
+
+from app.core import metricas
+from app.core.config import settings
+from app.core.instrumentacao import agregado_tenant, agregados_por_tenant
+from app.models.user import User
+from app.routers.auth import get_current_user
+
+
+class Compartimento:
+    """Semáforo com peso e fila FIFO (asyncio.Semaphore só tem peso 1)"""
+
+    def __init__(self, capacidade: int):
+        self.capacidade = capacidade
+        self.em_uso = 0
+        self.fila: deque[tuple[int, asyncio.Future]] = deque()
+
+    async def adquirir(self, peso: int) -> None:
+        if not self.fila and self.em_uso + peso <= self.capacidade:
+            self.em_uso += peso
+            return
+        item = (peso, asyncio.get_running_loop().create_future())
+        self.fila.append(item)
+        try:
+            await item[1]
+        except asyncio.CancelledError:
+            if item in self.fila:
+                self.fila.remove(item)
+                self.acordar()  # quem estava atrás pode caber agora
+            else:
+                self.liberar(peso)  # vaga concedida junto com o cancelamento
+            raise
+
+    def liberar(self, peso: int) -> None:
+        self.em_uso -= peso
+        self.acordar()
+
+    def acordar(self) -> None:
+        while self.fila and self.em_uso + self.fila[0][0] <= self.capacidade:
+            peso, futuro = self.fila.popleft()
+            self.em_uso += peso
+            futuro.set_result(None)
+
+
+compartimentos: dict[tuple[int, int], Compartimento] = {}
+
+
+def limite_tenant(operacao: str, usuario: Callable = get_current_user):
+    """Dependência que segura peso(operacao) unidades do tenant até o fim do request"""
+    peso = min(settings.TENANT_PESOS.get(operacao, 1), settings.TENANT_CONCORRENCIA)
+
+    async def dependencia(current_user: User = Depends(usuario)):
+        tenant = (current_user.codemp, current_user.codfil)
+        compartimento = compartimentos.get(tenant)
+        if compartimento is None:
+            compartimento = compartimentos[tenant] = Compartimento(settings.TENANT_CONCORRENCIA)
+        uso = agregado_tenant(tenant)
+
+        inicio = time.perf_counter()
+        try:
+            await asyncio.wait_for(compartimento.adquirir(peso), timeout=settings.TENANT_ESPERA_MAXIMA_SEGUNDOS)
+        except asyncio.TimeoutError:
+            uso.rejeitados += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Muitas operações simultâneas para esta empresa/filial. Tente novamente em instantes",
+                headers={"Retry-After": str(math.ceil(settings.TENANT_ESPERA_MAXIMA_SEGUNDOS))},
+            )
+        finally:
+            uso.tempo_espera += time.perf_counter() - inicio
+
+        try:
+            yield
+        finally:
+            compartimento.liberar(peso)
+
+    return dependencia
+
+
+def registrar_metricas() -> None:
+    # Contadores somáveis entre workers: sem label de worker
+    def por_tenant(valor: Callable) -> Callable[[], dict[str, float]]:
+        def callback() -> dict[str, float]:
+            return {
+                f'codemp="{codemp}",codfil="{codfil}"': float(valor(uso))
+                for (codemp, codfil), uso in agregados_por_tenant.items()
+            }
+        return callback
+
+    def em_uso() -> dict[str, float]:
+        return {
+            f'codemp="{codemp}",codfil="{codfil}"': float(compartimento.em_uso)
+            for (codemp, codfil), compartimento in compartimentos.items()
+        }
+
+    registro = metricas.registro
+    registro.registrar_gauge("tenant_requests", "Requests autenticados por tenant", por_tenant(lambda u: u.requests))
+    registro.registrar_gauge("tenant_queries", "Queries executadas por tenant", por_tenant(lambda u: u.queries))
+    registro.registrar_gauge("tenant_db_segundos", "Tempo no banco por tenant", por_tenant(lambda u: u.tempo_db))
+    registro.registrar_gauge("tenant_linhas", "Linhas retornadas pelo banco por tenant", por_tenant(lambda u: u.linhas))
+    registro.registrar_gauge(
+        "tenant_espera_segundos", "Espera no limite de concorrência por tenant", por_tenant(lambda u: u.tempo_espera)
+    )
+    registro.registrar_gauge(
+        "tenant_rejeitados", "Requests recusados (429) pelo limite do tenant", por_tenant(lambda u: u.rejeitados)
+    )
+    registro.registrar_gauge("tenant_unidades_em_uso", "Unidades do limite do tenant ocupadas", em_uso)
@@ -0,0 +1,78 @@
+# app/core/manutencao.py
+"""
+Jobs de manutenção executados pelo agendador (ver app/core/agendador.py).
+"""
+import logging
+from datetime import date, timedelta
+
+from sqlalchemy import select
+
+from app.core import agendador
+from app.core.eventos import publicar_evento
+from app.core.relatorios_jobs import limpar_relatorios
+from app.core.sincronizacao import limpar_exclusoes
+from app.core.tempo_limite import aplicar_timeout
+from app.core.config import settings
+from app.database import AsyncSessionLocal
+from app.models.licenca import Licenca
+
+logger = logging.getLogger("app.manutencao")
+
+
+async def varrer_contas_vencidas() -> dict:
+    """A_PAGAR/A_RECEBER com vencimento passado -> VENCIDO, em todos os tenants"""
+    from app.routers import contas_pagar, contas_receber
+
+    hoje = date.today()
+    async with AsyncSessionLocal() as db:
+        await aplicar_timeout(db, "lote")
+        pagar = await contas_pagar.marcar_contas_vencidas(db, hoje)
+        receber = await contas_receber.marcar_contas_vencidas(db, hoje)
+        if pagar or receber:
+            await publicar_evento(db, None, None, "contas", "vencidas")  # todos os tenants
+        await db.commit()
+    return {"contas_pagar": pagar, "contas_receber": receber}
+
+
+async def verificar_licencas() -> dict:
+    """Avisa (log) sobre licenças ativas vencidas ou que vencem em LICENCA_AVISO_DIAS"""
+    hoje = date.today()
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(Licenca.codlic, Licenca.codemp, Licenca.codfil, Licenca.datfim).where(
+                Licenca.ativo == True,
+                Licenca.datfim <= hoje + timedelta(days=settings.LICENCA_AVISO_DIAS),
+            ).order_by(Licenca.datfim)
+        )
+        licencas = result.all()
+
+    vencidas = [lic for lic in licencas if lic.datfim < hoje]
+    a_vencer = [lic for lic in licencas if lic.datfim >= hoje]
+    for lic in vencidas:
+        logger.warning("Licença %s (empresa %s/%s) vencida em %s", lic.codlic, lic.codemp, lic.codfil, lic.datfim)
+    for lic in a_vencer:
+        logger.info("Licença %s (empresa %s/%s) vence em %s", lic.codlic, lic.codemp, lic.codfil, lic.datfim)
+
+    return {
+        "vencidas": [lic.codlic for lic in vencidas],
+        "a_vencer": [lic.codlic for lic in a_vencer],
+    }
+
+
+async def aquecer_cache() -> dict:
+    """Mantém as conexões do pool e o cache de compilação deste worker aquecidos"""
+    from app.core.ciclo_vida import aquecer_pool
+
+    return await aquecer_pool()
+
+
+def registrar_jobs() -> None:
+    agendador.registrar_job("contas_vencidas", settings.AGENDADOR_CRON_VENCIDAS, varrer_contas_vencidas)
+    agendador.registrar_job("licencas", settings.AGENDADOR_CRON_LICENCAS, verificar_licencas)
+    agendador.registrar_job(
+        "limpar_relatorios", settings.AGENDADOR_CRON_LIMPEZA_RELATORIOS, limpar_relatorios
+    )
+    agendador.registrar_job("limpar_exclusoes", settings.AGENDADOR_CRON_LIMPEZA_EXCLUSOES, limpar_exclusoes)
+    # Cache é por processo: roda em todos os workers
+    agendador.registrar_job("aquecer_cache", settings.AGENDADOR_CRON_CACHE, aquecer_cache, exclusivo=False)
+    agendador.registrar_metricas()
@@ -0,0 +1,282 @@
+# app/core/metricas.py
+"""
+Métricas no formato texto do Prometheus (sem dependências externas).
+
+- http_request_duration_seconds: histograma por rota, método e status
+- http_requests_em_andamento: requests em execução
+- gauges registrados por callback (pool de conexões, caches, ...)
+
+Com vários workers do uvicorn, defina METRICS_MULTIPROC_DIR: cada worker grava
+um snapshot em <dir>/<pid>.json (a cada SNAPSHOT_INTERVALO_SEGUNDOS, também
+ocioso) e o /metrics, em qualquer worker, soma os snapshots dos workers vivos.
+Workers reciclados (max_requests) não fazem os contadores voltarem: o histograma
+de um worker morto é somado em <dir>/mortos.json e só os gauges dele somem.
+No Windows (sem gunicorn) o modo multiprocesso é ignorado.
+"""
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Optional, Union
+
+from app.core.instrumentacao import nome_rota
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Intervalo entre gravações do snapshot do worker (modo multiprocesso)
+SNAPSHOT_INTERVALO_SEGUNDOS = 5.0
+
+logger = logging.getLogger("app.metricas")
+
+ValorGauge = Union[float, dict[str, float]]  # valor único ou {labels: valor}
+
+tarefa_snapshot: Optional[asyncio.Task] = None
+
+
+class RegistroMetricas:
+    def __init__(self):
+        # (rota, metodo, status) -> [contagem por bucket..., +Inf, soma]
+        self.histograma: dict[tuple[str, str, str], list[float]] = {}
+        self.em_andamento = 0
+        self.gauges: dict[str, tuple[str, Callable[[], ValorGauge]]] = {}
+        self.diretorio: Optional[Path] = None
+
+    def observar(self, rota: str, metodo: str, status: int, duracao: float) -> None:
+        chave = (rota, metodo, str(status))
+        serie = self.histograma.get(chave)
+        if serie is None:
+            serie = self.histograma[chave] = [0.0] * (len(BUCKETS) + 2)
+        for i, limite in enumerate(BUCKETS):
+            if duracao <= limite:
+                serie[i] += 1
+                break
+        else:
+            serie[len(BUCKETS)] += 1
+        serie[-1] += duracao
+
+    def registrar_gauge(self, nome: str, ajuda: str, callback: Callable[[], ValorGauge]) -> None:
+        self.gauges[nome] = (ajuda, callback)
+
+    # ===== Snapshot (modo multiprocesso) =====
+
+    def snapshot(self) -> dict:
+        gauges = {"http_requests_em_andamento": {"": float(self.em_andamento)}}
+        for nome, (_, callback) in self.gauges.items():
+            try:
+                valor = callback()
+            except Exception:  # gauge quebrado não derruba o /metrics
+                continue
+            gauges[nome] = valor if isinstance(valor, dict) else {"": float(valor)}
+        return {
+            "histograma": {"|".join(chave): serie for chave, serie in self.histograma.items()},
+            "gauges": gauges,
+        }
+
+    @property
+    def arquivo_snapshot(self) -> Path:
+        return self.diretorio / f"{os.getpid()}.json"
+
+    def gravar_snapshot(self) -> None:
+        if self.diretorio is not None:
+            gravar_json(self.arquivo_snapshot, self.snapshot())
+
+    @contextmanager
+    def trava(self):
+        """Exclusão entre workers ao mexer em mortos.json"""
+        import fcntl  # só POSIX: o modo multiprocesso não sobe no Windows
+
+        with open(self.diretorio / "mortos.lock", "w") as arquivo:
+            fcntl.flock(arquivo, fcntl.LOCK_EX)
+            yield
+
+    def recolher_mortos(self, pid_reaproveitado: Optional[int] = None) -> None:
+        """
+        Soma o histograma dos workers mortos em mortos.json e apaga o snapshot deles.
+        pid_reaproveitado: worker novo com o PID de um morto ainda não recolhido
+        """
+        with self.trava():
+            mortos = [
+                arquivo for arquivo in self.diretorio.glob("*.json")
+                if arquivo.stem.isdigit()
+                and (int(arquivo.stem) == pid_reaproveitado or not processo_vivo(int(arquivo.stem)))
+            ]
+            if not mortos:
+                return
+            destino = self.diretorio / "mortos.json"
+            snapshots = [ler_json(destino)]
+            snapshots += [ler_json(arquivo) for arquivo in mortos]
+            gravar_json(destino, {"histograma": somar_snapshots(snapshots)["histograma"], "gauges": {}})
+            for arquivo in mortos:
+                arquivo.unlink(missing_ok=True)
+
+    def snapshots_workers(self) -> list[dict]:
+        """Snapshots dos workers vivos mais o acumulado dos mortos"""
+        self.gravar_snapshot()
+        self.recolher_mortos()
+        snapshots = [ler_json(self.diretorio / "mortos.json")]
+        for arquivo in self.diretorio.glob("*.json"):
+            if arquivo.stem.isdigit():
+                snapshots.append(ler_json(arquivo))
+        return snapshots
+
+
+registro = RegistroMetricas()
+
+
+def processo_vivo(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def ler_json(arquivo: Path) -> dict:
+    try:
+        return json.loads(arquivo.read_text())
+    except (OSError, ValueError):  # ausente ou removido entre o glob e a leitura
+        return {"histograma": {}, "gauges": {}}
+
+
+def gravar_json(destino: Path, dados: dict) -> None:
+    temporario = destino.with_suffix(f".{os.getpid()}.tmp")
+    temporario.write_text(json.dumps(dados))
+    temporario.replace(destino)  # troca atômica: o leitor nunca vê arquivo pela metade
+
+
+def configurar_multiprocesso(diretorio: Optional[str]) -> None:
+    if not diretorio:
+        return
+    if sys.platform == "win32":
+        # Sem gunicorn nem flock (e os.kill(pid, 0) encerraria o processo): só o worker local
+        logger.warning("METRICS_MULTIPROC_DIR ignorado no Windows: /metrics mostra só este processo")
+        return
+    registro.diretorio = Path(diretorio)
+    registro.diretorio.mkdir(parents=True, exist_ok=True)
+
+
+async def loop_snapshot() -> None:
+    while True:
+        await asyncio.sleep(SNAPSHOT_INTERVALO_SEGUNDOS)
+        # Os callbacks dos gauges leem estado do event loop: só a escrita vai para a thread
+        await asyncio.to_thread(gravar_json, registro.arquivo_snapshot, registro.snapshot())
+
+
+def iniciar() -> None:
+    """Worker subindo (modo multiprocesso): snapshot periódico, com ou sem requests"""
+    global tarefa_snapshot
+    if registro.diretorio is None or tarefa_snapshot is not None:
+        return
+    registro.recolher_mortos(pid_reaproveitado=os.getpid())
+    registro.gravar_snapshot()
+    tarefa_snapshot = asyncio.get_running_loop().create_task(loop_snapshot(), name="metricas")
+
+
+async def parar() -> None:
+    """Último snapshot: os requests do fim da vida do worker entram no acumulado"""
+    global tarefa_snapshot
+    if tarefa_snapshot is None:
+        return
+    tarefa_snapshot.cancel()
+    await asyncio.gather(tarefa_snapshot, return_exceptions=True)
+    tarefa_snapshot = None
+    registro.gravar_snapshot()
+
+
+# ========== FORMATO TEXTO ==========
+
+def escapar_label(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def label_worker() -> str:
+    """
+    Label do processo atual, para gauges que não se somam entre workers. Chamar
+    dentro do callback: o registro roda no import, no mestre (preload_app), antes do fork
+    """
+    return f'worker="{os.getpid()}"'
+
+
+def somar_snapshots(snapshots: list[dict]) -> dict:
+    total = {"histograma": {}, "gauges": {}}
+    for snap in snapshots:
+        for chave, serie in snap["histograma"].items():
+            acumulado = total["histograma"].setdefault(chave, [0.0] * len(serie))
+            for i, valor in enumerate(serie):
+                acumulado[i] += valor
+        for nome, valores in snap["gauges"].items():
+            acumulado = total["gauges"].setdefault(nome, {})
+            for labels, valor in valores.items():
+                acumulado[labels] = acumulado.get(labels, 0.0) + valor
+    return total
+
+
+def renderizar() -> str:
+    """Métricas deste worker (ou de todos, no modo multiprocesso) em texto Prometheus"""
+    if registro.diretorio is not None:
+        dados = somar_snapshots(registro.snapshots_workers())
+    else:
+        dados = registro.snapshot()
+
+    linhas = [
+        "# HELP http_request_duration_seconds Latência dos requests HTTP",
+        "# TYPE http_request_duration_seconds histogram",
+    ]
+    for chave, serie in sorted(dados["histograma"].items()):
+        rota, metodo, status = chave.split("|")
+        labels = f'rota="{escapar_label(rota)}",metodo="{metodo}",status="{status}"'
+        acumulado = 0.0
+        for limite, valor in zip(BUCKETS, serie):
+            acumulado += valor
+            linhas.append(f'http_request_duration_seconds_bucket{{{labels},le="{limite}"}} {acumulado:g}')
+        acumulado += serie[len(BUCKETS)]
+        linhas.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {acumulado:g}')
+        linhas.append(f"http_request_duration_seconds_sum{{{labels}}} {serie[-1]}")
+        linhas.append(f"http_request_duration_seconds_count{{{labels}}} {acumulado:g}")
+
+    ajudas = {"http_requests_em_andamento": "Requests HTTP em execução"}
+    ajudas.update({nome: ajuda for nome, (ajuda, _) in registro.gauges.items()})
+    for nome, valores in sorted(dados["gauges"].items()):
+        linhas.append(f"# HELP {nome} {ajudas.get(nome, nome)}")
+        linhas.append(f"# TYPE {nome} gauge")
+        for labels, valor in sorted(valores.items()):
+            linhas.append(f"{nome}{{{labels}}} {valor:g}" if labels else f"{nome} {valor:g}")
+
+    return "\n".join(linhas) + "\n"
+
+
+# ========== MIDDLEWARE ==========
+
+class MetricasMiddleware:
+    """Middleware ASGI que mede a latência por rota e conta os requests em andamento"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        inicio = time.perf_counter()
+        status_code = 500
+        registro.em_andamento += 1
+
+        async def send_com_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_com_status)
+        finally:
+            registro.em_andamento -= 1
+            registro.observar(nome_rota(scope).split(" ", 1)[-1], scope["method"], status_code,
+                              time.perf_counter() - inicio)
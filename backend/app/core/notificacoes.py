@@ -0,0 +1,154 @@
+# app/core/notificacoes.py
+"""
+Conexão dedicada de LISTEN do Postgres (uma por processo, fora do pool).
+
+Os módulos registram um handler por canal (registrar_canal) e publicam com
+pg_notify dentro da própria transação: a notificação só sai no commit e chega
+a todos os workers/hosts ligados ao mesmo banco.
+
+Se a conexão cai, o loop reconecta com backoff exponencial (com jitter) e chama
+os callbacks de ao_reconectar: o que foi notificado enquanto a conexão estava
+fora se perdeu, e cada módulo decide como se recuperar. `ativo` indica se a
+conexão está de pé (caches locais não devem confiar nas notificações sem ela).
+
+Funciona com os dois drivers suportados (asyncpg e psycopg 3).
+"""
+import asyncio
+import logging
+import random
+from typing import Awaitable, Callable, Optional
+
+from app.core.config import settings
+from app.database import engine
+
+logger = logging.getLogger("app.notificacoes")
+
+Handler = Callable[[str], None]  # recebe o payload; roda no event loop, não deve bloquear
+
+handlers: dict[str, list[Handler]] = {}
+callbacks_reconexao: list[Callable[[], Optional[Awaitable[None]]]] = []
+tarefa: Optional[asyncio.Task] = None
+ativo = False
+
+
+def registrar_canal(canal: str, handler: Handler) -> None:
+    handlers.setdefault(canal, []).append(handler)
+
+
+def ao_reconectar(callback: Callable[[], Optional[Awaitable[None]]]) -> None:
+    callbacks_reconexao.append(callback)
+
+
+def despachar(canal: str, payload: str) -> None:
+    for handler in handlers.get(canal, []):
+        try:
+            handler(payload)
+        except Exception:
+            logger.exception("Handler do canal %s falhou", canal)
+
+
+async def avisar_reconexao() -> None:
+    for callback in callbacks_reconexao:
+        try:
+            resultado = callback()
+            if resultado is not None:
+                await resultado
+        except Exception:
+            logger.exception("Callback de reconexão falhou")
+
+
+def dsn() -> str:
+    """URL do engine sem o driver do SQLAlchemy (asyncpg e psycopg aceitam postgresql://)"""
+    return engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+# ========== DRIVERS ==========
+
+async def ouvir_asyncpg(canais: list[str], conectado: Callable[[], Awaitable[None]]) -> None:
+    import asyncpg
+
+    conn = await asyncpg.connect(dsn())
+    try:
+        perdida = asyncio.Event()
+        conn.add_termination_listener(lambda _conn: perdida.set())
+        for canal in canais:
+            await conn.add_listener(canal, lambda _conn, _pid, canal, payload: despachar(canal, payload))
+        await conectado()
+
+        # Ping periódico: queda silenciosa (rede) não dispara o termination listener
+        while not perdida.is_set():
+            try:
+                await asyncio.wait_for(perdida.wait(), timeout=settings.NOTIFY_PING_SEGUNDOS)
+            except asyncio.TimeoutError:
+                await asyncio.wait_for(conn.execute("SELECT 1"), timeout=settings.NOTIFY_PING_SEGUNDOS)
+        raise ConnectionError("Conexão de LISTEN encerrada pelo servidor")
+    finally:
+        if not conn.is_closed():
+            conn.terminate()
+
+
+async def ouvir_psycopg(canais: list[str], conectado: Callable[[], Awaitable[None]]) -> None:
+    import psycopg
+    from psycopg import sql
+
+    # Keepalive do TCP: queda silenciosa da rede vira erro na leitura
+    conn = await psycopg.AsyncConnection.connect(
+        dsn(), autocommit=True,
+        keepalives=1, keepalives_idle=int(settings.NOTIFY_PING_SEGUNDOS), keepalives_interval=5, keepalives_count=3,
+    )
+    async with conn:
+        for canal in canais:
+            await conn.execute(sql.SQL("LISTEN {}").format(sql.Identifier(canal)))
+        await conectado()
+        async for notificacao in conn.notifies():
+            despachar(notificacao.channel, notificacao.payload)
+    raise ConnectionError("Conexão de LISTEN encerrada")
+
+
+# ========== LOOP ==========
+
+async def loop_ouvinte() -> None:
+    ouvir = ouvir_asyncpg if engine.dialect.driver == "asyncpg" else ouvir_psycopg
+    espera = settings.NOTIFY_RECONEXAO_MIN_SEGUNDOS
+    primeira = True
+
+    async def conectado() -> None:
+        global ativo
+        nonlocal espera, primeira
+        espera = settings.NOTIFY_RECONEXAO_MIN_SEGUNDOS
+        if primeira:
+            primeira = False
+            logger.info("LISTEN ativo: %s", ", ".join(handlers))
+        else:
+            logger.info("LISTEN reconectado")
+            await avisar_reconexao()
+        ativo = True
+
+    global ativo
+    while True:
+        try:
+            await ouvir(list(handlers), conectado)
+        except asyncio.CancelledError:
+            ativo = False
+            raise
+        except Exception as e:
+            logger.warning("Conexão de LISTEN perdida (%s); nova tentativa em %.1fs", e, espera)
+        ativo = False
+        await asyncio.sleep(espera * random.uniform(0.8, 1.2))
+        espera = min(espera * 2, settings.NOTIFY_RECONEXAO_MAX_SEGUNDOS)
+
+
+def iniciar() -> None:
+    """Sobe o ouvinte deste processo (chamado no lifespan, depois dos registros)"""
+    global tarefa
+    if tarefa is None and handlers:
+        tarefa = asyncio.get_running_loop().create_task(loop_ouvinte(), name="notificacoes")
+
+
+async def parar() -> None:
+    global tarefa
+    if tarefa is None:
+        return
+    tarefa.cancel()
+    await asyncio.gather(tarefa, return_exceptions=True)
+    tarefa = None
@@ -0,0 +1,79 @@
+# app/core/pytest_queries.py
+"""
+Plugin do pytest para orçamento de queries por endpoint.
+
+Uso: pytest -p app.core.pytest_queries (tests/conftest.py já carrega o plugin)
+
+    @pytest.mark.query_budget(3, max_repeticoes=1)
+    def test_get_conta(client):
+        client.get("/contas-pagar/1")
+
+Cada request feito ao app durante o teste é conferido contra o orçamento
+declarado; o teste falha se algum passar. Sem o marcador, valem os limites
+globais do detector (QUERY_DETECTOR_REPETICOES / QUERY_DETECTOR_ORCAMENTO).
+A falha é do teste, não do request: o app só registra o estouro no log.
+"""
+from collections import Counter
+
+import pytest
+
+from app.core.detector_queries import detector, verificar
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "query_budget(max_queries, max_repeticoes=None): "
+        "falha se algum request do teste passar do orçamento de queries",
+    )
+    detector.ativar("erro")
+
+
+def pytest_unconfigure(config):
+    detector.ativar("off")
+
+
+# Requests feitos no teste: (rota, contagem)
+requests_do_teste = pytest.StashKey[list]()
+
+
+@pytest.fixture(autouse=True)
+def orcamento_queries(request):
+    requests_feitos: list[tuple[str, Counter]] = []
+
+    def ouvinte(rota: str, contagem: Counter) -> None:
+        requests_feitos.append((rota, contagem))
+
+    limites_globais = detector.max_repeticoes, detector.orcamento
+    if request.node.get_closest_marker("query_budget") is not None:
+        # O orçamento do marcador substitui os limites globais durante o teste
+        detector.max_repeticoes, detector.orcamento = None, None
+    detector.ouvintes.append(ouvinte)
+    request.node.stash[requests_do_teste] = requests_feitos
+    try:
+        yield requests_feitos
+    finally:
+        detector.ouvintes.remove(ouvinte)
+        detector.max_repeticoes, detector.orcamento = limites_globais
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    # Conferido ao fim da fase de chamada: o estouro aparece como falha do teste, não erro do teardown
+    outcome = yield
+    requests_feitos = item.stash.get(requests_do_teste, None)
+    if requests_feitos is None or outcome.excinfo is not None:
+        return
+
+    marker = item.get_closest_marker("query_budget")
+    if marker is not None:
+        max_queries = marker.args[0] if marker.args else marker.kwargs.get("max_queries")
+        max_repeticoes = marker.kwargs.get("max_repeticoes")
+        descricao = "o orçamento de queries"
+    else:
+        max_queries, max_repeticoes = detector.orcamento, detector.max_repeticoes
+        descricao = "os limites do detector"
+    for rota, contagem in requests_feitos:
+        problemas = verificar(contagem, max_repeticoes, max_queries)
+        if problemas:
+            pytest.fail(f"{rota} excedeu {descricao}: " + " | ".join(problemas), pytrace=False)
@@ -0,0 +1,223 @@
+# app/core/queries_lentas.py
+"""
+Log de queries lentas com captura de EXPLAIN.
+
+Quando uma query passa de SLOW_QUERY_MS, registra o SQL normalizado, o
+formato dos parâmetros (tipos, nunca valores), a rota e o tenant. O plano
+(EXPLAIN FORMAT JSON, sem ANALYZE) é capturado em background numa conexão
+separada, no mesmo banco (primário ou réplica) que rodou a query, e o registro
+vai, em JSON por linha, para um arquivo rotativo. A escrita no arquivo fica
+numa thread (QueueListener), fora do event loop.
+"""
+import asyncio
+import json
+import logging
+import queue
+import re
+import time
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+from typing import Iterator, Optional
+
+from sqlalchemy import URL
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.core.instrumentacao import ContextoRequest, nome_rota, registrar_observador_lento
+
+logger = logging.getLogger("app.queries_lentas")
+
+# Mesmo SQL normalizado só tem o plano capturado de novo após este intervalo
+EXPLAIN_INTERVALO_SEGUNDOS = 600
+
+# Engines só para EXPLAIN, um por banco (fora dos pools da aplicação e sem os hooks de instrumentação)
+engines_explain: dict[URL, AsyncEngine] = {}
+# Grava no arquivo em thread própria; iniciado por worker no lifespan (o app é importado antes do fork)
+escritor_log: Optional[QueueListener] = None
+ultimos_explains: dict[str, float] = {}
+tarefas_pendentes: set[asyncio.Task] = set()
+
+
+# ========== NORMALIZAÇÃO ==========
+
+RE_ESPACOS = re.compile(r"\s+")
+RE_LISTA_PARAMS = re.compile(r"\(\s*(?:(?:%\(\w+\)s|%s|\$\d+|\?)\s*,\s*)+(?:%\(\w+\)s|%s|\$\d+|\?)\s*\)")
+RE_LITERAIS = re.compile(r"'(?:[^']|'')*'|(?<![\w$])\d+(?:\.\d+)?\b")
+
+
+def normalizar_sql(statement: str) -> str:
+    """Colapsa espaços, listas IN (...) e literais para agrupar queries iguais"""
+    sql = RE_ESPACOS.sub(" ", statement).strip()
+    sql = RE_LISTA_PARAMS.sub("(...)", sql)
+    return RE_LITERAIS.sub("?", sql)
+
+
+def formato_parametros(parameters) -> object:
+    """Tipos dos parâmetros (valores nunca vão para o log)"""
+    def tipo(valor):
+        if isinstance(valor, (list, tuple)):
+            return f"{type(valor).__name__}[{len(valor)}]"
+        return type(valor).__name__
+
+    if isinstance(parameters, dict):
+        return {chave: tipo(valor) for chave, valor in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [tipo(valor) for valor in parameters]
+    return tipo(parameters)
+
+
+# ========== REGISTRO ==========
+
+def rota_monitorada(rota: str) -> bool:
+    path = rota.split(" ", 1)[-1]
+    return any(path.startswith(prefixo) for prefixo in settings.SLOW_QUERY_ROTAS)
+
+
+def escrever_registro(registro: dict) -> None:
+    logger.warning(json.dumps(registro, ensure_ascii=False, default=str))
+
+
+async def capturar_explain(registro: dict, statement: str, parameters, url: URL) -> None:
+    """Roda o EXPLAIN numa conexão própria (no banco da query) e grava o registro completo"""
+    try:
+        engine_explain = engines_explain.get(url)
+        if engine_explain is None:
+            engine_explain = engines_explain[url] = create_async_engine(url, poolclass=NullPool)
+        async with engine_explain.connect() as conn:
+            result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+            plano = result.scalar()
+        registro["plano"] = json.loads(plano) if isinstance(plano, str) else plano
+    except Exception as e:  # o log nunca pode derrubar o request
+        registro["erro_explain"] = str(e)
+    escrever_registro(registro)
+
+
+def observar_query_lenta(contexto: ContextoRequest, statement: str, parameters, duracao: float, url: URL) -> None:
+    """Chamado pelos hooks de instrumentação quando a query passa do limite"""
+    rota = nome_rota(contexto.scope)
+    if not rota_monitorada(rota):
+        return
+
+    sql = normalizar_sql(statement)
+    registro = {
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "duracao_ms": round(duracao * 1000, 2),
+        "rota": rota,
+        "tenant": contexto.tenant,
+        "sql": sql,
+        "parametros": formato_parametros(parameters),
+    }
+
+    # EXPLAIN só para leitura e no máximo uma vez por intervalo para o mesmo SQL
+    agora = time.monotonic()
+    pode_explicar = (
+        settings.SLOW_QUERY_EXPLAIN
+        and sql.upper().startswith(("SELECT", "WITH"))
+        and agora - ultimos_explains.get(sql, 0) > EXPLAIN_INTERVALO_SEGUNDOS
+    )
+    if not pode_explicar:
+        escrever_registro(registro)
+        return
+
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        escrever_registro(registro)
+        return
+
+    ultimos_explains[sql] = agora
+    tarefa = loop.create_task(capturar_explain(registro, statement, parameters, url))
+    tarefas_pendentes.add(tarefa)
+    tarefa.add_done_callback(tarefas_pendentes.discard)
+
+
+def iniciar_escritor_log() -> None:
+    """Sobe a thread que grava no arquivo (no worker, chamado no lifespan)"""
+    global escritor_log
+    handler_fila = next((h for h in logger.handlers if isinstance(h, QueueHandler)), None)
+    if handler_fila is None or escritor_log is not None:
+        return
+    # delay: o arquivo é aberto na thread do próprio worker, não herdado do mestre
+    arquivo = RotatingFileHandler(
+        settings.SLOW_QUERY_LOG, maxBytes=10 * 1024 * 1024, backupCount=5, encoding="utf-8", delay=True,
+    )
+    arquivo.setFormatter(logging.Formatter("%(message)s"))
+    escritor_log = QueueListener(handler_fila.queue, arquivo)
+    escritor_log.start()
+
+
+async def encerrar_explain() -> None:
+    """Espera os EXPLAINs pendentes, fecha os engines próprios e esvazia a fila do log (desligamento)"""
+    global escritor_log
+    if tarefas_pendentes:
+        await asyncio.wait(list(tarefas_pendentes), timeout=5)
+    for engine_explain in engines_explain.values():
+        await engine_explain.dispose()
+    engines_explain.clear()
+    if escritor_log is not None:
+        await asyncio.to_thread(escritor_log.stop)  # grava o que ainda está na fila
+        for handler in escritor_log.handlers:
+            handler.close()
+        escritor_log = None
+
+
+def configurar_queries_lentas() -> None:
+    """Liga o log (via fila) e registra o observador (chamado na inicialização)"""
+    Path(settings.SLOW_QUERY_LOG).parent.mkdir(parents=True, exist_ok=True)
+
+    logger.addHandler(QueueHandler(queue.SimpleQueue()))
+    logger.setLevel(logging.WARNING)
+    logger.propagate = False
+
+    registrar_observador_lento(settings.SLOW_QUERY_MS / 1000, observar_query_lenta)
+
+
+def linhas_do_fim(caminho: Path, bloco: int = 64 * 1024) -> Iterator[bytes]:
+    """Linhas do arquivo da última para a primeira, lendo em blocos a partir do fim"""
+    with caminho.open("rb") as arquivo:
+        posicao = arquivo.seek(0, 2)
+        resto = b""
+        while posicao > 0:
+            tamanho = min(bloco, posicao)
+            posicao -= tamanho
+            arquivo.seek(posicao)
+            linhas = (arquivo.read(tamanho) + resto).split(b"\n")
+            resto = linhas.pop(0)  # possivelmente incompleta: completa com o bloco anterior
+            yield from reversed(linhas)
+        yield resto
+
+
+def listar_queries_lentas(
+    limite: int = 100,
+    rota: Optional[str] = None,
+    codemp: Optional[int] = None,
+    codfil: Optional[int] = None,
+) -> list[dict]:
+    """
+    Últimos registros do arquivo (mais recentes primeiro), com filtros opcionais.
+    Lê do fim e para no limite; I/O bloqueante, chamar fora do event loop.
+    """
+    caminho = Path(settings.SLOW_QUERY_LOG)
+    if not caminho.exists():
+        return []
+
+    ultimos = []
+    for linha in linhas_do_fim(caminho):
+        try:
+            registro = json.loads(linha)
+        except ValueError:
+            continue
+        tenant = registro.get("tenant") or [None, None]
+        if rota and rota not in registro.get("rota", ""):
+            continue
+        if codemp is not None and tenant[0] != codemp:
+            continue
+        if codfil is not None and tenant[1] != codfil:
+            continue
+        ultimos.append(registro)
+        if len(ultimos) == limite:
+            break
+
+    return ultimos
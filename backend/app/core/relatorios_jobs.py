@@ -0,0 +1,263 @@
+# app/core/relatorios_jobs.py
+"""
+Fila de relatórios assíncronos (tabela rfe901rel).
+
+POST /relatorios/jobs só grava o pedido. Em cada processo, RELATORIOS_WORKERS
+tarefas em background reservam o próximo job com FOR UPDATE SKIP LOCKED
+(respeitando RELATORIOS_MAX_POR_TENANT em processamento por tenant), geram o
+relatório e gravam o resultado comprimido (gzip) em RELATORIOS_DIR.
+
+A limpeza (agendador) apaga jobs e arquivos após RELATORIOS_RETENCAO_HORAS.
+"""
+import asyncio
+import gzip
+import logging
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import aliased
+
+from app.core.config import settings
+from app.core.exportacao import gerar_csv
+from app.core.tempo_limite import aplicar_timeout
+from app.database import AsyncSessionLocal
+from app.models.relatorio_job import RelatorioJob
+from app.models.user import User
+
+logger = logging.getLogger("app.relatorios_jobs")
+
+MEDIA_TYPES = {
+    "json": "application/json",
+    "csv": "text/csv; charset=utf-8",
+}
+
+tarefas: list[asyncio.Task] = []
+novo_job = asyncio.Event()  # acorda os workers deste processo sem esperar o polling
+
+
+def diretorio() -> Path:
+    caminho = Path(settings.RELATORIOS_DIR)
+    caminho.mkdir(parents=True, exist_ok=True)
+    return caminho
+
+
+def avisar_novo_job() -> None:
+    novo_job.set()
+
+
+# ========== RESERVA (FOR UPDATE SKIP LOCKED) ==========
+
+async def reservar_proximo() -> Optional[RelatorioJob]:
+    """Marca o próximo job pendente como PROCESSANDO e o devolve (None se não houver)"""
+    limite = settings.RELATORIOS_MAX_POR_TENANT
+    outro = aliased(RelatorioJob)
+    em_processamento = (
+        select(func.count())
+        .where(
+            outro.codemp == RelatorioJob.codemp,
+            outro.codfil == RelatorioJob.codfil,
+            outro.statrel == "PROCESSANDO",
+        )
+        .scalar_subquery()
+    )
+
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(RelatorioJob)
+            .where(RelatorioJob.statrel == "PENDENTE", em_processamento < limite)
+            .order_by(RelatorioJob.codrel)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        job = result.scalar_one_or_none()
+        if job is None:
+            return None
+
+        # Serializa as reservas do mesmo tenant e reconta: dois workers não passam juntos do limite
+        await db.execute(select(func.pg_advisory_xact_lock(job.codemp, job.codfil)))
+        ocupados = (await db.execute(
+            select(func.count()).where(
+                RelatorioJob.codemp == job.codemp,
+                RelatorioJob.codfil == job.codfil,
+                RelatorioJob.statrel == "PROCESSANDO",
+            )
+        )).scalar()
+        if ocupados >= limite:
+            await db.rollback()
+            return None
+
+        job.statrel = "PROCESSANDO"
+        job.datini = datetime.now()
+        await db.commit()
+        return job
+
+
+# ========== GERAÇÃO ==========
+
+async def gravar_gzip(destino: Path, blocos) -> int:
+    """Grava os blocos (bytes) comprimidos; compressão fora do event loop"""
+    temporario = destino.with_suffix(destino.suffix + ".tmp")
+    arquivo = await asyncio.to_thread(gzip.open, temporario, "wb", 6)
+    try:
+        async for bloco in blocos:
+            if bloco:
+                await asyncio.to_thread(arquivo.write, bloco)
+    except BaseException:
+        arquivo.close()
+        temporario.unlink(missing_ok=True)
+        raise
+    await asyncio.to_thread(arquivo.close)
+    temporario.replace(destino)
+    return destino.stat().st_size
+
+
+async def blocos_json(job: RelatorioJob, usuario: User):
+    """Mesmo JSON do endpoint síncrono"""
+    from app.routers import relatorios
+
+    parametros = job.parrel
+    async with AsyncSessionLocal() as db:
+        await aplicar_timeout(db, "lote")
+        if job.tiprel == "fluxo-caixa":
+            resposta = await relatorios.relatorio_fluxo_caixa(
+                data_inicio=date.fromisoformat(parametros["data_inicio"]),
+                data_fim=date.fromisoformat(parametros["data_fim"]),
+                incluir_canceladas=parametros.get("incluir_canceladas", False),
+                apenas_realizadas=parametros.get("apenas_realizadas", False),
+                db=db,
+                current_user=usuario,
+            )
+        else:
+            resposta = await relatorios.relatorio_contas_vencidas(
+                limite_dias=parametros.get("limite_dias"),
+                db=db,
+                current_user=usuario,
+            )
+    yield resposta.model_dump_json().encode()
+
+
+def blocos_csv(job: RelatorioJob, usuario: User):
+    """Mesmo CSV das exportações (cursor server-side, em partições)"""
+    from app.routers import relatorios
+
+    parametros = job.parrel
+    if job.tiprel == "fluxo-caixa":
+        query = relatorios.query_export_fluxo_caixa(
+            usuario,
+            date.fromisoformat(parametros["data_inicio"]),
+            date.fromisoformat(parametros["data_fim"]),
+            parametros.get("incluir_canceladas", False),
+            parametros.get("apenas_realizadas", False),
+        )
+    else:
+        query = relatorios.query_export_contas_vencidas(usuario, date.today(), parametros.get("limite_dias"))
+    return gerar_csv(query)
+
+
+async def processar(job: RelatorioJob) -> None:
+    # Mesmo escopo de quem pediu (superadmin: todos os tenants)
+    usuario = User(codemp=job.codemp, codfil=job.codfil, issuper=job.glorel)
+    destino = diretorio() / f"{job.codrel}.{job.fmtrel}.gz"
+    blocos = blocos_csv(job, usuario) if job.fmtrel == "csv" else blocos_json(job, usuario)
+
+    valores = {}
+    try:
+        tamanho = await asyncio.wait_for(gravar_gzip(destino, blocos), timeout=settings.RELATORIOS_TIMEOUT_SEGUNDOS)
+        valores.update(statrel="CONCLUIDO", arqrel=str(destino), tamrel=tamanho)
+    except asyncio.CancelledError:
+        # Desligamento: devolve o job para a fila
+        await atualizar_job(job.codrel, statrel="PENDENTE", datini=None)
+        raise
+    except asyncio.TimeoutError:
+        valores.update(statrel="ERRO", errrel=f"Tempo limite de {settings.RELATORIOS_TIMEOUT_SEGUNDOS}s excedido")
+    except HTTPException as e:
+        valores.update(statrel="ERRO", errrel=str(e.detail))
+    except Exception as e:
+        logger.exception("Relatório %s falhou", job.codrel)
+        valores.update(statrel="ERRO", errrel=f"{type(e).__name__}: {e}"[:1000])
+
+    valores["datfim"] = datetime.now()
+    await atualizar_job(job.codrel, **valores)
+
+
+async def atualizar_job(codrel: int, **valores) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(RelatorioJob).where(RelatorioJob.codrel == codrel).values(**valores))
+        await db.commit()
+
+
+# ========== WORKERS ==========
+
+async def loop_worker() -> None:
+    while True:
+        try:
+            job = await reservar_proximo()
+        except Exception:
+            logger.exception("Falha ao reservar relatório")
+            job = None
+
+        if job is None:
+            try:
+                await asyncio.wait_for(novo_job.wait(), timeout=settings.RELATORIOS_POLL_SEGUNDOS)
+            except asyncio.TimeoutError:
+                pass
+            novo_job.clear()
+            continue
+
+        try:
+            await processar(job)
+        except Exception:
+            logger.exception("Falha ao finalizar o relatório %s", job.codrel)
+
+
+def iniciar() -> None:
+    """Sobe os workers da fila neste processo (chamado no lifespan)"""
+    if tarefas:
+        return
+    loop = asyncio.get_running_loop()
+    for numero in range(settings.RELATORIOS_WORKERS):
+        tarefas.append(loop.create_task(loop_worker(), name=f"relatorios:{numero}"))
+
+
+async def parar() -> None:
+    for tarefa in tarefas:
+        tarefa.cancel()
+    await asyncio.gather(*tarefas, return_exceptions=True)
+    tarefas.clear()
+
+
+# ========== LIMPEZA (AGENDADOR) ==========
+
+async def limpar_relatorios() -> dict:
+    """Apaga jobs e arquivos fora da retenção e encerra processamentos abandonados"""
+    agora = datetime.now()
+    async with AsyncSessionLocal() as db:
+        # Worker morreu no meio do processamento
+        abandonados = await db.execute(
+            update(RelatorioJob)
+            .where(
+                RelatorioJob.statrel == "PROCESSANDO",
+                RelatorioJob.datini < agora - timedelta(seconds=settings.RELATORIOS_TIMEOUT_SEGUNDOS * 2),
+            )
+            .values(statrel="ERRO", errrel="Processamento interrompido", datfim=agora)
+        )
+
+        expirados = await db.execute(
+            delete(RelatorioJob)
+            .where(
+                RelatorioJob.statrel.in_(["CONCLUIDO", "ERRO"]),
+                RelatorioJob.datcri < agora - timedelta(hours=settings.RELATORIOS_RETENCAO_HORAS),
+            )
+            .returning(RelatorioJob.arqrel)
+        )
+        arquivos = expirados.scalars().all()
+        await db.commit()
+
+    for arquivo in arquivos:
+        if arquivo:
+            Path(arquivo).unlink(missing_ok=True)
+
+    return {"abandonados": abandonados.rowcount, "removidos": len(arquivos)}
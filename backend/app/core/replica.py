@@ -0,0 +1,211 @@
+# app/core/replica.py
+"""
+Réplica de leitura (DATABASE_READ_URL): atraso e read-your-writes.
+
+get_read_db (app/database.py) usa a réplica só quando:
+
+- a última verificação (a cada REPLICA_VERIFICACAO_SEGUNDOS) mediu atraso de
+  replay até REPLICA_ATRASO_MAXIMO_SEGUNDOS; réplica atrasada, fora do ar ou
+  ainda não verificada = leituras no primário;
+- o usuário (codemp, codfil, codusu do JWT) não escreveu nada nos últimos
+  REPLICA_LEITURA_PROPRIA_SEGUNDOS: LeituraPropriaMiddleware marca o usuário
+  em toda escrita bem-sucedida e publica a marca no canal rfe_escritas, antes
+  de a resposta sair, para o próximo request dele cair em qualquer worker.
+
+Coerência das marcas (como nos caches de app/core/invalidacao.py): com o LISTEN
+fora, as escritas dos outros workers não chegam e toda leitura vai ao
+primário; ao reconectar, as do intervalo se perderam e o primário segue
+atendendo todos por mais uma janela.
+
+Sem DATABASE_READ_URL nada disso sobe e get_read_db devolve a sessão do primário.
+"""
+import asyncio
+import logging
+import time
+from typing import Optional
+
+import orjson
+from fastapi import Request
+from jose import JWTError, jwt
+from sqlalchemy import func, select, text
+from starlette.datastructures import Headers
+
+from app.core import metricas, notificacoes
+from app.core.config import settings
+from app.core.respostas import dumps
+from app.database import engine, estado_replica, read_engine
+
+logger = logging.getLogger("app.replica")
+
+CANAL_ESCRITAS = "rfe_escritas"
+
+# Sem WAL pendente de replay o atraso é zero, mesmo com o primário ocioso há
+# tempo (pg_last_xact_replay_timestamp só anda quando há transações)
+SQL_ATRASO = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END
+"""
+
+METODOS_ESCRITA = {b"POST", b"PUT", b"PATCH", b"DELETE"}
+
+tarefa_verificacao: Optional[asyncio.Task] = None
+
+# (codemp, codfil, codusu) -> fim da janela de leitura no primário (monotonic)
+escritas: dict[tuple[int, int, int], float] = {}
+# Após reconexão do LISTEN: todos leem do primário até aqui (monotonic)
+primario_ate = 0.0
+
+
+# ========== ATRASO ==========
+
+async def medir_atraso() -> float:
+    async with read_engine.connect() as conn:
+        if read_engine.dialect.name != "postgresql":
+            await conn.execute(text("SELECT 1"))  # instância avulsa (ex.: testes): só disponibilidade
+            return 0.0
+        return float(await conn.scalar(text(SQL_ATRASO)))
+
+
+async def verificar() -> None:
+    """Mede o atraso e decide se as leituras vão para a réplica (loga só as transições)"""
+    saudavel_antes = estado_replica.saudavel
+    try:
+        estado_replica.atraso = await asyncio.wait_for(medir_atraso(), timeout=settings.REPLICA_VERIFICACAO_SEGUNDOS)
+        estado_replica.saudavel = estado_replica.atraso <= settings.REPLICA_ATRASO_MAXIMO_SEGUNDOS
+        if saudavel_antes and not estado_replica.saudavel:
+            logger.warning("Réplica com %.1fs de atraso: leituras no primário", estado_replica.atraso)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        estado_replica.saudavel = False
+        estado_replica.atraso = None
+        if saudavel_antes:
+            logger.warning("Réplica indisponível (%s): leituras no primário", e)
+    if estado_replica.saudavel and not saudavel_antes:
+        logger.info("Réplica em dia: leituras voltam para ela")
+
+
+async def loop_verificacao() -> None:
+    while True:
+        await verificar()
+        limpar_escritas()
+        await asyncio.sleep(settings.REPLICA_VERIFICACAO_SEGUNDOS)
+
+
+def registrar() -> None:
+    """Canal das escritas (chamado no lifespan, antes de notificacoes.iniciar)"""
+    if read_engine is not None:
+        notificacoes.registrar_canal(CANAL_ESCRITAS, receber_escrita)
+        notificacoes.ao_reconectar(reconectado)
+
+
+def iniciar() -> None:
+    global tarefa_verificacao
+    if read_engine is not None and tarefa_verificacao is None:
+        tarefa_verificacao = asyncio.get_running_loop().create_task(loop_verificacao(), name="replica")
+
+
+async def parar() -> None:
+    global tarefa_verificacao
+    if tarefa_verificacao is None:
+        return
+    tarefa_verificacao.cancel()
+    await asyncio.gather(tarefa_verificacao, return_exceptions=True)
+    tarefa_verificacao = None
+    await read_engine.dispose()
+
+
+# ========== READ-YOUR-WRITES ==========
+
+def chave_usuario(authorization: Optional[str]) -> Optional[tuple[int, int, int]]:
+    """(codemp, codfil, codusu) do Bearer, sem ir ao banco (None se ausente ou inválido)"""
+    esquema, _, token = (authorization or "").partition(" ")
+    if esquema.lower() != "bearer" or not token:
+        return None
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        return int(payload["codemp"]), int(payload["codfil"]), int(payload["codusu"])
+    except (JWTError, KeyError, TypeError, ValueError):
+        return None
+
+
+def marcar_escrita(chave: tuple[int, int, int]) -> None:
+    escritas[chave] = time.monotonic() + settings.REPLICA_LEITURA_PROPRIA_SEGUNDOS
+
+
+def escrita_recente(request: Request) -> bool:
+    """O request deve ler do primário: o usuário escreveu há pouco, aqui ou em outro worker"""
+    if not notificacoes.ativo or time.monotonic() < primario_ate:
+        return True  # escritas dos outros workers podem não ter chegado
+    chave = chave_usuario(request.headers.get("authorization"))
+    fim = escritas.get(chave) if chave is not None else None
+    return fim is not None and fim > time.monotonic()
+
+
+def limpar_escritas() -> None:
+    agora = time.monotonic()
+    for chave in [chave for chave, fim in escritas.items() if fim <= agora]:
+        del escritas[chave]
+
+
+async def publicar_escrita(chave: tuple[int, int, int]) -> None:
+    """NOTIFY em conexão própria (autocommit): a escrita do handler já foi commitada"""
+    payload = dumps({"e": chave[0], "f": chave[1], "u": chave[2]}).decode()
+    async with engine.connect() as conn:
+        await conn.execute(select(func.pg_notify(CANAL_ESCRITAS, payload)))
+        await conn.commit()
+
+
+def receber_escrita(payload: str) -> None:
+    try:
+        mensagem = orjson.loads(payload)
+        marcar_escrita((int(mensagem["e"]), int(mensagem["f"]), int(mensagem["u"])))
+    except (orjson.JSONDecodeError, KeyError, TypeError, ValueError):
+        logger.warning("Marca de escrita inválida descartada: %r", payload[:200])
+
+
+def reconectado() -> None:
+    """Escritas notificadas com o LISTEN fora se perderam: uma janela inteira no primário"""
+    global primario_ate
+    primario_ate = time.monotonic() + settings.REPLICA_LEITURA_PROPRIA_SEGUNDOS
+
+
+class LeituraPropriaMiddleware:
+    """Marca (em todos os workers) quem acabou de escrever, para suas leituras irem ao primário"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"].encode() not in METODOS_ESCRITA:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_marcando(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                chave = chave_usuario(Headers(scope=scope).get("authorization"))
+                if chave is not None:
+                    # Antes da resposta: a próxima leitura do cliente já encontra a marca
+                    marcar_escrita(chave)
+                    try:
+                        await publicar_escrita(chave)
+                    except Exception as e:
+                        logger.warning("Escrita de %s não avisada aos outros workers: %s", chave, e)
+            await send(message)
+
+        await self.app(scope, receive, send_marcando)
+
+
+def registrar_metricas() -> None:
+    registro = metricas.registro
+    registro.registrar_gauge(
+        "replica_atraso_segundos", "Atraso de replay da réplica na última verificação",
+        lambda: {} if estado_replica.atraso is None else {metricas.label_worker(): estado_replica.atraso},
+    )
+    registro.registrar_gauge(
+        "replica_em_uso", "1 quando as leituras deste worker vão para a réplica",
+        lambda: {metricas.label_worker(): float(estado_replica.saudavel)},
+    )
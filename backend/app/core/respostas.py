@@ -0,0 +1,144 @@
+# app/core/respostas.py
+"""
+Classe de resposta JSON padrão do app (orjson). Datas e datetimes saem em ISO
+8601 (nativo do orjson).
+
+Decimal: o FastAPI serializa o retorno da rota antes do render, então quem
+decide o formato dos valores monetários é a rota, não esta classe:
+
+- com response_model (schema com campo Decimal, ou dict/list[dict]): o modo
+  JSON do Pydantic v2 já entrega string ("0.10"), sem perda de precisão;
+- sem response_model: o jsonable_encoder converte Decimal em float (número no
+  JSON); precisão de double, suficiente para um Numeric(15, 2) isolado, mas
+  não garantida em somas e agregados;
+- OrjsonResponse(conteudo) devolvida diretamente (ex.: /batch): padrao_json
+  converte Decimal em string.
+
+Rota nova com valor monetário: declare response_model.
+
+Rotas com a dependência negociar_formato também respondem, conforme o Accept:
+
+- application/x-columnar+json: cada lista de objetos vira
+  {"_linhas": n, "_colunas": {campo: [valores]}}; colunas de texto repetitivas
+  (ex.: statcap, catcap) vão como {"_dicionario": [...], "_indices": [...]}
+- application/msgpack: o mesmo conteúdo do JSON, em binário (requer o pacote
+  `msgpack`; sem ele o formato não é oferecido e a resposta sai em JSON)
+"""
+from contextvars import ContextVar
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+
+try:
+    import msgpack
+except ImportError:  # opcional
+    msgpack = None
+
+OPCOES_ORJSON = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+MEDIA_TYPE_COLUNAR = "application/x-columnar+json"
+MEDIA_TYPE_MSGPACK = "application/msgpack"
+MEDIA_TYPES_FORMATO = {
+    MEDIA_TYPE_COLUNAR: "colunar",
+    MEDIA_TYPE_MSGPACK: "msgpack",
+    "application/x-msgpack": "msgpack",
+    "application/json": "json",
+    "application/*": "json",
+    "*/*": "json",
+}
+
+# Formato negociado no request atual (definido por negociar_formato)
+formato_resposta: ContextVar[str] = ContextVar("formato_resposta", default="json")
+
+
+def padrao_json(valor: Any) -> Any:
+    """Tipos que o orjson não serializa sozinho (só chegam aqui em respostas montadas diretamente)"""
+    if isinstance(valor, Decimal):
+        return str(valor)
+    if isinstance(valor, (set, frozenset)):
+        return list(valor)
+    if hasattr(valor, "model_dump"):  # modelo Pydantic devolvido sem response_model
+        return valor.model_dump(mode="json")
+    raise TypeError(f"Tipo não serializável em JSON: {type(valor).__name__}")
+
+
+def dumps(conteudo: Any) -> bytes:
+    return orjson.dumps(conteudo, default=padrao_json, option=OPCOES_ORJSON)
+
+
+# ========== NEGOCIAÇÃO ==========
+
+def formato_aceito(accept: str) -> str:
+    """Formato de maior q no Accept entre os suportados (json se nenhum)"""
+    candidatos = []
+    for posicao, parte in enumerate(accept.lower().split(",")):
+        tipo, *parametros = (item.strip() for item in parte.split(";"))
+        qualidade = 1.0
+        for parametro in parametros:
+            nome, _, valor = parametro.partition("=")
+            if nome.strip() == "q":
+                try:
+                    qualidade = float(valor)
+                except ValueError:
+                    qualidade = 0.0
+        formato = MEDIA_TYPES_FORMATO.get(tipo)
+        if formato is None or qualidade <= 0 or (formato == "msgpack" and msgpack is None):
+            continue
+        candidatos.append((-qualidade, posicao, formato))
+    return min(candidatos)[2] if candidatos else "json"
+
+
+async def negociar_formato(request: Request, response: Response) -> str:
+    """Dependência das rotas de listagem: JSON, colunar ou MessagePack conforme o Accept"""
+    formato = formato_aceito(request.headers.get("accept", ""))
+    formato_resposta.set(formato)
+    response.headers["Vary"] = "Accept"
+    return formato
+
+
+# ========== FORMATO COLUNAR ==========
+
+def codificar_coluna(valores: list) -> Any:
+    """Coluna de texto com muitas repetições vira dicionário + índices"""
+    if not any(isinstance(valor, str) for valor in valores):
+        return valores
+    if not all(valor is None or isinstance(valor, str) for valor in valores):
+        return valores
+    dicionario: dict[str, int] = {}
+    indices = [None if valor is None else dicionario.setdefault(valor, len(dicionario)) for valor in valores]
+    if len(dicionario) * 2 > len(valores):
+        return valores  # pouca repetição: o dicionário não compensa
+    return {"_dicionario": list(dicionario), "_indices": indices}
+
+
+def colunar(conteudo: Any) -> Any:
+    """Converte (recursivamente) as listas de objetos do conteúdo para colunas"""
+    if isinstance(conteudo, dict):
+        return {chave: colunar(valor) for chave, valor in conteudo.items()}
+    if not isinstance(conteudo, list) or not conteudo or not all(isinstance(item, dict) for item in conteudo):
+        return conteudo
+
+    campos = dict.fromkeys(campo for item in conteudo for campo in item)
+    return {
+        "_linhas": len(conteudo),
+        "_colunas": {
+            campo: codificar_coluna([item.get(campo) for item in conteudo]) for campo in campos
+        },
+    }
+
+
+class OrjsonResponse(JSONResponse):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        formato = formato_resposta.get()
+        if formato == "colunar":
+            self.media_type = MEDIA_TYPE_COLUNAR
+            return dumps(colunar(content))
+        if formato == "msgpack":
+            self.media_type = MEDIA_TYPE_MSGPACK
+            return msgpack.packb(content, default=padrao_json)
+        return dumps(content)
@@ -0,0 +1,162 @@
+# app/core/saude.py
+"""
+Probes de liveness e readiness.
+
+Uma tarefa em background verifica o banco a cada HEALTH_INTERVALO_SEGUNDOS
+(ping pelo pool da aplicação + revisão do Alembic) e guarda o resultado em
+memória. Os endpoints /health/* só leem esse estado e a ocupação do pool, sem
+tocar no banco: cada probe custa microssegundos.
+"""
+import asyncio
+import logging
+import time
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+
+logger = logging.getLogger("app.saude")
+
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+
+class EstadoSaude:
+    def __init__(self):
+        self.banco_ok = False
+        self.latencia_ms: Optional[float] = None
+        self.erro_banco: Optional[str] = None
+        self.revisao_banco: Optional[str] = None
+        self.heads_esperados: Optional[set[str]] = None  # None: ainda não lidos
+        self.erro_migracoes: Optional[str] = None
+        self.verificado_em: Optional[float] = None  # time.monotonic() da última verificação
+        self.drenando = False  # desligamento em curso (ver app/core/ciclo_vida.py)
+
+
+estado = EstadoSaude()
+tarefa_verificacao: Optional[asyncio.Task] = None
+
+
+# ========== VERIFICAÇÕES (BACKGROUND) ==========
+
+def ler_heads_alembic() -> None:
+    """Heads do diretório de migrações (lidos uma vez: não mudam com o processo rodando)"""
+    try:
+        from alembic.config import Config
+        from alembic.script import ScriptDirectory
+
+        config = Config(str(ALEMBIC_INI))
+        # script_location do alembic.ini é relativo: resolve a partir do backend, não do cwd
+        config.set_main_option("script_location", str(ALEMBIC_INI.parent / "migrations"))
+        script = ScriptDirectory.from_config(config)
+        estado.heads_esperados = set(script.get_heads())
+        estado.erro_migracoes = None
+    except Exception as e:
+        estado.heads_esperados = set()
+        estado.erro_migracoes = f"Falha ao ler as migrações: {e}"
+        logger.warning(estado.erro_migracoes)
+
+
+async def verificar_banco(engine: AsyncEngine) -> None:
+    inicio = time.perf_counter()
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            if settings.HEALTH_VERIFICAR_MIGRACOES:
+                result = await conn.execute(text("SELECT version_num FROM alembic_version"))
+                estado.revisao_banco = ",".join(sorted(result.scalars().all())) or None
+        estado.banco_ok = True
+        estado.erro_banco = None
+    except Exception as e:
+        estado.banco_ok = False
+        estado.erro_banco = f"{type(e).__name__}: {e}"[:300]
+    estado.latencia_ms = round((time.perf_counter() - inicio) * 1000, 2)
+    estado.verificado_em = time.monotonic()
+
+
+async def loop_verificacao(engine: AsyncEngine) -> None:
+    while True:
+        try:
+            await asyncio.wait_for(verificar_banco(engine), timeout=settings.HEALTH_TIMEOUT_SEGUNDOS)
+        except asyncio.TimeoutError:
+            estado.banco_ok = False
+            estado.erro_banco = f"Ping ao banco passou de {settings.HEALTH_TIMEOUT_SEGUNDOS}s"
+            estado.verificado_em = time.monotonic()
+        await asyncio.sleep(settings.HEALTH_INTERVALO_SEGUNDOS)
+
+
+def iniciar_verificacao(engine: AsyncEngine) -> None:
+    """Sobe a tarefa de verificação (chamado na inicialização do app)"""
+    global tarefa_verificacao
+    if settings.HEALTH_VERIFICAR_MIGRACOES and estado.heads_esperados is None:
+        ler_heads_alembic()
+    if tarefa_verificacao is None or tarefa_verificacao.done():
+        tarefa_verificacao = asyncio.get_running_loop().create_task(loop_verificacao(engine))
+
+
+async def parar_verificacao() -> None:
+    global tarefa_verificacao
+    if tarefa_verificacao is None:
+        return
+    tarefa_verificacao.cancel()
+    try:
+        await tarefa_verificacao
+    except asyncio.CancelledError:
+        pass
+    tarefa_verificacao = None
+
+
+# ========== PROBES ==========
+
+def ocupacao_pool(engine: AsyncEngine) -> dict:
+    pool = engine.pool
+    capacidade = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+    em_uso = pool.checkedout()
+    return {
+        "em_uso": em_uso,
+        "capacidade": capacidade,
+        "saturacao": round(em_uso / capacidade, 3) if capacidade else 0.0,
+    }
+
+
+def readiness(engine: AsyncEngine) -> tuple[bool, dict]:
+    """Estado de prontidão a partir do cache (não acessa o banco)"""
+    problemas = []
+    if estado.drenando:
+        problemas.append("Servidor em desligamento")
+
+    idade = None if estado.verificado_em is None else time.monotonic() - estado.verificado_em
+    if idade is None:
+        problemas.append("Banco ainda não verificado")
+    elif idade > settings.HEALTH_INTERVALO_SEGUNDOS * 3 + settings.HEALTH_TIMEOUT_SEGUNDOS:
+        problemas.append("Verificação do banco desatualizada")
+    elif not estado.banco_ok:
+        problemas.append(estado.erro_banco or "Banco indisponível")
+
+    pool = ocupacao_pool(engine)
+    if pool["saturacao"] >= settings.HEALTH_POOL_SATURACAO_MAX:
+        problemas.append(f"Pool de conexões saturado ({pool['em_uso']}/{pool['capacidade']})")
+
+    migracoes = None
+    if settings.HEALTH_VERIFICAR_MIGRACOES:
+        esperada = ",".join(sorted(estado.heads_esperados or ())) or None
+        migracoes = {"esperada": esperada, "banco": estado.revisao_banco}
+        if estado.erro_migracoes:
+            problemas.append(estado.erro_migracoes)
+        elif estado.banco_ok and estado.revisao_banco != esperada:
+            problemas.append("Revisão do banco diferente do head das migrações")
+
+    pronto = not problemas
+    return pronto, {
+        "status": "ready" if pronto else "not_ready",
+        "problemas": problemas,
+        "banco": {
+            "ok": estado.banco_ok,
+            "latencia_ms": estado.latencia_ms,
+            "verificado_ha_s": round(idade, 1) if idade is not None else None,
+        },
+        "pool": pool,
+        "migracoes": migracoes,
+    }
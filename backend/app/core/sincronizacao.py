@@ -0,0 +1,113 @@
+# app/core/sincronizacao.py
+"""
+Sincronização incremental (GET /contas-pagar/changes, /contas-receber/changes,
+/cadastros-gerais/changes).
+
+O cliente guarda o token devolvido e pede só o que mudou depois dele: registros
+com datalt posterior (upserts, índice (codemp, codfil, datalt)) e chaves
+excluídas (tombstones em rfe903exc, gravados por trigger).
+
+Token: posição (datalt, chave) da última linha entregue. Enquanto houver mais
+páginas o token avança pela chave (keyset); na última página ele volta para
+"agora - SYNC_JANELA_SEGUNDOS", porque datalt é o início da transação e uma
+transação que commita depois da leitura teria datalt no passado. O cliente
+recebe de novo o que mudou na janela, o que é inofensivo (upsert idempotente).
+"""
+import base64
+import binascii
+import json
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.database import AsyncSessionLocal
+from app.models.exclusao import Exclusao
+from app.models.user import User
+
+
+def gerar_token(momento: datetime, chave: int = 0) -> str:
+    dados = json.dumps({"t": momento.isoformat(), "k": chave}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(dados.encode()).decode().rstrip("=")
+
+
+def ler_token(token: str) -> tuple[datetime, int]:
+    try:
+        dados = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        return datetime.fromisoformat(dados["t"]), int(dados["k"])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Token de sincronização inválido"
+        )
+
+
+async def buscar_alteracoes(
+    db: AsyncSession,
+    modelo,
+    chave: str,
+    current_user: User,
+    since: Optional[str],
+    limit: int,
+    query=None,
+) -> dict:
+    """
+    Upserts e exclusões de `modelo` desde o token, no escopo do usuário.
+
+    `query` permite selecionar colunas extras (ex.: nome do fornecedor); a
+    primeira coluna do resultado deve ser a entidade `modelo`.
+    """
+    coluna_chave = getattr(modelo, chave)
+    # Relógio do banco (mesmo de datalt), sem fuso, como as colunas
+    agora = (await db.execute(select(func.localtimestamp()))).scalar()
+
+    desde, ultima_chave = ler_token(since) if since else (None, 0)
+    if desde is not None and desde < agora - timedelta(days=settings.SYNC_RETENCAO_DIAS):
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Token de sincronização expirado. Recarregue os dados completos."
+        )
+
+    filtros_tenant = []
+    if not current_user.issuper:
+        filtros_tenant = [modelo.codemp == current_user.codemp, modelo.codfil == current_user.codfil]
+
+    query = (query if query is not None else select(modelo)).where(*filtros_tenant)
+    if desde is not None:
+        query = query.where(tuple_(modelo.datalt, coluna_chave) > tuple_(desde, ultima_chave))
+    query = query.order_by(modelo.datalt, coluna_chave).limit(limit + 1)
+
+    linhas = (await db.execute(query)).all()
+    tem_mais = len(linhas) > limit
+    linhas = linhas[:limit]
+
+    excluidos = []
+    if desde is not None:  # carga inicial não precisa de exclusões
+        filtros_exclusao = [Exclusao.tabexc == modelo.__tablename__, Exclusao.datexc > desde]
+        if not current_user.issuper:
+            filtros_exclusao += [Exclusao.codemp == current_user.codemp, Exclusao.codfil == current_user.codfil]
+        result = await db.execute(select(Exclusao.codreg).where(*filtros_exclusao).distinct())
+        excluidos = list(result.scalars().all())
+
+    if tem_mais:
+        ultimo = linhas[-1][0]
+        token = gerar_token(ultimo.datalt, getattr(ultimo, chave))
+    else:
+        token = gerar_token(agora - timedelta(seconds=settings.SYNC_JANELA_SEGUNDOS))
+
+    return {"linhas": linhas, "excluidos": excluidos, "token": token, "tem_mais": tem_mais}
+
+
+async def limpar_exclusoes() -> dict:
+    """Agendador: apaga tombstones fora da retenção (tokens mais antigos recebem 410)"""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            delete(Exclusao).where(
+                Exclusao.datexc < func.localtimestamp() - timedelta(days=settings.SYNC_RETENCAO_DIAS)
+            )
+        )
+        await db.commit()
+    return {"removidas": result.rowcount}
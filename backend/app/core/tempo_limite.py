@@ -0,0 +1,129 @@
+# app/core/tempo_limite.py
+"""
+Tempo limite de SQL por classe de endpoint e cancelamento na desconexão.
+
+Classes (STATEMENT_TIMEOUT_MS): interativo (CRUD e listagens), relatorio e
+lote (exportações, importações, varreduras). O router declara a classe:
+
+    router = APIRouter(..., dependencies=[Depends(timeout_sql("interativo"))])
+
+e cada transação da sessão começa com SET LOCAL statement_timeout (hook
+after_begin), inclusive as abertas depois de um commit. SET LOCAL vale só
+para a transação: a conexão volta ao pool sem o ajuste. Sessões próprias
+(streams, jobs) usam aplicar_timeout(db, classe).
+
+Um endpoint pode trocar a classe do router com outra dependência
+timeout_sql(...) na rota: as do router rodam antes, e a última vence.
+
+CancelamentoMiddleware: em GET/HEAD, se o cliente desconecta antes da
+resposta, o request é cancelado; o cancelamento chega ao driver, que manda o
+cancel da query em andamento ao Postgres, e a conexão volta ao pool em vez
+de esperar a query terminar (ou o statement_timeout).
+"""
+import asyncio
+
+from fastapi import Depends
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.instrumentacao import FORA_DA_CONTAGEM
+from app.database import get_db
+
+CHAVE_SESSAO = "statement_timeout_ms"
+
+# Status registrado nas métricas para request abandonado pelo cliente (convenção do nginx)
+STATUS_CLIENTE_DESCONECTOU = 499
+
+
+def milissegundos(classe: str) -> int:
+    return int(settings.STATEMENT_TIMEOUT_MS[classe])
+
+
+async def aplicar_timeout(db: AsyncSession, classe: str) -> None:
+    """Define a classe da sessão (e ajusta já a transação aberta, se houver)"""
+    db.info[CHAVE_SESSAO] = milissegundos(classe)
+    if db.in_transaction():
+        await db.execute(text(f"SET LOCAL statement_timeout = {milissegundos(classe)}"))
+
+
+def timeout_sql(classe: str):
+    """Dependência (router ou rota) que aplica a classe na sessão do request"""
+    milissegundos(classe)  # classe inexistente falha na importação do router, não no request
+
+    async def dependencia(db: AsyncSession = Depends(get_db)):
+        await aplicar_timeout(db, classe)
+
+    return dependencia
+
+
+def after_begin(session, transaction, connection) -> None:
+    ms = session.info.get(CHAVE_SESSAO)
+    # Só no Postgres (a réplica pode ser um SQLite local, ex.: nos testes)
+    if ms is not None and connection.dialect.name == "postgresql":
+        # Uma por transação: não conta como repetição no detector de N+1
+        connection.exec_driver_sql(
+            f"SET LOCAL statement_timeout = {int(ms)}", execution_options={FORA_DA_CONTAGEM: True}
+        )
+
+
+def instalar_timeouts() -> None:
+    """Registra o hook de início de transação (uma vez, na inicialização)"""
+    event.listen(Session, "after_begin", after_begin)
+
+
+# ========== CANCELAMENTO ==========
+
+class CancelamentoMiddleware:
+    """Cancela GET/HEAD cujo cliente desconectou antes do fim da resposta"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        # Só métodos sem corpo: ler o receive à frente não atrapalha o upload
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        tarefa = asyncio.current_task()
+        mensagens: asyncio.Queue = asyncio.Queue()
+        iniciada = concluida = desconectou = False
+
+        async def vigiar():
+            nonlocal desconectou
+            while True:
+                mensagem = await receive()
+                mensagens.put_nowait(mensagem)  # o app (ex.: StreamingResponse) também vê a desconexão
+                if mensagem["type"] == "http.disconnect":
+                    if not concluida:
+                        desconectou = True
+                        tarefa.cancel()
+                    return
+
+        async def receive_vigiado():
+            return await mensagens.get()
+
+        async def send_vigiado(mensagem):
+            nonlocal iniciada, concluida
+            if mensagem["type"] == "http.response.start":
+                iniciada = True
+            elif mensagem["type"] == "http.response.body" and not mensagem.get("more_body", False):
+                concluida = True
+            await send(mensagem)
+
+        vigia = asyncio.create_task(vigiar())
+        try:
+            await self.app(scope, receive_vigiado, send_vigiado)
+            if desconectou:
+                tarefa.uncancel()  # o app engoliu o CancelledError; zera o pedido pendente
+        except asyncio.CancelledError:
+            if not desconectou or tarefa.uncancel() > 0:
+                raise  # cancelamento de fora (desligamento), não da desconexão
+            if not iniciada:
+                # O servidor descarta o envio (cliente já saiu); serve para as métricas
+                await send({"type": "http.response.start", "status": STATUS_CLIENTE_DESCONECTOU, "headers": []})
+                await send({"type": "http.response.body", "body": b""})
+        finally:
+            vigia.cancel()
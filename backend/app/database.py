@@ -1,7 +1,9 @@
 from typing import AsyncGenerator
+from fastapi import Depends, Request
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from app.core.config import settings
+from app.core.admissao import PoolMedido
 
 # Troquei de asyncpg -> psycopg (mais estável no Windows)
 DATABASE_URL = settings.DATABASE_URL
@@ -12,6 +14,9 @@ engine = create_async_engine(
     echo=False,           # coloca True se quiser ver as queries no log
     pool_pre_ping=True,   # valida conexões antes de usar
     pool_recycle=1800,    # recicla conexões antigas (30 min)
+    poolclass=PoolMedido,  # mede a espera por conexão (controle de admissão)
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
 )
 
 # Session factory para trabalhar com SQLAlchemy em modo async
@@ -23,6 +28,35 @@ AsyncSessionLocal = async_sessionmaker(
     autocommit=False,
 )
 
+# Réplica de leitura (opcional, DATABASE_READ_URL): mesma sessão, outro servidor.
+# Pool comum, fora do controle de admissão: a fila da réplica não deve recusar
+# requests que só usam o primário (nem o contrário)
+read_engine = None
+AsyncSessionLeitura = None
+if settings.DATABASE_READ_URL:
+    read_engine = create_async_engine(
+        settings.DATABASE_READ_URL,
+        pool_pre_ping=True,
+        pool_recycle=1800,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+    )
+    AsyncSessionLeitura = async_sessionmaker(
+        bind=read_engine,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autoflush=False,
+        autocommit=False,
+    )
+
+class EstadoReplica:
+    def __init__(self):
+        self.saudavel = False  # atraso dentro do limite (verificado por app/core/replica.py)
+        self.atraso: float | None = None
+
+
+estado_replica = EstadoReplica()
+
 # Base para os models
 Base = declarative_base()
 
@@ -32,3 +66,53 @@ Base = declarative_base()
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     async with AsyncSessionLocal() as session:
         yield session
+
+
+def ler_da_replica(request: Request) -> bool:
+    """Réplica configurada, em dia e sem escrita recente do usuário"""
+    if AsyncSessionLeitura is None or not estado_replica.saudavel:
+        return False
+    from app.core.replica import escrita_recente  # replica importa este módulo
+
+    return not escrita_recente(request)
+
+
+def fabrica_leitura(request: Request) -> async_sessionmaker:
+    """Fábrica de sessões para leituras fora do request (ex.: streams de exportação)"""
+    return AsyncSessionLeitura if ler_da_replica(request) else AsyncSessionLocal
+
+
+async def get_read_db(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Sessão para handlers somente leitura: réplica quando possível, senão a
+    própria sessão do primário do request (sem segunda sessão).
+    """
+    if not ler_da_replica(request):
+        yield db
+        return
+    async with AsyncSessionLeitura(info=dict(db.info)) as session:  # herda o statement_timeout
+        yield session
+
+
+async def copy_records(session: AsyncSession, tabela: str, colunas: list[str], records: list[tuple]) -> None:
+    """
+    Carrega registros via COPY ... FROM STDIN na conexão da sessão.
+    
+    Funciona com os dois drivers suportados (psycopg 3 e asyncpg).
+    """
+    conn = await session.connection()
+    raw = await conn.get_raw_connection()
+    driver = raw.driver_connection
+
+    if hasattr(driver, "copy_records_to_table"):  # asyncpg
+        await driver.copy_records_to_table(tabela, records=records, columns=colunas)
+        return
+
+    # psycopg 3
+    async with driver.cursor() as cur:
+        async with cur.copy(f"COPY {tabela} ({', '.join(colunas)}) FROM STDIN") as copy:
+            for record in records:
+                await copy.write_row(record)
@@ -1,10 +1,13 @@
 import asyncio
+import sys
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 import uvicorn
 
 # Resolve bug do asyncio + asyncpg no Windows
-asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+if sys.platform == "win32":
+    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
 
 import app.routers.users as users
 import app.routers.auth as auth
@@ -16,12 +19,32 @@ from app.routers import contas_receber
 from app.routers import relatorios
 from app.routers import cadastro_geral
 from app.routers import licencas
+from app.routers import importacao
+from app.routers import batch
+from app.routers import eventos
+from app.core.config import settings
+from app.core.instrumentacao import InstrumentacaoSQLMiddleware, instalar_instrumentacao
+from app.core.queries_lentas import configurar_queries_lentas
+from app.core.detector_queries import configurar_detector
+from app.core import metricas
+from app.core import saude
+from app.core import limites_tenant
+from app.core import admissao
+from app.core import replica
+from app.core.tempo_limite import CancelamentoMiddleware, instalar_timeouts
+from app.core.ciclo_vida import DrenagemMiddleware, lifespan
+from app.core.compressao import CompressaoMiddleware
+from app.core.respostas import OrjsonResponse
+from app.core.manutencao import registrar_jobs
+from app.database import engine, read_engine
 
 
 app = FastAPI(
     title="App Fiscal API",
     description="Sistema Fiscal Multiempresa",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=OrjsonResponse,
 )
 
 # CORS - libera seu frontend React/Vite
@@ -38,14 +61,81 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compressão (brotli/gzip) acima de COMPRESSAO_MINIMO_BYTES
+# Adicionada antes das métricas: a latência medida inclui o tempo de compressão
+app.add_middleware(CompressaoMiddleware, minimo_bytes=settings.COMPRESSAO_MINIMO_BYTES)
+
+# statement_timeout por classe (SET LOCAL no início de cada transação)
+instalar_timeouts()
+
+# GET/HEAD abandonados pelo cliente são cancelados (a query em andamento junto)
+# Dentro da instrumentação e das métricas: o request cancelado aparece como 499
+if settings.CANCELAR_NA_DESCONEXAO:
+    app.add_middleware(CancelamentoMiddleware)
+
+# Instrumentação de SQL (Server-Timing + agregados por rota)
+if settings.SQL_INSTRUMENTACAO:
+    instalar_instrumentacao(engine)
+    if read_engine is not None:
+        instalar_instrumentacao(read_engine)
+    configurar_queries_lentas()
+    configurar_detector()
+    app.add_middleware(InstrumentacaoSQLMiddleware, amostragem=settings.SQL_INSTRUMENTACAO_AMOSTRA)
+
+# Controle de admissão: com o pool saturado, recusa cedo relatórios/exportações
+# Dentro das métricas: as recusas (503) aparecem no histograma
+if settings.ADMISSAO_ATIVO:
+    app.add_middleware(admissao.AdmissaoMiddleware)
+    admissao.registrar_metricas()
+
+# Réplica de leitura: quem acabou de escrever lê do primário (cookie)
+if read_engine is not None:
+    app.add_middleware(replica.LeituraPropriaMiddleware)
+    replica.registrar_metricas()
+
+# Métricas Prometheus (latência por rota, requests em andamento, pool)
+metricas.configurar_multiprocesso(settings.METRICS_MULTIPROC_DIR)
+app.add_middleware(metricas.MetricasMiddleware)
+
+
+def gauges_pool() -> dict[str, float]:
+    pool = engine.pool
+    return {
+        'estado="tamanho"': pool.size(),
+        'estado="em_uso"': pool.checkedout(),
+        'estado="livres"': pool.checkedin(),
+        'estado="overflow"': pool.overflow(),
+    }
+
+
+metricas.registro.registrar_gauge("db_pool_conexoes", "Conexões do pool por estado", gauges_pool)
+limites_tenant.registrar_metricas()
+
+# Jobs de manutenção (sobem no lifespan)
+registrar_jobs()
+
+# Por último: é o middleware mais externo, recusa requests novos durante o desligamento
+app.add_middleware(DrenagemMiddleware)
+
 # Rotas básicas
 @app.get("/")
 async def root():
     return {"message": "App Fiscal API está rodando! 🚀"}
 
+@app.get("/health/live")
+async def health_live():
+    # Só confirma que o processo e o event loop respondem
+    return {"status": "alive"}
+
+@app.get("/health/ready")
 @app.get("/health")
-async def health_check():
-    return {"status": "healthy", "database": "connected"}
+async def health_ready():
+    pronto, detalhes = saude.readiness(engine)
+    return JSONResponse(detalhes, status_code=200 if pronto else 503)
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(metricas.renderizar(), media_type="text/plain; version=0.0.4")
 
 # Routers
 app.include_router(users.router)
@@ -58,6 +148,10 @@ app.include_router(contas_receber.router)
 app.include_router(relatorios.router)
 app.include_router(cadastro_geral.router)
 app.include_router(licencas.router) 
+app.include_router(importacao.router)
+app.include_router(batch.router)
+app.include_router(eventos.router)
 
+# Desenvolvimento (produção: python -m app.servidor)
 if __name__ == "__main__":
     uvicorn.run("app.main:app", host="127.0.0.1", port=8000, reload=True)
\ No newline at end of file
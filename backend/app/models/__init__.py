@@ -4,5 +4,9 @@ from .contas_pagar import ContaPagar
 from .contas_receber import ContaReceber
 from .cadastro_geral import CadastroGeral
 from .licenca import Licenca
+from .agendamento import Agendamento
+from .relatorio_job import RelatorioJob
+from .versao_tabela import VersaoTabela
+from .exclusao import Exclusao
 
-__all__ = ["User", "Pessoa", "ContaPagar", "ContaReceber", "CadastroGeral", "Licenca"]
\ No newline at end of file
+__all__ = ["User", "Pessoa", "ContaPagar", "ContaReceber", "CadastroGeral", "Licenca", "Agendamento", "RelatorioJob", "VersaoTabela", "Exclusao"]
\ No newline at end of file
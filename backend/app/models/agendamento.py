@@ -0,0 +1,19 @@
+# app/models/agendamento.py
+from sqlalchemy import Column, Integer, String, DateTime, Text
+from app.database import Base
+
+
+class Agendamento(Base):
+    """Última execução de cada job do agendador (compartilhada entre os workers)"""
+    __tablename__ = "rfe900agd"
+
+    nomagd = Column(String(60), primary_key=True, nullable=False, comment="Nome do job")
+    datexe = Column(DateTime, nullable=True, comment="Horário agendado da última execução")
+    datini = Column(DateTime, nullable=True, comment="Início da última execução")
+    datfim = Column(DateTime, nullable=True, comment="Fim da última execução")
+    statagd = Column(String(10), nullable=True, comment="Status da última execução: OK, ERRO")
+    durexe = Column(Integer, nullable=True, comment="Duração da última execução (ms)")
+    resagd = Column(Text, nullable=True, comment="Resultado da última execução (JSON)")
+    erragd = Column(Text, nullable=True, comment="Erro da última execução")
+    qtdexe = Column(Integer, nullable=False, default=0, comment="Total de execuções")
+    qtderr = Column(Integer, nullable=False, default=0, comment="Total de execuções com erro")
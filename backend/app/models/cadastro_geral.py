@@ -49,7 +49,7 @@ class CadastroGeral(Base):
     # Campos de auditoria
     datcri = Column(DateTime, nullable=False, server_default=func.now(), comment="Data de criação")
     usucri = Column(Integer, nullable=False, comment="Usuário que criou")
-    datalt = Column(DateTime, nullable=True, onupdate=func.now(), comment="Data da última alteração")
+    datalt = Column(DateTime, nullable=False, server_default=func.now(), onupdate=func.now(), comment="Data da última alteração")
     usualt = Column(Integer, nullable=True, comment="Usuário que alterou")
     
     # Constraints
@@ -65,6 +65,7 @@ class CadastroGeral(Base):
         
         # Índices compostos para multi-tenant
         Index("idx_rfe022cad_tenant", "codemp", "codfil"),
+        Index("idx_rfe022cad_sync", "codemp", "codfil", "datalt"),  # /changes
         Index("idx_rfe022cad_pk_tenant", "codcad", "codemp", "codfil"),
         Index("idx_rfe022cad_nome_tenant", "codemp", "codfil", "nomcad"),
         Index("idx_rfe022cad_tipo_tenant", "codemp", "codfil", "tipcad"),
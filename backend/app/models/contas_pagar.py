@@ -42,7 +42,7 @@ class ContaPagar(Base):
     # Campos de auditoria
     datcri = Column(DateTime, nullable=False, server_default=func.now(), comment="Data de criação")
     usucri = Column(Integer, nullable=False, comment="Usuário que criou")
-    datalt = Column(DateTime, nullable=True, onupdate=func.now(), comment="Data da última alteração")
+    datalt = Column(DateTime, nullable=False, server_default=func.now(), onupdate=func.now(), comment="Data da última alteração")
     usualt = Column(Integer, nullable=True, comment="Usuário que alterou")
     
     # Constraints
@@ -58,6 +58,7 @@ class ContaPagar(Base):
         
         # Índices compostos para multi-tenant
         Index("idx_rfe020cap_tenant", "codemp", "codfil"),
+        Index("idx_rfe020cap_sync", "codemp", "codfil", "datalt"),  # /changes
         Index("idx_rfe020cap_pk_tenant", "codcap", "codemp", "codfil"),
         Index("idx_rfe020cap_fornecedor_tenant", "codemp", "codfil", "codfor"),
         Index("idx_rfe020cap_status_tenant", "codemp", "codfil", "statcap"),
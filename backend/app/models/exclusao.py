@@ -0,0 +1,26 @@
+# app/models/exclusao.py
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Index
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class Exclusao(Base):
+    """
+    Registros excluídos (tombstones) para a sincronização incremental (/changes).
+
+    Preenchida pela trigger rfe903exc_registrar() (migração 006) em DELETE e em
+    UPDATE que move a linha de tenant. Limpa pelo agendador após SYNC_RETENCAO_DIAS.
+    """
+    __tablename__ = "rfe903exc"
+
+    codexc = Column(BigInteger, primary_key=True, autoincrement=True, comment="Código da exclusão")
+    tabexc = Column(String(30), nullable=False, comment="Nome da tabela")
+    codreg = Column(BigInteger, nullable=False, comment="Chave do registro excluído")
+    codemp = Column(Integer, nullable=False, comment="Código da empresa")
+    codfil = Column(Integer, nullable=False, comment="Código da filial")
+    datexc = Column(DateTime, nullable=False, server_default=func.now(), comment="Data da exclusão")
+
+    __table_args__ = (
+        Index("idx_rfe903exc_sync", "tabexc", "codemp", "codfil", "datexc"),
+        Index("idx_rfe903exc_datexc", "datexc"),
+    )
@@ -1,4 +1,5 @@
 from sqlalchemy import Column, Integer, String, Numeric, Date, SmallInteger, Index
+from sqlalchemy.orm import deferred
 from sqlalchemy.sql import func
 from app.database import Base
 
@@ -20,7 +21,7 @@ class Pessoa(Base):
     faxpes = Column(String(15))
     celpes = Column(String(16))
     recpes = Column(String(15))
-    obspes = Column(String(1000))
+    obspes = deferred(Column(String(1000)), group="textos")  # carregado só no detalhe
     cpfpes = Column(String(18))
     cnppes = Column(String(14))
     nrgpes = Column(String(18))
@@ -31,7 +32,7 @@ class Pessoa(Base):
     sitpes = Column(String(1))
     civpes = Column(String(15))
     sexpes = Column(String(1))
-    logocl = Column(String(400))
+    logocl = deferred(Column(String(400)), group="textos")  # carregado só no detalhe
     endcob = Column(String(100))
     numcob = Column(String(10))
     baicob = Column(String(50))
@@ -74,7 +75,7 @@ class Pessoa(Base):
     diaven = Column(Integer)
     vlrmes = Column(Numeric(15, 2))
     perate = Column(Integer, default=0)
-    txtctr = Column(String(2000))
+    txtctr = deferred(Column(String(2000)), group="textos")  # carregado só no detalhe
     imppes = Column(String(1))
     iniseg = Column(Date)
     finseg = Column(Date)
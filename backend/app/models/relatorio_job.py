@@ -0,0 +1,46 @@
+# app/models/relatorio_job.py
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Boolean, Text, Index, CheckConstraint
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class RelatorioJob(Base):
+    """Fila de relatórios assíncronos (processados em background pelos workers)"""
+    __tablename__ = "rfe901rel"
+
+    codrel = Column(Integer, primary_key=True, nullable=False, autoincrement=True)
+
+    # Multiempresa
+    codemp = Column(Integer, nullable=False, comment="Código da empresa")
+    codfil = Column(Integer, nullable=False, comment="Código da filial")
+    codusu = Column(Integer, nullable=False, comment="Usuário que solicitou")
+    glorel = Column(Boolean, nullable=False, default=False, comment="Todos os tenants (superadmin)")
+
+    # Pedido
+    tiprel = Column(String(30), nullable=False, comment="Tipo: fluxo-caixa, contas-vencidas")
+    fmtrel = Column(String(4), nullable=False, comment="Formato do resultado: json, csv")
+    parrel = Column(JSONB, nullable=False, comment="Parâmetros do relatório")
+
+    # Processamento
+    statrel = Column(String(12), nullable=False, default="PENDENTE", comment="PENDENTE, PROCESSANDO, CONCLUIDO, ERRO")
+    arqrel = Column(String(255), nullable=True, comment="Arquivo do resultado (comprimido)")
+    tamrel = Column(BigInteger, nullable=True, comment="Tamanho do arquivo (bytes)")
+    errrel = Column(Text, nullable=True, comment="Mensagem de erro")
+
+    # Datas
+    datcri = Column(DateTime, nullable=False, server_default=func.now(), comment="Data de criação")
+    datini = Column(DateTime, nullable=True, comment="Início do processamento")
+    datfim = Column(DateTime, nullable=True, comment="Fim do processamento")
+
+    __table_args__ = (
+        CheckConstraint(
+            "statrel IN ('PENDENTE', 'PROCESSANDO', 'CONCLUIDO', 'ERRO')",
+            name="ck_rfe901rel_statrel"
+        ),
+        CheckConstraint("fmtrel IN ('json', 'csv')", name="ck_rfe901rel_fmtrel"),
+
+        # Índices
+        Index("idx_rfe901rel_fila", "statrel", "codrel"),
+        Index("idx_rfe901rel_tenant", "codemp", "codfil", "statrel"),
+    )
@@ -0,0 +1,20 @@
+# app/models/versao_tabela.py
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class VersaoTabela(Base):
+    """
+    Contador de alterações por tabela e tenant (ETags das listagens).
+
+    Mantido pelas triggers de rfe902ver_incrementar() (migração 005): qualquer
+    INSERT/UPDATE/DELETE, inclusive em massa ou fora da API, incrementa numver.
+    """
+    __tablename__ = "rfe902ver"
+
+    tabver = Column(String(30), primary_key=True, nullable=False, comment="Nome da tabela")
+    codemp = Column(Integer, primary_key=True, nullable=False, comment="Código da empresa")
+    codfil = Column(Integer, primary_key=True, nullable=False, comment="Código da filial")
+    numver = Column(BigInteger, nullable=False, default=0, comment="Número de alterações (statements)")
+    datalt = Column(DateTime, nullable=False, server_default=func.now(), comment="Data da última alteração")
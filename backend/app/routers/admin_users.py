@@ -5,12 +5,14 @@ from sqlalchemy import select
 from passlib.context import CryptContext
 from pydantic import BaseModel
 
+from app.core.invalidacao import publicar_invalidacao
 from app.database import get_db
+from app.core.tempo_limite import timeout_sql
 from app.models.user import User
 from app.schemas.user import UserCreateSuper, UserRead, UserUpdate
 from app.routers.auth import get_current_user
 
-router = APIRouter(prefix="/admin", tags=["Admin"])
+router = APIRouter(prefix="/admin", tags=["Admin"], dependencies=[Depends(timeout_sql("interativo"))])
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -66,6 +68,7 @@ async def delete_user_of_my_tenant(
         raise HTTPException(status_code=400, detail="Não é possível deletar um superadmin")
 
     await db.delete(user)
+    await publicar_invalidacao(db, user.codemp, user.codfil, "usuarios", user.codusu)
     await db.commit()
     return
 
@@ -178,6 +181,7 @@ async def patch_user_of_my_tenant(
         user.pwdusu = get_password_hash(payload.senha)
 
     # Nunca permitir trocar codemp/codfil por aqui
+    await publicar_invalidacao(db, user.codemp, user.codfil, "usuarios", user.codusu)
     await db.commit()
     await db.refresh(user)
     return user
@@ -206,6 +210,7 @@ async def set_admin_status(
         raise HTTPException(status_code=400, detail="Não é possível alterar isadmin de um superadmin")
 
     user.isadmin = payload.isadmin
+    await publicar_invalidacao(db, user.codemp, user.codfil, "usuarios", user.codusu)
     await db.commit()
     await db.refresh(user)
     return user
@@ -234,6 +239,7 @@ async def reset_password(
         raise HTTPException(status_code=400, detail="Nova senha inválida")
 
     user.pwdusu = get_password_hash(payload.nova_senha)
+    await publicar_invalidacao(db, user.codemp, user.codfil, "usuarios", user.codusu)
     await db.commit()
     await db.refresh(user)
     return user
\ No newline at end of file
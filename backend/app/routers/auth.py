@@ -5,17 +5,32 @@ from sqlalchemy import select
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
+from contextvars import ContextVar
+from typing import Optional
 
 from app.database import get_db
 from app.models.user import User
 from app.core.config import settings
+from app.core.instrumentacao import definir_tenant_request
+from app.core.invalidacao import CacheLocal
+from app.core.tempo_limite import timeout_sql
 
-router = APIRouter(prefix="/auth", tags=["Auth"])
+router = APIRouter(prefix="/auth", tags=["Auth"], dependencies=[Depends(timeout_sql("interativo"))])
 
 # Config JWT
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+# Usuário já autenticado pelo POST /batch: os sub-requests não repetem JWT + SELECT
+usuario_autenticado: ContextVar[Optional[User]] = ContextVar("usuario_autenticado", default=None)
+
+# Colunas do usuário por (codemp, codfil, codusu); quem altera rfe998usu publica
+# a invalidação ("usuarios") na transação e todos os workers descartam a entrada
+cache_usuarios = CacheLocal(
+    "usuarios", "usuarios", settings.CACHE_USUARIOS_TTL_SEGUNDOS, settings.CACHE_USUARIOS_MAXIMO
+)
+COLUNAS_USUARIO = [coluna.key for coluna in User.__table__.columns]
+
 
 def verify_password(plain_password, hashed_password):
     """Verifica se a senha em texto puro corresponde ao hash bcrypt"""
@@ -31,11 +46,8 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
 
-# 🔑 Função para obter usuário atual com tenant
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: AsyncSession = Depends(get_db),
-) -> User:
+async def usuario_do_token(token: str, db: AsyncSession) -> User:
+    """Valida o JWT e carrega o usuário (também usado por WebSocket/SSE, sem Depends)"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Não foi possível validar as credenciais",
@@ -54,7 +66,13 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
 
+    # Cache local: cada request recebe um User novo (desanexado), nunca o mesmo objeto
+    dados = cache_usuarios.obter(codemp, codfil, codusu)
+    if dados is not None:
+        return User(**dados)
+
     # Busca usuário com filtro de tenant
+    marca = cache_usuarios.marca()
     result = await db.execute(
         select(User).where(
             User.codusu == codusu,
@@ -65,7 +83,22 @@ async def get_current_user(
     user = result.scalar_one_or_none()
     if user is None:
         raise credentials_exception
+    cache_usuarios.guardar(
+        codemp, codfil, codusu, {coluna: getattr(user, coluna) for coluna in COLUNAS_USUARIO}, marca
+    )
+    return user
+
+
+# 🔑 Função para obter usuário atual com tenant
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db),
+) -> User:
+    user = usuario_autenticado.get()
+    if user is None:
+        user = await usuario_do_token(token, db)
 
+    definir_tenant_request(user.codemp, user.codfil)
     return user
 
 
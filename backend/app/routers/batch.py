@@ -0,0 +1,132 @@
+# app/routers/batch.py
+"""
+POST /batch: vários GETs da API em um único request.
+
+O usuário é autenticado uma vez (JWT + SELECT) e repassado aos sub-requests
+por ContextVar (ver auth.usuario_autenticado). Os sub-requests passam pelo app
+inteiro (rotas, ETags, métricas), em paralelo, no máximo BATCH_CONCORRENCIA ao
+mesmo tempo: cada um usa sua própria sessão, então o batch ocupa no máximo
+BATCH_CONCORRENCIA conexões do pool. Cada sub-request tem BATCH_TIMEOUT segundos
+(504 no item). Rotas de streaming são recusadas na validação (schemas/batch.py).
+"""
+import asyncio
+import logging
+from urllib.parse import unquote
+
+import orjson
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.respostas import OrjsonResponse
+from app.database import get_db
+from app.models.user import User
+from app.routers.auth import get_current_user, usuario_autenticado
+from app.schemas.batch import BatchItem, BatchRequest, BatchResponse
+
+logger = logging.getLogger("app.batch")
+
+router = APIRouter(prefix="/batch", tags=["Batch"])
+
+# Headers do request original repassados aos sub-requests (authorization: também o read-your-writes da réplica)
+HEADERS_REPASSADOS = {b"authorization", b"accept-language", b"user-agent", b"x-forwarded-for"}
+# Headers dos sub-requests devolvidos no item
+HEADERS_RESPOSTA = {"etag", "cache-control", "content-type", "retry-after"}
+
+
+async def executar_item(request: Request, item: BatchItem, semaforo: asyncio.Semaphore) -> dict:
+    caminho, _, query = item.path.partition("?")
+    headers = [(nome, valor) for nome, valor in request.scope["headers"] if nome in HEADERS_REPASSADOS]
+    headers.append((b"accept", b"application/json"))
+    if item.if_none_match:
+        headers.append((b"if-none-match", item.if_none_match.encode("latin-1", "replace")))
+
+    scope = {
+        "type": "http",
+        "asgi": request.scope.get("asgi", {"version": "3.0"}),
+        "http_version": request.scope.get("http_version", "1.1"),
+        "method": "GET",
+        "scheme": request.scope.get("scheme", "http"),
+        "server": request.scope.get("server"),
+        "client": request.scope.get("client"),
+        "root_path": request.scope.get("root_path", ""),
+        "path": unquote(caminho),
+        "raw_path": caminho.encode(),
+        "query_string": query.encode(),
+        "headers": headers,
+    }
+
+    corpo_enviado = False
+
+    async def receive():
+        nonlocal corpo_enviado
+        if not corpo_enviado:
+            corpo_enviado = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await asyncio.Event().wait()  # sem desconexão: espera até o sub-request terminar
+
+    resposta = {"status": 500, "headers": {}, "corpo": []}
+
+    async def send(mensagem):
+        if mensagem["type"] == "http.response.start":
+            resposta["status"] = mensagem["status"]
+            resposta["headers"] = {
+                nome.decode("latin-1").lower(): valor.decode("latin-1")
+                for nome, valor in mensagem.get("headers", [])
+            }
+        elif mensagem["type"] == "http.response.body":
+            resposta["corpo"].append(mensagem.get("body", b""))
+
+    async with semaforo:
+        try:
+            await asyncio.wait_for(request.app(scope, receive, send), settings.BATCH_TIMEOUT)
+        except asyncio.TimeoutError:  # o sub-request foi cancelado: descarta o que chegou a enviar
+            logger.warning("Sub-request %s do batch excedeu %ss", item.path, settings.BATCH_TIMEOUT)
+            resposta.update(
+                status=504,
+                headers={"content-type": "application/json"},
+                corpo=[b'{"detail":"Tempo limite do item esgotado"}'],
+            )
+        except Exception:  # o ServerErrorMiddleware já respondeu 500 e relança
+            logger.exception("Sub-request %s do batch falhou", item.path)
+
+    corpo = b"".join(resposta["corpo"])
+    tipo = resposta["headers"].get("content-type", "")
+    if not corpo:
+        body = None
+    elif tipo.startswith("application/json"):
+        body = orjson.Fragment(corpo)  # embute o JSON do endpoint sem decodificar de novo
+    else:
+        body = corpo.decode("utf-8", "replace")
+
+    return {
+        "id": item.id,
+        "status": resposta["status"],
+        "headers": {nome: valor for nome, valor in resposta["headers"].items() if nome in HEADERS_RESPOSTA},
+        "body": body,
+    }
+
+
+@router.post("", response_model=BatchResponse)
+async def batch(
+    dados: BatchRequest,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Executa vários GETs em um request (ex.: /auth/me, dashboard, contadores e a
+    primeira página de contas no login). Cada item tem seu próprio status.
+    """
+    # Libera a conexão usada na autenticação; o usuário segue carregado (desanexado)
+    await db.close()
+
+    semaforo = asyncio.Semaphore(settings.BATCH_CONCORRENCIA)
+    marcador = usuario_autenticado.set(current_user)
+    try:
+        # As tarefas copiam o contexto atual, com o usuário autenticado
+        respostas = await asyncio.gather(*(executar_item(request, item, semaforo) for item in dados.requests))
+    finally:
+        usuario_autenticado.reset(marcador)
+
+    return OrjsonResponse({"responses": respostas})
@@ -1,21 +1,49 @@
 # app/routers/cadastro_geral.py
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from typing import List, Optional, Union
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_, func
+from sqlalchemy import (
+    select, and_, or_, func, cast, null, literal, literal_column, union_all, Integer, String,
+)
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.user import User
 from app.models.cadastro_geral import CadastroGeral
 from app.routers.auth import get_current_user
+from app.core.config import settings
+from app.core.etag import etag_lista, verificar_etag_registro
+from app.core.respostas import negociar_formato
+from app.core.sincronizacao import buscar_alteracoes
+from app.core.tempo_limite import timeout_sql
 from app.schemas.cadastro_geral import (
     CadastroGeralCreate,
     CadastroGeralUpdate,
     CadastroGeralResponse,
     CadastroGeralListItem,
+    CadastroGeralFacetas,
+    CadastroGeralListFacetada,
+    CadastroGeralAlteracoes,
+)
+
+router = APIRouter(
+    prefix="/cadastros-gerais",
+    tags=["Cadastros Gerais"],
+    dependencies=[Depends(timeout_sql("interativo"))],
 )
 
-router = APIRouter(prefix="/cadastros-gerais", tags=["Cadastros Gerais"])
+TIPOS_CADASTRO = ["FORNECEDOR", "CLIENTE", "USUARIO", "OUTROS"]
+STATUS_CADASTRO = ["ATIVO", "INATIVO"]
+
+# Colunas usadas na listagem (mesmas de CadastroGeralListItem)
+COLUNAS_LISTAGEM = (
+    CadastroGeral.codcad,
+    CadastroGeral.nomcad,
+    CadastroGeral.tipcad,
+    CadastroGeral.doccad,
+    CadastroGeral.telcad,
+    CadastroGeral.emacad,
+    CadastroGeral.statcad,
+)
 
 
 def assert_same_tenant_cadastro(user: User, cadastro: CadastroGeral):
@@ -94,46 +122,55 @@ async def create_cadastro_geral(
     return novo_cadastro
 
 
-@router.get("", response_model=List[CadastroGeralListItem])
+@router.get(
+    "",
+    response_model=Union[List[CadastroGeralListItem], CadastroGeralListFacetada],
+    dependencies=[Depends(negociar_formato)],
+)
 async def list_cadastros_gerais(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
     tipo: Optional[str] = Query(None, description="Filtrar por tipo (FORNECEDOR, CLIENTE, USUARIO, OUTROS)"),
     status: Optional[str] = Query(None, description="Filtrar por status (ATIVO, INATIVO)"),
     busca: Optional[str] = Query(None, description="Buscar por nome ou documento"),
+    include: Optional[str] = Query(None, description="Use 'facets' para incluir contadores por tipo e status"),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=500),
+    etag: str = Depends(etag_lista("rfe022cad")),  # 304 antes da query
 ):
     """Listar cadastros gerais com filtros"""
     
-    # Base query
-    query = select(CadastroGeral)
-    
-    # Filtro por tenant
+    # Filtros de tenant e busca (valem para a lista e para as facetas)
+    filtros_base = []
     if not current_user.issuper:
-        query = query.where(
+        filtros_base.append(
             and_(
                 CadastroGeral.codemp == current_user.codemp,
                 CadastroGeral.codfil == current_user.codfil
             )
         )
     
-    # Filtros opcionais
-    if tipo:
-        query = query.where(CadastroGeral.tipcad == tipo)
-    
-    if status:
-        query = query.where(CadastroGeral.statcad == status)
-    
     if busca:
-        query = query.where(
+        filtros_base.append(
             or_(
                 CadastroGeral.nomcad.ilike(f"%{busca}%"),
                 CadastroGeral.doccad.ilike(f"%{busca}%")
             )
         )
     
+    # Filtros opcionais (valem só para a lista)
+    filtros_lista = list(filtros_base)
+    if tipo:
+        filtros_lista.append(CadastroGeral.tipcad == tipo)
+    
+    if status:
+        filtros_lista.append(CadastroGeral.statcad == status)
+    
+    if include == "facets":
+        return await listar_com_facetas(db, filtros_base, filtros_lista, skip, limit)
+    
     # Ordenação e paginação
+    query = select(CadastroGeral).where(*filtros_lista)
     query = query.order_by(CadastroGeral.nomcad)
     query = query.offset(skip).limit(limit)
     
@@ -143,14 +180,99 @@ async def list_cadastros_gerais(
     return cadastros
 
 
+async def listar_com_facetas(
+    db: AsyncSession,
+    filtros_base: list,
+    filtros_lista: list,
+    skip: int,
+    limit: int,
+) -> CadastroGeralListFacetada:
+    """
+    Retorna a página e os contadores por tipcad/statcad em uma única query.
+    
+    A página e as facetas (GROUPING SETS) são unidas com UNION ALL; a coluna
+    "origem" separa as linhas na volta. As facetas ignoram os filtros de
+    tipo/status para que a tela continue mostrando todos os totais.
+    """
+    pagina = (
+        select(
+            *COLUNAS_LISTAGEM,
+            cast(null(), Integer).label("total"),
+            func.row_number().over(order_by=CadastroGeral.nomcad).label("ordem"),
+            literal("ITEM").label("origem"),
+        )
+        .where(*filtros_lista)
+        .order_by(CadastroGeral.nomcad)
+        .offset(skip)
+        .limit(limit)
+        .subquery("pagina")
+    )
+    
+    facetas = (
+        select(
+            cast(null(), Integer).label("codcad"),
+            cast(null(), String).label("nomcad"),
+            CadastroGeral.tipcad,
+            cast(null(), String).label("doccad"),
+            cast(null(), String).label("telcad"),
+            cast(null(), String).label("emacad"),
+            CadastroGeral.statcad,
+            func.count().label("total"),
+            cast(null(), Integer).label("ordem"),
+            literal("FACETA").label("origem"),
+        )
+        .where(*filtros_base)
+        .group_by(func.grouping_sets(CadastroGeral.tipcad, CadastroGeral.statcad))
+    )
+    
+    query = union_all(select(pagina), facetas).order_by(literal_column("ordem"))
+    result = await db.execute(query)
+    
+    items = []
+    contadores = CadastroGeralFacetas(
+        tipcad={tipo: 0 for tipo in TIPOS_CADASTRO},
+        statcad={status_cad: 0 for status_cad in STATUS_CADASTRO},
+    )
+    for row in result.all():
+        if row.origem == "ITEM":
+            items.append(CadastroGeralListItem.model_validate(row))
+        elif row.tipcad is not None:
+            contadores.tipcad[row.tipcad] = row.total
+        else:
+            contadores.statcad[row.statcad] = row.total
+    
+    return CadastroGeralListFacetada(items=items, facetas=contadores)
+
+
+@router.get("/changes", response_model=CadastroGeralAlteracoes)
+async def changes_cadastros_gerais(
+    since: Optional[str] = Query(None, description="Token da última sincronização (vazio: carga inicial)"),
+    limit: int = Query(500, ge=1, le=settings.SYNC_LIMITE_MAXIMO),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Alterações desde o token: cadastros criados/alterados e chaves excluídas"""
+    alteracoes = await buscar_alteracoes(db, CadastroGeral, "codcad", current_user, since, limit)
+    
+    return CadastroGeralAlteracoes(
+        upserts=[CadastroGeralResponse.model_validate(cadastro) for (cadastro,) in alteracoes["linhas"]],
+        excluidos=alteracoes["excluidos"],
+        token=alteracoes["token"],
+        tem_mais=alteracoes["tem_mais"],
+    )
+
+
 @router.get("/{codcad}", response_model=CadastroGeralResponse)
 async def get_cadastro_geral(
     codcad: int,
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """Buscar cadastro geral por ID"""
     cadastro = await get_cadastro_or_404(codcad, db, current_user)
+    verificar_etag_registro(request, response, "rfe022cad", codcad, cadastro.datalt, cadastro.datcri)
     return cadastro
 
 
@@ -229,7 +351,7 @@ async def get_cadastros_counts_by_tipo(
     counts_dict = {row.tipcad: row.total for row in counts}
     
     # Garante que todos os tipos estejam presentes
-    for tipo in ["FORNECEDOR", "CLIENTE", "USUARIO", "OUTROS"]:
+    for tipo in TIPOS_CADASTRO:
         if tipo not in counts_dict:
             counts_dict[tipo] = 0
     
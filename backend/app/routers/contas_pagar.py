@@ -1,22 +1,31 @@
 # app/routers/contas_pagar.py
 from typing import List, Optional
 from datetime import date, timedelta
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_, func
+from sqlalchemy import select, update, and_, or_, func
 from decimal import Decimal
 import uuid
 
-from app.database import get_db
+from app.database import get_db, get_read_db, fabrica_leitura
 from app.models.user import User
 from app.models.contas_pagar import ContaPagar
 from app.models.pessoa import Pessoa
 from app.models.cadastro_geral import CadastroGeral
 from app.routers.auth import get_current_user
+from app.core.config import settings
+from app.core.etag import etag_lista, verificar_etag_registro
+from app.core.eventos import publicar_evento
+from app.core.exportacao import exportar, FormatoExportacao
+from app.core.limites_tenant import limite_tenant
+from app.core.respostas import negociar_formato
+from app.core.sincronizacao import buscar_alteracoes
+from app.core.tempo_limite import timeout_sql
 from app.schemas.contas_pagar import (
     ContaPagarCreate,
     ContaPagarUpdate,
     ContaPagarResponse,
+    ContaPagarAlteracoes,
     ContaPagarResponseComNome,
     ContaPagarBaixa,
     ContaPagarParcelamento,
@@ -24,7 +33,11 @@ from app.schemas.contas_pagar import (
     ContaPagarCancelamento,
 )
 
-router = APIRouter(prefix="/contas-pagar", tags=["Contas a Pagar"])
+router = APIRouter(
+    prefix="/contas-pagar",
+    tags=["Contas a Pagar"],
+    dependencies=[Depends(timeout_sql("interativo"))],
+)
 
 
 def assert_same_tenant_conta(user: User, conta: ContaPagar):
@@ -67,6 +80,57 @@ async def get_conta_or_404(
     return conta
 
 
+async def recarregar_contas(db: AsyncSession, contas: List[ContaPagar]) -> List[ContaPagar]:
+    """Recarrega contas recém-criadas (valores do servidor, ex.: datcri) com um único SELECT"""
+    codigos = [conta.codcap for conta in contas]
+    result = await db.execute(
+        select(ContaPagar)
+        .where(ContaPagar.codcap.in_(codigos))
+        .order_by(ContaPagar.numpar)
+        .execution_options(populate_existing=True)
+    )
+    return list(result.scalars().all())
+
+
+def aplicar_filtros_listagem(
+    query,
+    current_user: User,
+    codfor: Optional[int] = None,
+    statcap: Optional[str] = None,
+    catcap: Optional[str] = None,
+    datven_inicio: Optional[date] = None,
+    datven_fim: Optional[date] = None,
+):
+    """Aplica tenant e filtros opcionais da listagem (usado também na exportação)"""
+    
+    # Filtro de tenant (superadmin vê tudo)
+    if not current_user.issuper:
+        query = query.where(
+            and_(
+                ContaPagar.codemp == current_user.codemp,
+                ContaPagar.codfil == current_user.codfil
+            )
+        )
+    
+    # Filtros opcionais
+    if codfor:
+        query = query.where(ContaPagar.codfor == codfor)
+    
+    if statcap:
+        query = query.where(ContaPagar.statcap == statcap)
+    
+    if catcap:
+        query = query.where(ContaPagar.catcap == catcap)
+    
+    if datven_inicio:
+        query = query.where(ContaPagar.datven >= datven_inicio)
+    
+    if datven_fim:
+        query = query.where(ContaPagar.datven <= datven_fim)
+    
+    return query
+
+
 # ========== CRUD ==========
 
 @router.post("", response_model=ContaPagarResponse, status_code=status.HTTP_201_CREATED)
@@ -122,13 +186,19 @@ async def create_conta_pagar(
     )
     
     db.add(nova_conta)
+    await db.flush()  # gera o codcap para o evento
+    await publicar_evento(db, nova_conta.codemp, nova_conta.codfil, "contas_pagar", "criada", [nova_conta.codcap])
     await db.commit()
     await db.refresh(nova_conta)
     
     return nova_conta
 
 
-@router.get("", response_model=List[ContaPagarResponseComNome])
+@router.get(
+    "",
+    response_model=List[ContaPagarResponseComNome],
+    dependencies=[Depends(negociar_formato), Depends(limite_tenant("listagem"))],
+)
 async def list_contas_pagar(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=500),
@@ -137,8 +207,9 @@ async def list_contas_pagar(
     catcap: Optional[str] = None,
     datven_inicio: Optional[date] = None,
     datven_fim: Optional[date] = None,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
+    etag: str = Depends(etag_lista("rfe020cap", "rfe010pes")),  # 304 antes da query
 ):
     """Listar contas a pagar com filtros (inclui nome do fornecedor)"""
     
@@ -146,31 +217,9 @@ async def list_contas_pagar(
     query = select(ContaPagar, Pessoa.nompes).join(
         Pessoa, ContaPagar.codfor == Pessoa.codpes, isouter=True
     )
-    
-    # Filtro de tenant (superadmin vê tudo)
-    if not current_user.issuper:
-        query = query.where(
-            and_(
-                ContaPagar.codemp == current_user.codemp,
-                ContaPagar.codfil == current_user.codfil
-            )
-        )
-    
-    # Filtros opcionais
-    if codfor:
-        query = query.where(ContaPagar.codfor == codfor)
-    
-    if statcap:
-        query = query.where(ContaPagar.statcap == statcap)
-    
-    if catcap:
-        query = query.where(ContaPagar.catcap == catcap)
-    
-    if datven_inicio:
-        query = query.where(ContaPagar.datven >= datven_inicio)
-    
-    if datven_fim:
-        query = query.where(ContaPagar.datven <= datven_fim)
+    query = aplicar_filtros_listagem(
+        query, current_user, codfor, statcap, catcap, datven_inicio, datven_fim
+    )
     
     # Ordenação por vencimento
     query = query.order_by(ContaPagar.datven.desc())
@@ -191,14 +240,83 @@ async def list_contas_pagar(
     return contas_com_nome
 
 
+@router.get("/changes", response_model=ContaPagarAlteracoes)
+async def changes_contas_pagar(
+    since: Optional[str] = Query(None, description="Token da última sincronização (vazio: carga inicial)"),
+    limit: int = Query(500, ge=1, le=settings.SYNC_LIMITE_MAXIMO),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Alterações desde o token: contas criadas/alteradas e chaves excluídas"""
+    query = select(ContaPagar, Pessoa.nompes).join(
+        Pessoa, ContaPagar.codfor == Pessoa.codpes, isouter=True
+    )
+    alteracoes = await buscar_alteracoes(db, ContaPagar, "codcap", current_user, since, limit, query)
+    
+    upserts = []
+    for conta, nomfor in alteracoes["linhas"]:
+        conta_dict = {
+            **{k: v for k, v in conta.__dict__.items() if not k.startswith('_')},
+            'nomfor': nomfor
+        }
+        upserts.append(ContaPagarResponseComNome(**conta_dict))
+    
+    return ContaPagarAlteracoes(
+        upserts=upserts,
+        excluidos=alteracoes["excluidos"],
+        token=alteracoes["token"],
+        tem_mais=alteracoes["tem_mais"],
+    )
+
+
+@router.get("/export", dependencies=[Depends(limite_tenant("exportacao"))])
+async def export_contas_pagar(
+    request: Request,
+    formato: FormatoExportacao = Query("csv", description="csv ou xlsx"),
+    codfor: Optional[int] = None,
+    statcap: Optional[str] = None,
+    catcap: Optional[str] = None,
+    datven_inicio: Optional[date] = None,
+    datven_fim: Optional[date] = None,
+    current_user: User = Depends(get_current_user),
+):
+    """Exportar contas a pagar (CSV/XLSX em streaming, mesmos filtros da listagem)"""
+    
+    # Seleciona colunas (não entidades) para não encher o identity map
+    query = select(
+        ContaPagar.codcap,
+        ContaPagar.codfor,
+        Pessoa.nompes.label("nomfor"),
+        ContaPagar.vlrcap,
+        ContaPagar.datven,
+        ContaPagar.datpag,
+        ContaPagar.statcap,
+        ContaPagar.catcap,
+        ContaPagar.forpag,
+        ContaPagar.numpar,
+        ContaPagar.totpar,
+        ContaPagar.numdoc,
+        ContaPagar.obscap,
+    ).join(Pessoa, ContaPagar.codfor == Pessoa.codpes, isouter=True)
+    query = aplicar_filtros_listagem(
+        query, current_user, codfor, statcap, catcap, datven_inicio, datven_fim
+    )
+    query = query.order_by(ContaPagar.datven.desc(), ContaPagar.codcap)
+    
+    return exportar(query, formato, "contas_pagar", fabrica=fabrica_leitura(request))
+
+
 @router.get("/{codcap}", response_model=ContaPagarResponse)
 async def get_conta_pagar(
     codcap: int,
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """Obter uma conta a pagar específica"""
     conta = await get_conta_or_404(codcap, db, current_user)
+    verificar_etag_registro(request, response, "rfe020cap", codcap, conta.datalt, conta.datcri)
     return conta
 
 
@@ -227,6 +345,7 @@ async def update_conta_pagar(
     
     conta.usualt = current_user.codusu
     
+    await publicar_evento(db, conta.codemp, conta.codfil, "contas_pagar", "alterada", [conta.codcap])
     await db.commit()
     await db.refresh(conta)
     
@@ -249,6 +368,7 @@ async def delete_conta_pagar(
             detail="Não é possível deletar conta já paga. Cancele-a se necessário."
         )
     
+    await publicar_evento(db, conta.codemp, conta.codfil, "contas_pagar", "excluida", [conta.codcap])
     await db.delete(conta)
     await db.commit()
     
@@ -293,6 +413,7 @@ async def baixar_conta_pagar(
     
     conta.usualt = current_user.codusu
     
+    await publicar_evento(db, conta.codemp, conta.codfil, "contas_pagar", "baixada", [conta.codcap])
     await db.commit()
     await db.refresh(conta)
     
@@ -369,19 +490,21 @@ async def parcelar_conta_pagar(
         db.add(nova_conta)
         contas_criadas.append(nova_conta)
     
+    await db.flush()
+    await publicar_evento(
+        db, current_user.codemp, current_user.codfil, "contas_pagar", "parcelada",
+        [conta.codcap for conta in contas_criadas],
+    )
     await db.commit()
     
-    # Refresh todas as contas
-    for conta in contas_criadas:
-        await db.refresh(conta)
-    
-    return contas_criadas
+    # Recarrega todas as parcelas em uma única query (em vez de um refresh por conta)
+    return await recarregar_contas(db, contas_criadas)
 
 
 @router.get("/grupo/{codgrp}", response_model=List[ContaPagarResponseComNome])
 async def list_parcelas_grupo(
     codgrp: str,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
     """Listar todas as parcelas de um grupo de parcelamento"""
@@ -482,13 +605,15 @@ async def reparcelar_conta_pagar(
         db.add(nova_conta)
         contas_criadas.append(nova_conta)
     
+    await db.flush()
+    await publicar_evento(
+        db, current_user.codemp, current_user.codfil, "contas_pagar", "reparcelada",
+        [codcap] + [conta.codcap for conta in contas_criadas],
+    )
     await db.commit()
     
-    # Refresh todas as contas
-    for conta in contas_criadas:
-        await db.refresh(conta)
-    
-    return contas_criadas
+    # Recarrega todas as parcelas em uma única query (em vez de um refresh por conta)
+    return await recarregar_contas(db, contas_criadas)
 
 
 # ========== CANCELAMENTO ==========
@@ -522,6 +647,7 @@ async def cancelar_conta_pagar(
     conta.obscap = f"{obs_anterior}\n[CANCELADO] {payload.motivo}".strip()
     conta.usualt = current_user.codusu
     
+    await publicar_evento(db, conta.codemp, conta.codfil, "contas_pagar", "cancelada", [conta.codcap])
     await db.commit()
     await db.refresh(conta)
     
@@ -530,39 +656,46 @@ async def cancelar_conta_pagar(
 
 # ========== ATUALIZAÇÃO DE STATUS (Automático para vencidas) ==========
 
-@router.post("/atualizar-vencidas", response_model=dict)
+async def marcar_contas_vencidas(
+    db: AsyncSession,
+    hoje: date,
+    codemp: Optional[int] = None,
+    codfil: Optional[int] = None,
+) -> int:
+    """A_PAGAR -> VENCIDO com um único UPDATE (também usado pelo agendador, sem tenant)"""
+    stmt = update(ContaPagar).where(
+        ContaPagar.statcap == "A_PAGAR",
+        ContaPagar.datven < hoje
+    )
+    if codemp is not None:
+        stmt = stmt.where(ContaPagar.codemp == codemp, ContaPagar.codfil == codfil)
+    
+    result = await db.execute(stmt.values(statcap="VENCIDO").execution_options(synchronize_session=False))
+    return result.rowcount
+
+
+@router.post(
+    "/atualizar-vencidas",
+    response_model=dict,
+    dependencies=[Depends(limite_tenant("atualizar_vencidas")), Depends(timeout_sql("lote"))],
+)
 async def atualizar_contas_vencidas(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """Atualiza status de contas vencidas (A_PAGAR -> VENCIDO)"""
     
-    hoje = date.today()
-    
-    query = select(ContaPagar).where(
-        and_(
-            ContaPagar.statcap == "A_PAGAR",
-            ContaPagar.datven < hoje
-        )
-    )
-    
-    # Filtro de tenant
-    if not current_user.issuper:
-        query = query.where(
-            and_(
-                ContaPagar.codemp == current_user.codemp,
-                ContaPagar.codfil == current_user.codfil
-            )
-        )
-    
-    result = await db.execute(query)
-    contas_vencidas = result.scalars().all()
-    
-    count = 0
-    for conta in contas_vencidas:
-        conta.statcap = "VENCIDO"
-        count += 1
-    
+    # Superadmin atualiza todos os tenants
+    if current_user.issuper:
+        count = await marcar_contas_vencidas(db, date.today())
+    else:
+        count = await marcar_contas_vencidas(db, date.today(), current_user.codemp, current_user.codfil)
+    
+    if count:
+        if current_user.issuper:
+            await publicar_evento(db, None, None, "contas_pagar", "vencidas")
+        else:
+            await publicar_evento(db, current_user.codemp, current_user.codfil, "contas_pagar", "vencidas")
     await db.commit()
     
     return {"message": f"{count} contas atualizadas para VENCIDO"}
@@ -1,22 +1,31 @@
 # app/routers/contas_receber.py
 from typing import List, Optional
 from datetime import date, timedelta
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_, func
+from sqlalchemy import select, update, and_, or_, func
 from decimal import Decimal
 import uuid
 
-from app.database import get_db
+from app.database import get_db, get_read_db, fabrica_leitura
 from app.models.user import User
 from app.models.contas_receber import ContaReceber
 from app.models.pessoa import Pessoa
 from app.models.cadastro_geral import CadastroGeral
 from app.routers.auth import get_current_user
+from app.core.config import settings
+from app.core.etag import etag_lista, verificar_etag_registro
+from app.core.eventos import publicar_evento
+from app.core.exportacao import exportar, FormatoExportacao
+from app.core.limites_tenant import limite_tenant
+from app.core.respostas import negociar_formato
+from app.core.sincronizacao import buscar_alteracoes
+from app.core.tempo_limite import timeout_sql
 from app.schemas.contas_receber import (
     ContaReceberCreate,
     ContaReceberUpdate,
     ContaReceberResponse,
+    ContaReceberAlteracoes,
     ContaReceberResponseComNome,
     ContaReceberBaixa,
     ContaReceberParcelamento,
@@ -24,7 +33,11 @@ from app.schemas.contas_receber import (
     ContaReceberCancelamento,
 )
 
-router = APIRouter(prefix="/contas-receber", tags=["Contas a Receber"])
+router = APIRouter(
+    prefix="/contas-receber",
+    tags=["Contas a Receber"],
+    dependencies=[Depends(timeout_sql("interativo"))],
+)
 
 
 def assert_same_tenant_conta(user: User, conta: ContaReceber):
@@ -67,6 +80,57 @@ async def get_conta_or_404(
     return conta
 
 
+async def recarregar_contas(db: AsyncSession, contas: List[ContaReceber]) -> List[ContaReceber]:
+    """Recarrega contas recém-criadas (valores do servidor, ex.: datcri) com um único SELECT"""
+    codigos = [conta.codcar for conta in contas]
+    result = await db.execute(
+        select(ContaReceber)
+        .where(ContaReceber.codcar.in_(codigos))
+        .order_by(ContaReceber.numpar)
+        .execution_options(populate_existing=True)
+    )
+    return list(result.scalars().all())
+
+
+def aplicar_filtros_listagem(
+    query,
+    current_user: User,
+    codcli: Optional[int] = None,
+    statcar: Optional[str] = None,
+    catcar: Optional[str] = None,
+    datven_inicio: Optional[date] = None,
+    datven_fim: Optional[date] = None,
+):
+    """Aplica tenant e filtros opcionais da listagem (usado também na exportação)"""
+    
+    # Filtro de tenant (superadmin vê tudo)
+    if not current_user.issuper:
+        query = query.where(
+            and_(
+                ContaReceber.codemp == current_user.codemp,
+                ContaReceber.codfil == current_user.codfil
+            )
+        )
+    
+    # Filtros opcionais
+    if codcli:
+        query = query.where(ContaReceber.codcli == codcli)
+    
+    if statcar:
+        query = query.where(ContaReceber.statcar == statcar)
+    
+    if catcar:
+        query = query.where(ContaReceber.catcar == catcar)
+    
+    if datven_inicio:
+        query = query.where(ContaReceber.datven >= datven_inicio)
+    
+    if datven_fim:
+        query = query.where(ContaReceber.datven <= datven_fim)
+    
+    return query
+
+
 # ========== CRUD ==========
 
 @router.post("", response_model=ContaReceberResponse, status_code=status.HTTP_201_CREATED)
@@ -122,13 +186,19 @@ async def create_conta_receber(
     )
     
     db.add(nova_conta)
+    await db.flush()  # gera o codcar para o evento
+    await publicar_evento(db, nova_conta.codemp, nova_conta.codfil, "contas_receber", "criada", [nova_conta.codcar])
     await db.commit()
     await db.refresh(nova_conta)
     
     return nova_conta
 
 
-@router.get("", response_model=List[ContaReceberResponseComNome])
+@router.get(
+    "",
+    response_model=List[ContaReceberResponseComNome],
+    dependencies=[Depends(negociar_formato), Depends(limite_tenant("listagem"))],
+)
 async def list_contas_receber(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=500),
@@ -137,8 +207,9 @@ async def list_contas_receber(
     catcar: Optional[str] = None,
     datven_inicio: Optional[date] = None,
     datven_fim: Optional[date] = None,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
+    etag: str = Depends(etag_lista("rfe021car", "rfe010pes")),  # 304 antes da query
 ):
     """Listar contas a receber com filtros (inclui nome do cliente)"""
     
@@ -146,31 +217,9 @@ async def list_contas_receber(
     query = select(ContaReceber, Pessoa.nompes).join(
         Pessoa, ContaReceber.codcli == Pessoa.codpes, isouter=True
     )
-    
-    # Filtro de tenant (superadmin vê tudo)
-    if not current_user.issuper:
-        query = query.where(
-            and_(
-                ContaReceber.codemp == current_user.codemp,
-                ContaReceber.codfil == current_user.codfil
-            )
-        )
-    
-    # Filtros opcionais
-    if codcli:
-        query = query.where(ContaReceber.codcli == codcli)
-    
-    if statcar:
-        query = query.where(ContaReceber.statcar == statcar)
-    
-    if catcar:
-        query = query.where(ContaReceber.catcar == catcar)
-    
-    if datven_inicio:
-        query = query.where(ContaReceber.datven >= datven_inicio)
-    
-    if datven_fim:
-        query = query.where(ContaReceber.datven <= datven_fim)
+    query = aplicar_filtros_listagem(
+        query, current_user, codcli, statcar, catcar, datven_inicio, datven_fim
+    )
     
     # Ordenação por vencimento
     query = query.order_by(ContaReceber.datven.desc())
@@ -191,14 +240,83 @@ async def list_contas_receber(
     return contas_com_nome
 
 
+@router.get("/changes", response_model=ContaReceberAlteracoes)
+async def changes_contas_receber(
+    since: Optional[str] = Query(None, description="Token da última sincronização (vazio: carga inicial)"),
+    limit: int = Query(500, ge=1, le=settings.SYNC_LIMITE_MAXIMO),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Alterações desde o token: contas criadas/alteradas e chaves excluídas"""
+    query = select(ContaReceber, Pessoa.nompes).join(
+        Pessoa, ContaReceber.codcli == Pessoa.codpes, isouter=True
+    )
+    alteracoes = await buscar_alteracoes(db, ContaReceber, "codcar", current_user, since, limit, query)
+    
+    upserts = []
+    for conta, nomcli in alteracoes["linhas"]:
+        conta_dict = {
+            **{k: v for k, v in conta.__dict__.items() if not k.startswith('_')},
+            'nomcli': nomcli
+        }
+        upserts.append(ContaReceberResponseComNome(**conta_dict))
+    
+    return ContaReceberAlteracoes(
+        upserts=upserts,
+        excluidos=alteracoes["excluidos"],
+        token=alteracoes["token"],
+        tem_mais=alteracoes["tem_mais"],
+    )
+
+
+@router.get("/export", dependencies=[Depends(limite_tenant("exportacao"))])
+async def export_contas_receber(
+    request: Request,
+    formato: FormatoExportacao = Query("csv", description="csv ou xlsx"),
+    codcli: Optional[int] = None,
+    statcar: Optional[str] = None,
+    catcar: Optional[str] = None,
+    datven_inicio: Optional[date] = None,
+    datven_fim: Optional[date] = None,
+    current_user: User = Depends(get_current_user),
+):
+    """Exportar contas a receber (CSV/XLSX em streaming, mesmos filtros da listagem)"""
+    
+    # Seleciona colunas (não entidades) para não encher o identity map
+    query = select(
+        ContaReceber.codcar,
+        ContaReceber.codcli,
+        Pessoa.nompes.label("nomcli"),
+        ContaReceber.vlrcar,
+        ContaReceber.datven,
+        ContaReceber.datrec,
+        ContaReceber.statcar,
+        ContaReceber.catcar,
+        ContaReceber.forrec,
+        ContaReceber.numpar,
+        ContaReceber.totpar,
+        ContaReceber.numdoc,
+        ContaReceber.obscar,
+    ).join(Pessoa, ContaReceber.codcli == Pessoa.codpes, isouter=True)
+    query = aplicar_filtros_listagem(
+        query, current_user, codcli, statcar, catcar, datven_inicio, datven_fim
+    )
+    query = query.order_by(ContaReceber.datven.desc(), ContaReceber.codcar)
+    
+    return exportar(query, formato, "contas_receber", fabrica=fabrica_leitura(request))
+
+
 @router.get("/{codcar}", response_model=ContaReceberResponse)
 async def get_conta_receber(
     codcar: int,
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """Obter uma conta a receber específica"""
     conta = await get_conta_or_404(codcar, db, current_user)
+    verificar_etag_registro(request, response, "rfe021car", codcar, conta.datalt, conta.datcri)
     return conta
 
 
@@ -227,6 +345,7 @@ async def update_conta_receber(
     
     conta.usualt = current_user.codusu
     
+    await publicar_evento(db, conta.codemp, conta.codfil, "contas_receber", "alterada", [conta.codcar])
     await db.commit()
     await db.refresh(conta)
     
@@ -249,6 +368,7 @@ async def delete_conta_receber(
             detail="Não é possível deletar conta já recebida. Cancele-a se necessário."
         )
     
+    await publicar_evento(db, conta.codemp, conta.codfil, "contas_receber", "excluida", [conta.codcar])
     await db.delete(conta)
     await db.commit()
     
@@ -293,6 +413,7 @@ async def baixar_conta_receber(
     
     conta.usualt = current_user.codusu
     
+    await publicar_evento(db, conta.codemp, conta.codfil, "contas_receber", "baixada", [conta.codcar])
     await db.commit()
     await db.refresh(conta)
     
@@ -345,13 +466,15 @@ async def parcelar_conta_receber(
         db.add(nova_conta)
         contas_criadas.append(nova_conta)
     
+    await db.flush()
+    await publicar_evento(
+        db, current_user.codemp, current_user.codfil, "contas_receber", "parcelada",
+        [conta.codcar for conta in contas_criadas],
+    )
     await db.commit()
     
-    # Refresh todas as contas
-    for conta in contas_criadas:
-        await db.refresh(conta)
-    
-    return contas_criadas
+    # Recarrega todas as parcelas em uma única query (em vez de um refresh por conta)
+    return await recarregar_contas(db, contas_criadas)
 
 
 @router.post("/{codcar}/reparcelar", response_model=List[ContaReceberResponse])
@@ -412,13 +535,15 @@ async def reparcelar_conta_receber(
         db.add(nova_conta)
         contas_criadas.append(nova_conta)
     
+    await db.flush()
+    await publicar_evento(
+        db, current_user.codemp, current_user.codfil, "contas_receber", "reparcelada",
+        [codcar] + [conta.codcar for conta in contas_criadas],
+    )
     await db.commit()
     
-    # Refresh todas as contas
-    for conta in contas_criadas:
-        await db.refresh(conta)
-    
-    return contas_criadas
+    # Recarrega todas as parcelas em uma única query (em vez de um refresh por conta)
+    return await recarregar_contas(db, contas_criadas)
 
 
 # ========== CANCELAMENTO ==========
@@ -452,6 +577,7 @@ async def cancelar_conta_receber(
     conta.obscar = f"{obs_anterior}\n[CANCELADO] {payload.motivo}".strip()
     conta.usualt = current_user.codusu
     
+    await publicar_evento(db, conta.codemp, conta.codfil, "contas_receber", "cancelada", [conta.codcar])
     await db.commit()
     await db.refresh(conta)
     
@@ -460,39 +586,46 @@ async def cancelar_conta_receber(
 
 # ========== ATUALIZAÇÃO DE STATUS (Automático para vencidas) ==========
 
-@router.post("/atualizar-vencidas", response_model=dict)
+async def marcar_contas_vencidas(
+    db: AsyncSession,
+    hoje: date,
+    codemp: Optional[int] = None,
+    codfil: Optional[int] = None,
+) -> int:
+    """A_RECEBER -> VENCIDO com um único UPDATE (também usado pelo agendador, sem tenant)"""
+    stmt = update(ContaReceber).where(
+        ContaReceber.statcar == "A_RECEBER",
+        ContaReceber.datven < hoje
+    )
+    if codemp is not None:
+        stmt = stmt.where(ContaReceber.codemp == codemp, ContaReceber.codfil == codfil)
+    
+    result = await db.execute(stmt.values(statcar="VENCIDO").execution_options(synchronize_session=False))
+    return result.rowcount
+
+
+@router.post(
+    "/atualizar-vencidas",
+    response_model=dict,
+    dependencies=[Depends(limite_tenant("atualizar_vencidas")), Depends(timeout_sql("lote"))],
+)
 async def atualizar_contas_vencidas(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """Atualiza status de contas vencidas (A_RECEBER -> VENCIDO)"""
     
-    hoje = date.today()
-    
-    query = select(ContaReceber).where(
-        and_(
-            ContaReceber.statcar == "A_RECEBER",
-            ContaReceber.datven < hoje
-        )
-    )
-    
-    # Filtro de tenant
-    if not current_user.issuper:
-        query = query.where(
-            and_(
-                ContaReceber.codemp == current_user.codemp,
-                ContaReceber.codfil == current_user.codfil
-            )
-        )
-    
-    result = await db.execute(query)
-    contas_vencidas = result.scalars().all()
-    
-    count = 0
-    for conta in contas_vencidas:
-        conta.statcar = "VENCIDO"
-        count += 1
-    
+    # Superadmin atualiza todos os tenants
+    if current_user.issuper:
+        count = await marcar_contas_vencidas(db, date.today())
+    else:
+        count = await marcar_contas_vencidas(db, date.today(), current_user.codemp, current_user.codfil)
+    
+    if count:
+        if current_user.issuper:
+            await publicar_evento(db, None, None, "contas_receber", "vencidas")
+        else:
+            await publicar_evento(db, current_user.codemp, current_user.codfil, "contas_receber", "vencidas")
     await db.commit()
     
     return {"message": f"{count} contas atualizadas para VENCIDO"}
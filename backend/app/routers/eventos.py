@@ -0,0 +1,111 @@
+# app/routers/eventos.py
+"""
+Eventos em tempo real por tenant (substitui o polling do dashboard e das listas).
+
+- GET /eventos/stream: Server-Sent Events (EventSource)
+- WebSocket /eventos/ws
+
+EventSource e WebSocket do navegador não enviam header Authorization: o JWT
+pode vir em ?token=. A sessão do banco é usada só na autenticação e fechada em
+seguida, para a conexão longa não ocupar o pool.
+"""
+import asyncio
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from starlette.websockets import WebSocketState
+
+from app.core import eventos
+from app.core.config import settings
+from app.core.respostas import dumps
+from app.database import AsyncSessionLocal
+from app.models.user import User
+from app.routers.auth import usuario_do_token
+
+router = APIRouter(prefix="/eventos", tags=["Eventos"])
+
+
+async def autenticar(authorization: Optional[str], token: Optional[str]) -> User:
+    if not token and authorization and authorization.lower().startswith("bearer "):
+        token = authorization[7:]
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Não autenticado",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    async with AsyncSessionLocal() as db:
+        return await usuario_do_token(token, db)
+
+
+async def gerar_sse(usuario: User):
+    # Inscrição dentro do gerador: se a resposta for cancelada antes de começar
+    # (cliente desistiu, desligamento), nada fica registrado sem o finally
+    cliente = await eventos.inscrever(usuario)
+    try:
+        while True:
+            try:
+                mensagem = await asyncio.wait_for(cliente.fila.get(), timeout=settings.EVENTOS_HEARTBEAT_SEGUNDOS)
+            except asyncio.TimeoutError:
+                yield b": ping\n\n"  # mantém proxies e o EventSource sabendo que a conexão vive
+                continue
+            if mensagem is None:
+                break
+            yield b"event: " + mensagem["evento"].encode() + b"\ndata: " + dumps(mensagem["dados"]) + b"\n\n"
+    finally:
+        eventos.desinscrever(cliente)
+
+
+@router.get("/stream")
+async def stream_eventos(
+    request: Request,
+    token: Optional[str] = Query(None, description="JWT (EventSource não envia Authorization)"),
+):
+    """Eventos do tenant via Server-Sent Events (primeira mensagem: dashboard completo)"""
+    usuario = await autenticar(request.headers.get("authorization"), token)
+    return StreamingResponse(
+        gerar_sse(usuario),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/ws")
+async def websocket_eventos(
+    websocket: WebSocket,
+    token: Optional[str] = Query(None),
+):
+    """Eventos do tenant via WebSocket (mesmas mensagens do /stream, em JSON)"""
+    try:
+        usuario = await autenticar(websocket.headers.get("authorization"), token)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    cliente = await eventos.inscrever(usuario)
+
+    async def aguardar_fechamento():
+        # O cliente não envia nada; receber só serve para detectar o fechamento
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+        cliente.encerrar()
+
+    leitor = asyncio.create_task(aguardar_fechamento())
+    try:
+        while True:
+            mensagem = await cliente.fila.get()
+            if mensagem is None:
+                break
+            await websocket.send_text(dumps(mensagem).decode())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        leitor.cancel()
+        eventos.desinscrever(cliente)
+        if websocket.client_state == WebSocketState.CONNECTED:
+            try:
+                await websocket.close()
+            except RuntimeError:  # fechado pelo cliente no meio do caminho
+                pass
@@ -0,0 +1,297 @@
+# app/routers/importacao.py
+import csv
+import io
+import json
+from itertools import islice
+from typing import AsyncIterator, Iterator, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import select, or_, text
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.database import AsyncSessionLocal, copy_records
+from app.models.user import User
+from app.models.pessoa import Pessoa
+from app.routers.auth import get_current_user
+from app.core.limites_tenant import limite_tenant
+from app.core.tempo_limite import aplicar_timeout
+from app.schemas.cadastro_geral import CadastroGeralCreate
+from app.schemas.contas_pagar import ContaPagarCreate
+from app.schemas.contas_receber import ContaReceberCreate
+
+router = APIRouter(prefix="/importacoes", tags=["Importação"])
+
+# Linhas validadas/gravadas por vez
+IMPORT_CHUNK_SIZE = 5000
+
+TipoImportacao = Literal["cadastros-gerais", "contas-pagar", "contas-receber"]
+
+
+class DestinoImportacao:
+    """Tabela de destino, schema de validação e coluna de pessoa (se houver)"""
+
+    def __init__(self, tabela: str, schema: type[BaseModel], campo_pessoa: Optional[str] = None):
+        self.tabela = tabela
+        self.schema = schema
+        self.campo_pessoa = campo_pessoa
+        # Colunas gravadas: campos do schema + tenant + auditoria
+        self.colunas = list(schema.model_fields) + ["codemp", "codfil", "usucri"]
+
+    @property
+    def campo_documento(self) -> Optional[str]:
+        """Coluna alternativa com CPF/CNPJ da pessoa (docfor / doccli)"""
+        if not self.campo_pessoa:
+            return None
+        return "doc" + self.campo_pessoa[3:]
+
+
+DESTINOS = {
+    "cadastros-gerais": DestinoImportacao("rfe022cad", CadastroGeralCreate),
+    "contas-pagar": DestinoImportacao("rfe020cap", ContaPagarCreate, campo_pessoa="codfor"),
+    "contas-receber": DestinoImportacao("rfe021car", ContaReceberCreate, campo_pessoa="codcli"),
+}
+
+
+# ========== LEITURA DO ARQUIVO ==========
+
+def ler_csv(arquivo, delimitador: Optional[str]) -> Iterator[dict]:
+    """Lê o CSV linha a linha (detecta ';' ou ',' se não informado)"""
+    texto = io.TextIOWrapper(arquivo, encoding="utf-8-sig", newline="")
+    if not delimitador:
+        amostra = texto.readline()
+        delimitador = ";" if amostra.count(";") >= amostra.count(",") else ","
+        texto.seek(0)
+    yield from csv.DictReader(texto, delimiter=delimitador)
+
+
+def ler_xlsx(arquivo) -> Iterator[dict]:
+    """Abre a primeira planilha em modo read_only (linhas carregadas sob demanda)"""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Importação de XLSX requer o pacote openpyxl"
+        )
+
+    return linhas_xlsx(load_workbook(arquivo, read_only=True, data_only=True))
+
+
+def linhas_xlsx(workbook) -> Iterator[dict]:
+    try:
+        linhas = workbook.active.iter_rows(values_only=True)
+        cabecalho = [str(c).strip() if c is not None else "" for c in next(linhas, [])]
+        for valores in linhas:
+            yield dict(zip(cabecalho, valores))
+    finally:
+        workbook.close()
+
+
+def limpar_linha(linha: dict) -> dict:
+    """Remove colunas sem nome e converte células vazias em None"""
+    limpa = {}
+    for chave, valor in linha.items():
+        if not chave:
+            continue
+        if isinstance(valor, str):
+            valor = valor.strip() or None
+        limpa[chave.strip().lower()] = valor
+    return limpa
+
+
+def mensagem_validacao(erro: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in erro.errors())
+
+
+# ========== PIPELINE ==========
+
+async def resolver_pessoas(
+    db,
+    destino: DestinoImportacao,
+    linhas: list[tuple[int, dict]],
+    codemp: int,
+    codfil: int,
+) -> dict[str, int]:
+    """
+    Resolve fornecedor/cliente do chunk inteiro com uma única consulta.
+
+    Aceita o código (codfor/codcli) ou o documento (docfor/doccli, CPF ou CNPJ).
+    Retorna um mapa "cod:<codpes>" / "doc:<documento>" -> codpes.
+    """
+    codigos, documentos = set(), set()
+    for _, linha in linhas:
+        if linha.get(destino.campo_pessoa) is not None:
+            try:
+                codigos.add(int(linha[destino.campo_pessoa]))
+            except (TypeError, ValueError):
+                pass
+        elif linha.get(destino.campo_documento):
+            documentos.add(str(linha[destino.campo_documento]))
+
+    if not codigos and not documentos:
+        return {}
+
+    query = select(Pessoa.codpes, Pessoa.cpfpes, Pessoa.cnppes).where(
+        Pessoa.codemp == codemp,
+        Pessoa.codfil == codfil,
+        or_(
+            Pessoa.codpes.in_(codigos),
+            Pessoa.cpfpes.in_(documentos),
+            Pessoa.cnppes.in_(documentos),
+        ),
+    )
+    result = await db.execute(query)
+
+    mapa = {}
+    for codpes, cpfpes, cnppes in result.all():
+        mapa[f"cod:{codpes}"] = codpes
+        for documento in (cpfpes, cnppes):
+            if documento:
+                mapa[f"doc:{documento}"] = codpes
+    return mapa
+
+
+def validar_linha(
+    destino: DestinoImportacao,
+    linha: dict,
+    pessoas: dict[str, int],
+) -> BaseModel:
+    """Valida a linha no schema do destino, trocando a referência de pessoa pelo codpes"""
+    if destino.campo_pessoa:
+        codigo = linha.get(destino.campo_pessoa)
+        documento = linha.get(destino.campo_documento)
+        if codigo is not None:
+            codpes = pessoas.get(f"cod:{str(codigo).split('.')[0]}")
+        else:
+            codpes = pessoas.get(f"doc:{documento}") if documento else None
+        if codpes is None:
+            raise ValueError(f"{destino.campo_pessoa}: pessoa não encontrada no tenant")
+        linha[destino.campo_pessoa] = codpes
+
+    registro = destino.schema.model_validate(linha)
+
+    numpar = getattr(registro, "numpar", None)
+    totpar = getattr(registro, "totpar", None)
+    if numpar is not None and totpar is not None and numpar > totpar:
+        raise ValueError("numpar: número da parcela não pode ser maior que o total de parcelas")
+
+    return registro
+
+
+async def gravar_chunk(db, destino: DestinoImportacao, registros: list[tuple]) -> None:
+    """COPY para uma tabela temporária e INSERT ... SELECT na tabela final"""
+    staging = f"imp_{destino.tabela}"
+    colunas = ", ".join(destino.colunas)
+
+    await db.execute(text(
+        f"CREATE TEMP TABLE {staging} ON COMMIT DROP AS "
+        f"SELECT {colunas} FROM {destino.tabela} WITH NO DATA"
+    ))
+    await copy_records(db, staging, destino.colunas, registros)
+    await db.execute(text(
+        f"INSERT INTO {destino.tabela} ({colunas}) SELECT {colunas} FROM {staging}"
+    ))
+    await db.commit()
+
+
+def evento(**dados) -> bytes:
+    return (json.dumps(dados, ensure_ascii=False, default=str) + "\n").encode()
+
+
+async def processar_importacao(
+    linhas: Iterator[dict],
+    destino: DestinoImportacao,
+    current_user: User,
+) -> AsyncIterator[bytes]:
+    """Processa o arquivo em chunks, emitindo eventos NDJSON de erro e progresso"""
+    codemp, codfil = current_user.codemp, current_user.codfil
+    lidas = importadas = erros = 0
+
+    async with AsyncSessionLocal() as db:
+        await aplicar_timeout(db, "lote")
+        while True:
+            # A leitura do arquivo é bloqueante: roda fora do event loop
+            chunk = await run_in_threadpool(lambda: list(islice(linhas, IMPORT_CHUNK_SIZE)))
+            if not chunk:
+                break
+
+            numeradas = [(lidas + i + 2, limpar_linha(linha)) for i, linha in enumerate(chunk)]  # +2: cabeçalho
+            lidas += len(chunk)
+
+            pessoas = {}
+            if destino.campo_pessoa:
+                pessoas = await resolver_pessoas(db, destino, numeradas, codemp, codfil)
+
+            registros = []
+            for numero, linha in numeradas:
+                try:
+                    registro = validar_linha(destino, linha, pessoas)
+                except ValidationError as e:
+                    erros += 1
+                    yield evento(evento="erro", linha=numero, erro=mensagem_validacao(e))
+                    continue
+                except ValueError as e:
+                    erros += 1
+                    yield evento(evento="erro", linha=numero, erro=str(e))
+                    continue
+
+                valores = registro.model_dump()
+                registros.append(
+                    tuple(valores[c] for c in destino.schema.model_fields)
+                    + (codemp, codfil, current_user.codusu)
+                )
+
+            if registros:
+                try:
+                    await gravar_chunk(db, destino, registros)
+                    importadas += len(registros)
+                except SQLAlchemyError as e:
+                    await db.rollback()
+                    erros += len(registros)
+                    yield evento(
+                        evento="erro",
+                        linha=f"{numeradas[0][0]}-{numeradas[-1][0]}",
+                        erro=str(getattr(e, "orig", e)),
+                    )
+
+            yield evento(evento="progresso", lidas=lidas, importadas=importadas, erros=erros)
+
+    yield evento(evento="fim", lidas=lidas, importadas=importadas, erros=erros)
+
+
+@router.post("/{tipo}", dependencies=[Depends(limite_tenant("importacao"))])
+async def importar_arquivo(
+    tipo: TipoImportacao,
+    arquivo: UploadFile = File(..., description="Arquivo CSV ou XLSX com cabeçalho"),
+    delimitador: Optional[str] = Query(None, max_length=1, description="Delimitador do CSV (padrão: detecta ';' ou ',')"),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Importa cadastros gerais ou títulos em aberto de um CSV/XLSX
+
+    As colunas seguem os schemas de criação (CadastroGeralCreate, ContaPagarCreate,
+    ContaReceberCreate). Fornecedor/cliente podem vir pelo código (codfor/codcli)
+    ou pelo documento (docfor/doccli). Os dados entram no tenant do usuário.
+
+    A resposta é NDJSON: eventos "erro" (por linha), "progresso" (por chunk) e "fim".
+    """
+    destino = DESTINOS[tipo]
+    nome = (arquivo.filename or "").lower()
+
+    if nome.endswith(".xlsx"):
+        linhas = ler_xlsx(arquivo.file)
+    elif nome.endswith(".csv") or arquivo.content_type == "text/csv":
+        linhas = ler_csv(arquivo.file, delimitador)
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Formato não suportado: envie um arquivo .csv ou .xlsx"
+        )
+
+    return StreamingResponse(
+        processar_importacao(linhas, destino, current_user),
+        media_type="application/x-ndjson",
+    )
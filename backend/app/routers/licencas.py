@@ -1,14 +1,16 @@
 # app/routers/licencas.py
 from typing import List, Optional
 from datetime import date, timedelta
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, or_, func
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.user import User
 from app.models.licenca import Licenca
 from app.routers.auth import get_current_user, require_superadmin
+from app.core.etag import etag_lista, verificar_etag_registro
+from app.core.tempo_limite import timeout_sql
 from app.schemas.licenca import (
     LicencaCreate,
     LicencaUpdate,
@@ -16,7 +18,11 @@ from app.schemas.licenca import (
     LicencaDashboard,
 )
 
-router = APIRouter(prefix="/licencas", tags=["Licenças (SuperAdmin)"])
+router = APIRouter(
+    prefix="/licencas",
+    tags=["Licenças (SuperAdmin)"],
+    dependencies=[Depends(timeout_sql("interativo"))],
+)
 
 
 async def get_licenca_or_404(
@@ -96,13 +102,14 @@ async def create_licenca(
 
 @router.get("", response_model=List[LicencaResponse])
 async def list_licencas(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(require_superadmin),
     ativo: Optional[bool] = Query(None, description="Filtrar por status ativo/inativo"),
     statpag: Optional[str] = Query(None, description="Filtrar por status de pagamento"),
     vencidas: Optional[bool] = Query(None, description="Filtrar licenças vencidas"),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=500),
+    etag: str = Depends(etag_lista("rfe023lic", usuario=require_superadmin)),  # 304 antes da query
 ):
     """Listar todas as licenças (SuperAdmin only)"""
     
@@ -135,7 +142,7 @@ async def list_licencas(
 
 @router.get("/dashboard", response_model=LicencaDashboard)
 async def get_licencas_dashboard(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(require_superadmin),
 ):
     """Obter dashboard de licenças (SuperAdmin only)"""
@@ -200,11 +207,14 @@ async def get_licencas_dashboard(
 @router.get("/{codlic}", response_model=LicencaResponse)
 async def get_licenca(
     codlic: int,
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_superadmin),
 ):
     """Buscar licença por ID (SuperAdmin only)"""
     licenca = await get_licenca_or_404(codlic, db)
+    verificar_etag_registro(request, response, "rfe023lic", codlic, licenca.datalt, licenca.datcri)
     return licenca
 
 
@@ -1,13 +1,73 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import base64
+import codecs
+import json
+import tempfile
+from typing import AsyncIterator, Iterator, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, tuple_, func, literal_column, text, update, bindparam
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import undefer_group
 
-from app.database import get_db
+from app.database import get_db, AsyncSessionLocal, get_read_db
+from app.core.tempo_limite import aplicar_timeout, timeout_sql
 from app.routers.auth import get_tenant
 from app.models.pessoa import Pessoa
-from app.schemas.pessoa import PessoaCreate, PessoaUpdate, PessoaResponse
+from app.schemas.pessoa import PessoaCreate, PessoaUpdate, PessoaResponse, PessoaDetalheResponse, PessoaListPage
+
+router = APIRouter(prefix="/pessoas", tags=["Pessoas"], dependencies=[Depends(timeout_sql("interativo"))])
+
+# Campos permitidos em fields= (os mesmos de PessoaResponse, sem as colunas largas)
+CAMPOS_LISTAGEM = list(PessoaResponse.model_fields)
+
+
+# Importação em lote: linhas por INSERT e chave do índice único i010pes_cpfpes
+BULK_BATCH_SIZE = 500
+BULK_MAX_OBJETO = 1024 * 1024  # 1 MB por objeto JSON
+BULK_RESULTADO_MEMORIA = 1024 * 1024  # resultado maior que isso vai para arquivo temporário
+CHAVE_CPFPES = ["tippes", "codtre", "cpfpes", "cnppes", "codemp", "codfil", "nompes"]
+BULK_ATUALIZAVEIS = [c for c in PessoaCreate.model_fields if c not in CHAVE_CPFPES]
+
+
+def encode_cursor(nompes: str, codpes: int) -> str:
+    """Gera o cursor opaco a partir da última linha da página"""
+    raw = json.dumps([nompes, codpes]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[str, int]:
+    """Lê o cursor enviado pelo cliente (nompes, codpes)"""
+    try:
+        nompes, codpes = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return str(nompes), int(codpes)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor inválido"
+        )
+
 
-router = APIRouter(prefix="/pessoas", tags=["Pessoas"])
+def parse_fields(fields: Optional[str]) -> list[str]:
+    """Valida fields= e garante nompes/codpes (chaves do cursor)"""
+    if not fields:
+        return CAMPOS_LISTAGEM
+
+    campos = [f.strip() for f in fields.split(",") if f.strip()]
+    invalidos = [f for f in campos if f not in CAMPOS_LISTAGEM]
+    if invalidos:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Campos inválidos: {', '.join(invalidos)}"
+        )
+
+    for chave in ("nompes", "codpes"):
+        if chave not in campos:
+            campos.append(chave)
+    return campos
 
 
 @router.post("/", response_model=PessoaResponse, status_code=status.HTTP_201_CREATED)
@@ -47,24 +107,281 @@ async def create_pessoa(
     return nova
 
 
-@router.get("/", response_model=list[PessoaResponse])
+async def iter_json_objects(chunks: AsyncIterator[bytes]) -> AsyncIterator[dict]:
+    """
+    Lê objetos JSON de um corpo em streaming, sem carregar tudo em memória.
+    
+    Aceita NDJSON (um objeto por linha) e array JSON ([{...}, {...}]):
+    espaços, vírgulas e colchetes entre os objetos são ignorados.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+
+    async for chunk in chunks:
+        buffer += utf8.decode(chunk)
+        while True:
+            buffer = buffer.lstrip(" \t\r\n,[]")
+            if not buffer:
+                break
+            try:
+                obj, fim = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                # Objeto incompleto: espera o próximo pedaço
+                if len(buffer) > BULK_MAX_OBJETO:
+                    raise ValueError("Objeto JSON muito grande ou malformado")
+                break
+            if not isinstance(obj, dict):
+                raise ValueError("Cada item deve ser um objeto JSON")
+            buffer = buffer[fim:]
+            yield obj
+
+    buffer = (buffer + utf8.decode(b"", final=True)).strip(" \t\r\n,[]")
+    if buffer:
+        raise ValueError("JSON malformado no final do corpo")
+
+
+def ndjson(item: dict) -> bytes:
+    return (json.dumps(item, ensure_ascii=False, default=str) + "\n").encode()
+
+
+def chave_cpfpes(valores) -> tuple:
+    return tuple(valores[c] for c in CHAVE_CPFPES)
+
+
+async def inserir_ou_atualizar(db: AsyncSession, grupos: dict[tuple, dict]) -> dict[tuple, dict]:
+    """Chave completa: INSERT ... ON CONFLICT em i010pes_cpfpes"""
+    stmt = pg_insert(Pessoa.__table__).values(list(grupos.values()))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=CHAVE_CPFPES,
+        set_={**{c: stmt.excluded[c] for c in BULK_ATUALIZAVEIS}, "dtaalt": func.current_date()},
+    ).returning(
+        Pessoa.codpes,
+        *[getattr(Pessoa, c) for c in CHAVE_CPFPES],
+        literal_column("(xmax = 0)").label("inserido"),
+    )
+    result = await db.execute(stmt)
+    return {
+        chave_cpfpes(row): {"status": "CRIADO" if row["inserido"] else "ATUALIZADO", "codpes": row["codpes"]}
+        for row in result.mappings()
+    }
+
+
+async def resolver_chave_nula(db: AsyncSession, grupos: dict[tuple, dict], codemp: int, codfil: int) -> dict[tuple, dict]:
+    """
+    Chave com NULL (ex.: pessoa física sem CNPJ): no índice único NULLs são
+    distintos e o ON CONFLICT nunca dispara, então o cadastro é buscado com a
+    chave comparando NULL com NULL. O índice continua aceitando homônimos sem
+    documento (POST /pessoas); quando a chave do bulk acha mais de um, a linha é ERRO.
+    """
+    nomes = sorted({valores["nompes"] for valores in grupos.values()})
+    # Bulks simultâneos com o mesmo nome esperam um pelo outro (senão os dois inserem)
+    await db.execute(
+        text(
+            "SELECT pg_advisory_xact_lock(hashtextextended(:prefixo || nome, 0)) "
+            "FROM (SELECT unnest(CAST(:nomes AS text[])) AS nome ORDER BY 1) AS nomes"
+        ),
+        {"prefixo": f"rfe010pes:{codemp}:{codfil}:", "nomes": nomes},
+    )
+
+    existentes: dict[tuple, list[int]] = {}
+    result = await db.execute(
+        select(Pessoa.codpes, *[getattr(Pessoa, c) for c in CHAVE_CPFPES])
+        .where(Pessoa.codemp == codemp, Pessoa.codfil == codfil, Pessoa.nompes.in_(nomes))
+        .order_by(Pessoa.codpes)
+    )
+    for row in result.mappings():
+        existentes.setdefault(chave_cpfpes(row), []).append(row["codpes"])
+
+    resultados: dict[tuple, dict] = {}
+    novos: list[dict] = []
+    atualizacoes: list[dict] = []
+    for chave, valores in grupos.items():
+        codpes = existentes.get(chave, [])
+        if len(codpes) > 1:
+            resultados[chave] = {
+                "status": "ERRO",
+                "erro": f"Chave ambígua: {len(codpes)} pessoas com o mesmo nome e documentos "
+                        f"(codpes {', '.join(map(str, codpes))})",
+            }
+        elif codpes:
+            atualizacoes.append({"b_codpes": codpes[0], **{c: valores[c] for c in BULK_ATUALIZAVEIS}})
+            resultados[chave] = {"status": "ATUALIZADO", "codpes": codpes[0]}
+        else:
+            novos.append(valores)
+
+    if atualizacoes:
+        tabela = Pessoa.__table__
+        await db.execute(
+            update(tabela).where(tabela.c.codpes == bindparam("b_codpes")).values(dtaalt=func.current_date()),
+            atualizacoes,
+        )
+    if novos:
+        result = await db.execute(
+            pg_insert(Pessoa.__table__).values(novos).returning(Pessoa.codpes, *[getattr(Pessoa, c) for c in CHAVE_CPFPES])
+        )
+        for row in result.mappings():
+            resultados[chave_cpfpes(row)] = {"status": "CRIADO", "codpes": row["codpes"]}
+    return resultados
+
+
+async def gravar_grupos(db: AsyncSession, grupos: dict[tuple, dict], codemp: int, codfil: int) -> dict[tuple, dict]:
+    completas = {chave: valores for chave, valores in grupos.items() if None not in chave}
+    com_nulo = {chave: valores for chave, valores in grupos.items() if None in chave}
+    gravados = await inserir_ou_atualizar(db, completas) if completas else {}
+    if com_nulo:
+        gravados.update(await resolver_chave_nula(db, com_nulo, codemp, codfil))
+    return gravados
+
+
+async def upsert_lote(
+    db: AsyncSession,
+    lote: list[tuple[int, PessoaCreate]],
+    codemp: int,
+    codfil: int,
+) -> list[dict]:
+    """Grava um lote pela chave de i010pes_cpfpes; retorna o resultado por linha"""
+    # Agrupa por chave: duplicados no mesmo lote viram uma única linha (a última vence)
+    por_chave: dict[tuple, tuple[list[int], dict]] = {}
+    for linha, pessoa in lote:
+        valores = pessoa.model_dump()
+        valores["codemp"] = codemp  # 🔒 Força tenant do token
+        valores["codfil"] = codfil  # 🔒 Força tenant do token
+        chave = chave_cpfpes(valores)
+        linhas = por_chave[chave][0] if chave in por_chave else []
+        por_chave[chave] = (linhas + [linha], valores)
+
+    grupos = {chave: valores for chave, (_, valores) in por_chave.items()}
+    try:
+        gravados = await gravar_grupos(db, grupos, codemp, codfil)
+        await db.commit()
+    except SQLAlchemyError:
+        # Um registro ruim derruba o statement inteiro: refaz um a um, cada um no
+        # seu savepoint, para só as linhas com problema saírem como ERRO
+        await db.rollback()
+        gravados = {}
+        for chave, valores in grupos.items():
+            try:
+                async with db.begin_nested():
+                    gravados.update(await gravar_grupos(db, {chave: valores}, codemp, codfil))
+            except SQLAlchemyError as e:
+                gravados[chave] = {"status": "ERRO", "erro": str(getattr(e, "orig", e))}
+        await db.commit()
+
+    resultados = [
+        {"linha": linha, **gravados[chave]}
+        for chave, (linhas, _) in por_chave.items() for linha in linhas
+    ]
+    resultados.sort(key=lambda r: r["linha"])
+    return resultados
+
+
+async def processar_bulk(chunks: AsyncIterator[bytes], codemp: int, codfil: int) -> AsyncIterator[bytes]:
+    """Valida e grava o corpo em lotes, devolvendo uma linha NDJSON por registro"""
+    lote: list[tuple[int, PessoaCreate]] = []
+    linha = 0
+
+    async with AsyncSessionLocal() as db:
+        await aplicar_timeout(db, "lote")
+        try:
+            async for registro in iter_json_objects(chunks):
+                linha += 1
+                try:
+                    lote.append((linha, PessoaCreate.model_validate(registro)))
+                except ValidationError as e:
+                    erro = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+                    yield ndjson({"linha": linha, "status": "ERRO", "erro": erro})
+                    continue
+
+                if len(lote) >= BULK_BATCH_SIZE:
+                    for resultado in await upsert_lote(db, lote, codemp, codfil):
+                        yield ndjson(resultado)
+                    lote = []
+        except ValueError as e:
+            yield ndjson({"linha": linha + 1, "status": "ERRO", "erro": str(e)})
+
+        if lote:
+            for resultado in await upsert_lote(db, lote, codemp, codfil):
+                yield ndjson(resultado)
+
+
+def ler_resultados(arquivo) -> Iterator[bytes]:
+    """Devolve o resultado gravado por bulk_upsert_pessoas e fecha o arquivo no fim"""
+    try:
+        arquivo.seek(0)
+        while bloco := arquivo.read(64 * 1024):
+            yield bloco
+    finally:
+        arquivo.close()
+
+
+@router.post("/bulk")
+async def bulk_upsert_pessoas(
+    request: Request,
+    tenant: tuple[int, int] = Depends(get_tenant),
+):
+    """
+    Cria/atualiza pessoas em lote no tenant do usuário autenticado.
+    
+    Corpo em NDJSON ou array JSON de PessoaCreate. Os registros são lidos em
+    streaming e gravados em lotes pela chave de i010pes_cpfpes (INSERT ... ON
+    CONFLICT; com NULL na chave, busca do cadastro existente). A resposta é
+    NDJSON com uma linha por registro: CRIADO, ATUALIZADO ou ERRO.
+
+    O corpo é todo lido (e gravado) antes de a resposta começar: o
+    StreamingResponse escuta a desconexão no mesmo receive e consumiria
+    pedaços do corpo. O resultado fica num arquivo temporário (em memória até
+    BULK_RESULTADO_MEMORIA) e volta em streaming.
+    """
+    codemp, codfil = tenant
+    resultados = tempfile.SpooledTemporaryFile(max_size=BULK_RESULTADO_MEMORIA)
+    try:
+        async for linha in processar_bulk(request.stream(), codemp, codfil):
+            resultados.write(linha)
+    except BaseException:
+        resultados.close()
+        raise
+
+    return StreamingResponse(ler_resultados(resultados), media_type="application/x-ndjson")
+
+
+@router.get("/", response_model=PessoaListPage)
 async def list_pessoas(
-    db: AsyncSession = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Cursor retornado em next_cursor"),
+    limit: int = Query(100, ge=1, le=500),
+    fields: Optional[str] = Query(None, description="Campos separados por vírgula (ex.: codpes,nompes,cidpes)"),
+    db: AsyncSession = Depends(get_read_db),
     tenant: tuple[int, int] = Depends(get_tenant),
 ):
-    """Lista todas as pessoas do tenant do usuário autenticado"""
+    """Lista as pessoas do tenant paginando por cursor (ordem: nompes, codpes)"""
     codemp, codfil = tenant
-    
-    result = await db.execute(
-        select(Pessoa).where(
-            Pessoa.codemp == codemp,
-            Pessoa.codfil == codfil,
-        ).order_by(Pessoa.nompes)
+    campos = parse_fields(fields)
+
+    # Seleciona só as colunas pedidas; a ordem segue idx_rfe010pes_nome_tenant
+    query = select(*[getattr(Pessoa, campo) for campo in campos]).where(
+        Pessoa.codemp == codemp,
+        Pessoa.codfil == codfil,
     )
-    return result.scalars().all()
 
+    if cursor:
+        ultimo_nome, ultimo_cod = decode_cursor(cursor)
+        query = query.where(tuple_(Pessoa.nompes, Pessoa.codpes) > (ultimo_nome, ultimo_cod))
+
+    # Busca uma linha a mais para saber se existe próxima página
+    query = query.order_by(Pessoa.nompes, Pessoa.codpes).limit(limit + 1)
+
+    result = await db.execute(query)
+    rows = result.mappings().all()
 
-@router.get("/{codpes}", response_model=PessoaResponse)
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["nompes"], rows[-1]["codpes"])
+
+    return PessoaListPage(items=[dict(row) for row in rows], next_cursor=next_cursor)
+
+
+@router.get("/{codpes}", response_model=PessoaDetalheResponse)
 async def get_pessoa(
     codpes: int,
     db: AsyncSession = Depends(get_db),
@@ -73,8 +390,9 @@ async def get_pessoa(
     """Busca uma pessoa específica no tenant do usuário autenticado"""
     codemp, codfil = tenant
     
+    # Só o detalhe carrega (e devolve) as colunas largas (txtctr, obspes, logocl)
     result = await db.execute(
-        select(Pessoa).where(
+        select(Pessoa).options(undefer_group("textos")).where(
             Pessoa.codpes == codpes,
             Pessoa.codemp == codemp,
             Pessoa.codfil == codfil,
@@ -1,20 +1,30 @@
 # app/routers/relatorios.py
-from typing import List, Optional
-from datetime import date, timedelta
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from typing import Any, List, Literal, Optional
+from datetime import date, datetime, timedelta
+from pathlib import Path
+import gzip
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_, func
-from pydantic import BaseModel, Field
+from sqlalchemy import select, and_, or_, func, literal, literal_column, union_all
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
 from decimal import Decimal
 
-from app.database import get_db
+from app.database import get_db, get_read_db, fabrica_leitura
 from app.models.user import User
 from app.models.contas_pagar import ContaPagar
 from app.models.contas_receber import ContaReceber
 from app.models.pessoa import Pessoa
 from app.routers.auth import get_current_user
+from app.core.exportacao import exportar, FormatoExportacao
+from app.core.limites_tenant import limite_tenant
+from app.core.respostas import negociar_formato
+from app.core.config import settings
+from app.core import relatorios_jobs
+from app.core.tempo_limite import timeout_sql
+from app.models.relatorio_job import RelatorioJob
 
-router = APIRouter(prefix="/relatorios", tags=["Relatórios"])
+router = APIRouter(prefix="/relatorios", tags=["Relatórios"], dependencies=[Depends(timeout_sql("relatorio"))])
 
 
 # ========== SCHEMAS DE RELATÓRIOS ==========
@@ -74,15 +84,107 @@ class ContasVencidasResponse(BaseModel):
     items: List[ContaVencidaItem]
 
 
+# ========== FILTROS (compartilhados com as exportações) ==========
+
+def validar_periodo(data_inicio: date, data_fim: date):
+    if data_inicio > data_fim:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Data inicial não pode ser maior que data final"
+        )
+
+
+def filtros_fluxo_receber(
+    current_user: User,
+    data_inicio: date,
+    data_fim: date,
+    incluir_canceladas: bool,
+    apenas_realizadas: bool,
+) -> list:
+    """Condições das contas a receber no fluxo de caixa"""
+    filtros = [ContaReceber.datven >= data_inicio, ContaReceber.datven <= data_fim]
+    
+    # Filtro de tenant
+    if not current_user.issuper:
+        filtros += [ContaReceber.codemp == current_user.codemp, ContaReceber.codfil == current_user.codfil]
+    
+    # Filtro de status
+    if not incluir_canceladas:
+        filtros.append(ContaReceber.statcar != "CANCELADO")
+    
+    if apenas_realizadas:
+        filtros.append(ContaReceber.statcar == "RECEBIDO")
+    
+    return filtros
+
+
+def filtros_fluxo_pagar(
+    current_user: User,
+    data_inicio: date,
+    data_fim: date,
+    incluir_canceladas: bool,
+    apenas_realizadas: bool,
+) -> list:
+    """Condições das contas a pagar no fluxo de caixa"""
+    filtros = [ContaPagar.datven >= data_inicio, ContaPagar.datven <= data_fim]
+    
+    # Filtro de tenant
+    if not current_user.issuper:
+        filtros += [ContaPagar.codemp == current_user.codemp, ContaPagar.codfil == current_user.codfil]
+    
+    # Filtro de status
+    if not incluir_canceladas:
+        filtros.append(ContaPagar.statcap != "CANCELADO")
+    
+    if apenas_realizadas:
+        filtros.append(ContaPagar.statcap == "PAGO")
+    
+    return filtros
+
+
+def filtros_vencidas_pagar(current_user: User, hoje: date, limite_dias: Optional[int]) -> list:
+    """Condições das contas a pagar vencidas"""
+    filtros = [ContaPagar.statcap.in_(["A_PAGAR", "VENCIDO"]), ContaPagar.datven < hoje]
+    
+    # Filtro de tenant
+    if not current_user.issuper:
+        filtros += [ContaPagar.codemp == current_user.codemp, ContaPagar.codfil == current_user.codfil]
+    
+    # Limite de dias
+    if limite_dias is not None:
+        filtros.append(ContaPagar.datven >= hoje - timedelta(days=limite_dias))
+    
+    return filtros
+
+
+def filtros_vencidas_receber(current_user: User, hoje: date, limite_dias: Optional[int]) -> list:
+    """Condições das contas a receber vencidas"""
+    filtros = [ContaReceber.statcar.in_(["A_RECEBER", "VENCIDO"]), ContaReceber.datven < hoje]
+    
+    # Filtro de tenant
+    if not current_user.issuper:
+        filtros += [ContaReceber.codemp == current_user.codemp, ContaReceber.codfil == current_user.codfil]
+    
+    # Limite de dias
+    if limite_dias is not None:
+        filtros.append(ContaReceber.datven >= hoje - timedelta(days=limite_dias))
+    
+    return filtros
+
+
 # ========== ENDPOINT: FLUXO DE CAIXA ==========
 
-@router.get("/fluxo-caixa", response_model=FluxoCaixaResponse)
+@router.get(
+    "/fluxo-caixa",
+    response_model=FluxoCaixaResponse,
+    dependencies=[Depends(negociar_formato), Depends(limite_tenant("fluxo_caixa"))],
+)
 async def relatorio_fluxo_caixa(
     data_inicio: date = Query(..., description="Data inicial do período"),
     data_fim: date = Query(..., description="Data final do período"),
     incluir_canceladas: bool = Query(False, description="Incluir contas canceladas"),
     apenas_realizadas: bool = Query(False, description="Apenas contas pagas/recebidas"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
     """
@@ -92,11 +194,7 @@ async def relatorio_fluxo_caixa(
     em um período específico.
     """
     
-    if data_inicio > data_fim:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Data inicial não pode ser maior que data final"
-        )
+    validar_periodo(data_inicio, data_fim)
     
     items = []
     
@@ -104,28 +202,9 @@ async def relatorio_fluxo_caixa(
     query_receber = select(ContaReceber, Pessoa.nompes).outerjoin(
         Pessoa, ContaReceber.codcli == Pessoa.codpes
     ).where(
-        and_(
-            ContaReceber.datven >= data_inicio,
-            ContaReceber.datven <= data_fim
-        )
+        *filtros_fluxo_receber(current_user, data_inicio, data_fim, incluir_canceladas, apenas_realizadas)
     )
     
-    # Filtro de tenant
-    if not current_user.issuper:
-        query_receber = query_receber.where(
-            and_(
-                ContaReceber.codemp == current_user.codemp,
-                ContaReceber.codfil == current_user.codfil
-            )
-        )
-    
-    # Filtro de status
-    if not incluir_canceladas:
-        query_receber = query_receber.where(ContaReceber.statcar != "CANCELADO")
-    
-    if apenas_realizadas:
-        query_receber = query_receber.where(ContaReceber.statcar == "RECEBIDO")
-    
     result_receber = await db.execute(query_receber)
     contas_receber = result_receber.all()
     
@@ -146,28 +225,9 @@ async def relatorio_fluxo_caixa(
     query_pagar = select(ContaPagar, Pessoa.nompes).outerjoin(
         Pessoa, ContaPagar.codfor == Pessoa.codpes
     ).where(
-        and_(
-            ContaPagar.datven >= data_inicio,
-            ContaPagar.datven <= data_fim
-        )
+        *filtros_fluxo_pagar(current_user, data_inicio, data_fim, incluir_canceladas, apenas_realizadas)
     )
     
-    # Filtro de tenant
-    if not current_user.issuper:
-        query_pagar = query_pagar.where(
-            and_(
-                ContaPagar.codemp == current_user.codemp,
-                ContaPagar.codfil == current_user.codfil
-            )
-        )
-    
-    # Filtro de status
-    if not incluir_canceladas:
-        query_pagar = query_pagar.where(ContaPagar.statcap != "CANCELADO")
-    
-    if apenas_realizadas:
-        query_pagar = query_pagar.where(ContaPagar.statcap == "PAGO")
-    
     result_pagar = await db.execute(query_pagar)
     contas_pagar = result_pagar.all()
     
@@ -224,10 +284,14 @@ async def relatorio_fluxo_caixa(
 
 # ========== ENDPOINT: CONTAS VENCIDAS ==========
 
-@router.get("/contas-vencidas", response_model=ContasVencidasResponse)
+@router.get(
+    "/contas-vencidas",
+    response_model=ContasVencidasResponse,
+    dependencies=[Depends(negociar_formato), Depends(limite_tenant("contas_vencidas"))],
+)
 async def relatorio_contas_vencidas(
     limite_dias: int = Query(None, ge=0, description="Limite de dias vencidos (None = sem limite)"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
     """
@@ -242,26 +306,7 @@ async def relatorio_contas_vencidas(
     # ===== CONTAS A PAGAR VENCIDAS =====
     query_pagar = select(ContaPagar, Pessoa.nompes).outerjoin(
         Pessoa, ContaPagar.codfor == Pessoa.codpes
-    ).where(
-        and_(
-            ContaPagar.statcap.in_(["A_PAGAR", "VENCIDO"]),
-            ContaPagar.datven < hoje
-        )
-    )
-    
-    # Filtro de tenant
-    if not current_user.issuper:
-        query_pagar = query_pagar.where(
-            and_(
-                ContaPagar.codemp == current_user.codemp,
-                ContaPagar.codfil == current_user.codfil
-            )
-        )
-    
-    # Limite de dias
-    if limite_dias is not None:
-        data_limite = hoje - timedelta(days=limite_dias)
-        query_pagar = query_pagar.where(ContaPagar.datven >= data_limite)
+    ).where(*filtros_vencidas_pagar(current_user, hoje, limite_dias))
     
     result_pagar = await db.execute(query_pagar)
     contas_pagar = result_pagar.all()
@@ -290,26 +335,7 @@ async def relatorio_contas_vencidas(
     # ===== CONTAS A RECEBER VENCIDAS =====
     query_receber = select(ContaReceber, Pessoa.nompes).outerjoin(
         Pessoa, ContaReceber.codcli == Pessoa.codpes
-    ).where(
-        and_(
-            ContaReceber.statcar.in_(["A_RECEBER", "VENCIDO"]),
-            ContaReceber.datven < hoje
-        )
-    )
-    
-    # Filtro de tenant
-    if not current_user.issuper:
-        query_receber = query_receber.where(
-            and_(
-                ContaReceber.codemp == current_user.codemp,
-                ContaReceber.codfil == current_user.codfil
-            )
-        )
-    
-    # Limite de dias
-    if limite_dias is not None:
-        data_limite = hoje - timedelta(days=limite_dias)
-        query_receber = query_receber.where(ContaReceber.datven >= data_limite)
+    ).where(*filtros_vencidas_receber(current_user, hoje, limite_dias))
     
     result_receber = await db.execute(query_receber)
     contas_receber = result_receber.all()
@@ -347,6 +373,117 @@ async def relatorio_contas_vencidas(
     )
 
 
+# ========== EXPORTAÇÕES (CSV/XLSX em streaming) ==========
+
+def query_export_fluxo_caixa(
+    current_user: User,
+    data_inicio: date,
+    data_fim: date,
+    incluir_canceladas: bool,
+    apenas_realizadas: bool,
+):
+    """Lançamentos do fluxo de caixa em uma única query (exportação e jobs)"""
+    query_receber = select(
+        ContaReceber.datven.label("data"),
+        literal("ENTRADA").label("tipo"),
+        ContaReceber.catcar.label("categoria"),
+        ContaReceber.vlrcar.label("valor"),
+        ContaReceber.statcar.label("status"),
+        literal("CONTAS_RECEBER").label("origem"),
+        ContaReceber.codcar.label("cod_origem"),
+        Pessoa.nompes.label("nome_pessoa"),
+    ).outerjoin(
+        Pessoa, ContaReceber.codcli == Pessoa.codpes
+    ).where(
+        *filtros_fluxo_receber(current_user, data_inicio, data_fim, incluir_canceladas, apenas_realizadas)
+    )
+    
+    query_pagar = select(
+        ContaPagar.datven.label("data"),
+        literal("SAIDA").label("tipo"),
+        ContaPagar.catcap.label("categoria"),
+        ContaPagar.vlrcap.label("valor"),
+        ContaPagar.statcap.label("status"),
+        literal("CONTAS_PAGAR").label("origem"),
+        ContaPagar.codcap.label("cod_origem"),
+        Pessoa.nompes.label("nome_pessoa"),
+    ).outerjoin(
+        Pessoa, ContaPagar.codfor == Pessoa.codpes
+    ).where(
+        *filtros_fluxo_pagar(current_user, data_inicio, data_fim, incluir_canceladas, apenas_realizadas)
+    )
+    
+    return union_all(query_receber, query_pagar).order_by(literal_column("data"))
+
+
+def query_export_contas_vencidas(current_user: User, hoje: date, limite_dias: Optional[int]):
+    """Contas vencidas em uma única query (exportação e jobs)"""
+    query_pagar = select(
+        literal("PAGAR").label("tipo"),
+        ContaPagar.codcap.label("cod"),
+        func.coalesce(Pessoa.nompes, "Fornecedor").label("pessoa"),
+        ContaPagar.vlrcap.label("valor"),
+        ContaPagar.datven.label("data_vencimento"),
+        (literal(hoje) - ContaPagar.datven).label("dias_vencido"),
+        ContaPagar.catcap.label("categoria"),
+        ContaPagar.forpag.label("forma_pagamento"),
+        ContaPagar.numpar.label("num_parcela"),
+        ContaPagar.totpar.label("tot_parcelas"),
+        ContaPagar.obscap.label("observacoes"),
+    ).outerjoin(
+        Pessoa, ContaPagar.codfor == Pessoa.codpes
+    ).where(*filtros_vencidas_pagar(current_user, hoje, limite_dias))
+    
+    query_receber = select(
+        literal("RECEBER").label("tipo"),
+        ContaReceber.codcar.label("cod"),
+        func.coalesce(Pessoa.nompes, "Cliente").label("pessoa"),
+        ContaReceber.vlrcar.label("valor"),
+        ContaReceber.datven.label("data_vencimento"),
+        (literal(hoje) - ContaReceber.datven).label("dias_vencido"),
+        ContaReceber.catcar.label("categoria"),
+        ContaReceber.forrec.label("forma_pagamento"),
+        ContaReceber.numpar.label("num_parcela"),
+        ContaReceber.totpar.label("tot_parcelas"),
+        ContaReceber.obscar.label("observacoes"),
+    ).outerjoin(
+        Pessoa, ContaReceber.codcli == Pessoa.codpes
+    ).where(*filtros_vencidas_receber(current_user, hoje, limite_dias))
+    
+    return union_all(query_pagar, query_receber).order_by(literal_column("data_vencimento"))
+
+
+@router.get("/fluxo-caixa/export", dependencies=[Depends(limite_tenant("exportacao"))])
+async def exportar_fluxo_caixa(
+    request: Request,
+    data_inicio: date = Query(..., description="Data inicial do período"),
+    data_fim: date = Query(..., description="Data final do período"),
+    incluir_canceladas: bool = Query(False, description="Incluir contas canceladas"),
+    apenas_realizadas: bool = Query(False, description="Apenas contas pagas/recebidas"),
+    formato: FormatoExportacao = Query("csv", description="csv ou xlsx"),
+    current_user: User = Depends(get_current_user),
+):
+    """Exporta os lançamentos do fluxo de caixa ordenados por data"""
+    validar_periodo(data_inicio, data_fim)
+    
+    query = query_export_fluxo_caixa(current_user, data_inicio, data_fim, incluir_canceladas, apenas_realizadas)
+    return exportar(query, formato, f"fluxo_caixa_{data_inicio}_{data_fim}", fabrica=fabrica_leitura(request))
+
+
+@router.get("/contas-vencidas/export", dependencies=[Depends(limite_tenant("exportacao"))])
+async def exportar_contas_vencidas(
+    request: Request,
+    limite_dias: int = Query(None, ge=0, description="Limite de dias vencidos (None = sem limite)"),
+    formato: FormatoExportacao = Query("csv", description="csv ou xlsx"),
+    current_user: User = Depends(get_current_user),
+):
+    """Exporta as contas vencidas (mais antigas primeiro)"""
+    hoje = date.today()
+    
+    query = query_export_contas_vencidas(current_user, hoje, limite_dias)
+    return exportar(query, formato, f"contas_vencidas_{hoje}", fabrica=fabrica_leitura(request))
+
+
 # ========== ENDPOINT: RESUMO DASHBOARD ==========
 
 class DashboardResumo(BaseModel):
@@ -364,87 +501,271 @@ class DashboardResumo(BaseModel):
     saldo_previsto_mes: Decimal = Decimal("0.00")
 
 
-@router.get("/dashboard", response_model=DashboardResumo)
-async def relatorio_dashboard(
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-):
-    """
-    Resumo para Dashboard
-    
-    Retorna estatísticas gerais de contas a pagar e receber.
-    """
-    
+async def calcular_dashboard(db: AsyncSession, current_user: User) -> DashboardResumo:
+    """Números do dashboard com agregações no banco (também usado no push de eventos)"""
     hoje = date.today()
-    fim_mes = date(hoje.year, hoje.month + 1 if hoje.month < 12 else 1, 1) if hoje.month < 12 else date(hoje.year + 1, 1, 1)
     
     # ===== CONTAS A PAGAR =====
-    query_pagar = select(ContaPagar)
+    filtros_pagar = []
     if not current_user.issuper:
-        query_pagar = query_pagar.where(
+        filtros_pagar.append(
             and_(
                 ContaPagar.codemp == current_user.codemp,
                 ContaPagar.codfil == current_user.codfil
             )
         )
-    
-    # Abertas
-    query_pagar_abertas = query_pagar.where(ContaPagar.statcap == "A_PAGAR")
-    result_pagar_abertas = await db.execute(query_pagar_abertas)
-    contas_pagar_abertas = result_pagar_abertas.scalars().all()
-    
-    # Vencidas
-    query_pagar_vencidas = query_pagar.where(
-        and_(
-            ContaPagar.statcap.in_(["A_PAGAR", "VENCIDO"]),
-            ContaPagar.datven < hoje
-        )
+    aberta_pagar = ContaPagar.statcap == "A_PAGAR"
+    vencida_pagar = and_(ContaPagar.statcap.in_(["A_PAGAR", "VENCIDO"]), ContaPagar.datven < hoje)
+    
+    result_pagar = await db.execute(
+        select(
+            func.count().filter(aberta_pagar),
+            func.coalesce(func.sum(ContaPagar.vlrcap).filter(aberta_pagar), 0),
+            func.count().filter(vencida_pagar),
+            func.coalesce(func.sum(ContaPagar.vlrcap).filter(vencida_pagar), 0),
+        ).where(*filtros_pagar, or_(aberta_pagar, vencida_pagar))
     )
-    result_pagar_vencidas = await db.execute(query_pagar_vencidas)
-    contas_pagar_vencidas = result_pagar_vencidas.scalars().all()
+    contas_pagar_abertas, total_pagar_aberto, contas_pagar_vencidas, total_pagar_vencido = result_pagar.one()
     
     # ===== CONTAS A RECEBER =====
-    query_receber = select(ContaReceber)
+    filtros_receber = []
     if not current_user.issuper:
-        query_receber = query_receber.where(
+        filtros_receber.append(
             and_(
                 ContaReceber.codemp == current_user.codemp,
                 ContaReceber.codfil == current_user.codfil
             )
         )
-    
-    # Abertas
-    query_receber_abertas = query_receber.where(ContaReceber.statcar == "A_RECEBER")
-    result_receber_abertas = await db.execute(query_receber_abertas)
-    contas_receber_abertas = result_receber_abertas.scalars().all()
-    
-    # Vencidas
-    query_receber_vencidas = query_receber.where(
-        and_(
-            ContaReceber.statcar.in_(["A_RECEBER", "VENCIDO"]),
-            ContaReceber.datven < hoje
-        )
+    aberta_receber = ContaReceber.statcar == "A_RECEBER"
+    vencida_receber = and_(ContaReceber.statcar.in_(["A_RECEBER", "VENCIDO"]), ContaReceber.datven < hoje)
+    
+    result_receber = await db.execute(
+        select(
+            func.count().filter(aberta_receber),
+            func.coalesce(func.sum(ContaReceber.vlrcar).filter(aberta_receber), 0),
+            func.count().filter(vencida_receber),
+            func.coalesce(func.sum(ContaReceber.vlrcar).filter(vencida_receber), 0),
+        ).where(*filtros_receber, or_(aberta_receber, vencida_receber))
     )
-    result_receber_vencidas = await db.execute(query_receber_vencidas)
-    contas_receber_vencidas = result_receber_vencidas.scalars().all()
+    contas_receber_abertas, total_receber_aberto, contas_receber_vencidas, total_receber_vencido = result_receber.one()
     
     # ===== CÁLCULOS =====
-    total_pagar_aberto = sum(c.vlrcap for c in contas_pagar_abertas)
-    total_pagar_vencido = sum(c.vlrcap for c in contas_pagar_vencidas)
-    
-    total_receber_aberto = sum(c.vlrcar for c in contas_receber_abertas)
-    total_receber_vencido = sum(c.vlrcar for c in contas_receber_vencidas)
-    
     saldo_previsto_mes = total_receber_aberto - total_pagar_aberto
     
     return DashboardResumo(
-        contas_pagar_abertas=len(contas_pagar_abertas),
-        contas_pagar_vencidas=len(contas_pagar_vencidas),
+        contas_pagar_abertas=contas_pagar_abertas,
+        contas_pagar_vencidas=contas_pagar_vencidas,
         total_pagar_aberto=total_pagar_aberto,
         total_pagar_vencido=total_pagar_vencido,
-        contas_receber_abertas=len(contas_receber_abertas),
-        contas_receber_vencidas=len(contas_receber_vencidas),
+        contas_receber_abertas=contas_receber_abertas,
+        contas_receber_vencidas=contas_receber_vencidas,
         total_receber_aberto=total_receber_aberto,
         total_receber_vencido=total_receber_vencido,
         saldo_previsto_mes=saldo_previsto_mes,
     )
+
+
+@router.get("/dashboard", response_model=DashboardResumo, dependencies=[Depends(limite_tenant("dashboard"))])
+async def relatorio_dashboard(
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Resumo para Dashboard
+    
+    Retorna estatísticas gerais de contas a pagar e receber.
+    Atualizações em tempo real: GET /eventos/stream ou WebSocket /eventos/ws.
+    """
+    return await calcular_dashboard(db, current_user)
+
+
+# ========== RELATÓRIOS ASSÍNCRONOS (JOBS) ==========
+
+class ParametrosFluxoCaixa(BaseModel):
+    data_inicio: date
+    data_fim: date
+    incluir_canceladas: bool = False
+    apenas_realizadas: bool = False
+
+
+class ParametrosContasVencidas(BaseModel):
+    limite_dias: Optional[int] = Field(None, ge=0)
+
+
+PARAMETROS_POR_TIPO = {
+    "fluxo-caixa": ParametrosFluxoCaixa,
+    "contas-vencidas": ParametrosContasVencidas,
+}
+
+
+class RelatorioJobCreate(BaseModel):
+    """Pedido de relatório assíncrono"""
+    tipo: Literal["fluxo-caixa", "contas-vencidas"]
+    formato: Literal["json", "csv"] = "json"
+    parametros: dict[str, Any] = Field(default_factory=dict)
+
+
+class RelatorioJobResponse(BaseModel):
+    """Situação de um relatório assíncrono"""
+    codrel: int
+    tiprel: str
+    fmtrel: str
+    parrel: dict[str, Any]
+    statrel: str  # PENDENTE, PROCESSANDO, CONCLUIDO, ERRO
+    tamrel: Optional[int] = None
+    errrel: Optional[str] = None
+    datcri: datetime
+    datini: Optional[datetime] = None
+    datfim: Optional[datetime] = None
+    
+    model_config = ConfigDict(from_attributes=True)
+
+
+async def get_job_or_404(codrel: int, db: AsyncSession, current_user: User) -> RelatorioJob:
+    """Busca o job (do tenant do usuário, salvo superadmin) ou retorna 404"""
+    query = select(RelatorioJob).where(RelatorioJob.codrel == codrel)
+    
+    if not current_user.issuper:
+        query = query.where(
+            and_(
+                RelatorioJob.codemp == current_user.codemp,
+                RelatorioJob.codfil == current_user.codfil
+            )
+        )
+    
+    result = await db.execute(query)
+    job = result.scalar_one_or_none()
+    
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Relatório não encontrado"
+        )
+    
+    return job
+
+
+@router.post("/jobs", response_model=RelatorioJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def criar_relatorio_job(
+    payload: RelatorioJobCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Enfileira um relatório para processamento em background
+    
+    Acompanhe em GET /relatorios/jobs/{codrel} e baixe em /relatorios/jobs/{codrel}/download.
+    """
+    try:
+        parametros = PARAMETROS_POR_TIPO[payload.tipo].model_validate(payload.parametros)
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=e.errors(include_url=False, include_context=False)
+        )
+    
+    if isinstance(parametros, ParametrosFluxoCaixa):
+        validar_periodo(parametros.data_inicio, parametros.data_fim)
+    
+    # Limite de relatórios na fila por tenant
+    result = await db.execute(
+        select(func.count(RelatorioJob.codrel)).where(
+            RelatorioJob.codemp == current_user.codemp,
+            RelatorioJob.codfil == current_user.codfil,
+            RelatorioJob.statrel.in_(["PENDENTE", "PROCESSANDO"])
+        )
+    )
+    if result.scalar() >= settings.RELATORIOS_MAX_FILA_POR_TENANT:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Limite de {settings.RELATORIOS_MAX_FILA_POR_TENANT} relatórios na fila atingido. Aguarde a conclusão dos anteriores."
+        )
+    
+    job = RelatorioJob(
+        codemp=current_user.codemp,
+        codfil=current_user.codfil,
+        codusu=current_user.codusu,
+        glorel=bool(current_user.issuper),
+        tiprel=payload.tipo,
+        fmtrel=payload.formato,
+        parrel=parametros.model_dump(mode="json"),
+        statrel="PENDENTE",
+    )
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+    
+    relatorios_jobs.avisar_novo_job()
+    return job
+
+
+@router.get("/jobs", response_model=List[RelatorioJobResponse])
+async def listar_relatorio_jobs(
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Relatórios assíncronos mais recentes do tenant"""
+    query = select(RelatorioJob)
+    
+    if not current_user.issuper:
+        query = query.where(
+            and_(
+                RelatorioJob.codemp == current_user.codemp,
+                RelatorioJob.codfil == current_user.codfil
+            )
+        )
+    
+    result = await db.execute(query.order_by(RelatorioJob.codrel.desc()).limit(limit))
+    return result.scalars().all()
+
+
+@router.get("/jobs/{codrel}", response_model=RelatorioJobResponse)
+async def obter_relatorio_job(
+    codrel: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Situação de um relatório assíncrono"""
+    return await get_job_or_404(codrel, db, current_user)
+
+
+@router.get("/jobs/{codrel}/download")
+async def baixar_relatorio_job(
+    codrel: int,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Baixa o resultado (enviado comprimido quando o cliente aceita gzip)"""
+    job = await get_job_or_404(codrel, db, current_user)
+    
+    if job.statrel != "CONCLUIDO":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Relatório ainda não disponível (status: {job.statrel})"
+        )
+    
+    if not job.arqrel or not Path(job.arqrel).exists():
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Resultado do relatório expirado"
+        )
+    
+    media_type = relatorios_jobs.MEDIA_TYPES[job.fmtrel]
+    headers = {
+        "Content-Disposition": f'attachment; filename="relatorio_{job.codrel}.{job.fmtrel}"',
+        "Vary": "Accept-Encoding",
+    }
+    
+    # Cliente aceita gzip: envia o arquivo como está
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+        return FileResponse(job.arqrel, media_type=media_type, headers=headers)
+    
+    def descomprimir():
+        with gzip.open(job.arqrel, "rb") as arquivo:
+            while bloco := arquivo.read(64 * 1024):
+                yield bloco
+    
+    return StreamingResponse(descomprimir(), media_type=media_type, headers=headers)
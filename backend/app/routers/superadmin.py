@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from passlib.context import CryptContext
@@ -7,9 +8,14 @@ from pydantic import BaseModel
 from app.database import get_db
 from app.models.user import User
 from app.schemas.user import UserCreateSuper, UserRead
-from app.routers.auth import get_current_user
+from app.routers.auth import get_current_user, require_superadmin
+from app.core.instrumentacao import estatisticas_por_rota, estatisticas_por_tenant
+from app.core.invalidacao import publicar_invalidacao
+from app.core.queries_lentas import listar_queries_lentas
+from app.core.agendador import status_jobs
+from app.core.tempo_limite import timeout_sql
 
-router = APIRouter(prefix="/superadmin", tags=["SuperAdmin"])
+router = APIRouter(prefix="/superadmin", tags=["SuperAdmin"], dependencies=[Depends(timeout_sql("interativo"))])
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -88,6 +94,7 @@ async def set_admin_status(
     
     # Atualiza o status
     user.isadmin = payload.isadmin
+    await publicar_invalidacao(db, user.codemp, user.codfil, "usuarios", user.codusu)
     await db.commit()
     await db.refresh(user)
     return user
@@ -136,4 +143,42 @@ async def get_user_by_id(
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Usuário não encontrado")
     
-    return user
\ No newline at end of file
+    return user
+
+
+@router.get("/sql/rotas", response_model=dict)
+async def sql_stats_por_rota(
+    current_user: User = Depends(require_superadmin),
+):
+    """Queries e tempo de banco agregados por rota neste worker - somente superadmin"""
+    return estatisticas_por_rota()
+
+
+@router.get("/sql/tenants", response_model=dict)
+async def sql_stats_por_tenant(
+    current_user: User = Depends(require_superadmin),
+):
+    """Uso por tenant neste worker (requests, tempo de banco, linhas, espera e 429) - somente superadmin"""
+    return estatisticas_por_tenant()
+
+
+@router.get("/sql/lentas", response_model=list[dict])
+async def sql_queries_lentas(
+    limite: int = Query(100, ge=1, le=1000),
+    rota: str = Query(None, description="Trecho da rota (ex.: /relatorios)"),
+    codemp: int = None,
+    codfil: int = None,
+    current_user: User = Depends(require_superadmin),
+):
+    """Últimas queries lentas registradas (com plano, quando capturado) - somente superadmin"""
+    # Leitura do arquivo fora do event loop
+    return await run_in_threadpool(listar_queries_lentas, limite, rota, codemp, codfil)
+
+
+@router.get("/agendador", response_model=dict)
+async def agendador_status(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_superadmin),
+):
+    """Jobs agendados: última execução (qualquer worker) e números deste worker - somente superadmin"""
+    return await status_jobs(db)
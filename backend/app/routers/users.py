@@ -3,12 +3,14 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from passlib.context import CryptContext
 
+from app.core.invalidacao import publicar_invalidacao
 from app.database import get_db
+from app.core.tempo_limite import timeout_sql
 from app.models.user import User
 from app.schemas.user import UserResponse, UserCreate, UserUpdate
 from app.routers.auth import get_current_user, get_tenant  # importa as dependências
 
-router = APIRouter(prefix="/users", tags=["Users"])
+router = APIRouter(prefix="/users", tags=["Users"], dependencies=[Depends(timeout_sql("interativo"))])
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -122,6 +124,7 @@ async def update_user(
     if updates.senha:
         user.pwdusu = get_password_hash(updates.senha)
 
+    await publicar_invalidacao(db, user.codemp, user.codfil, "usuarios", user.codusu)
     await db.commit()
     await db.refresh(user)
     return user
@@ -146,5 +149,6 @@ async def delete_user(
     if not user:
         raise HTTPException(status_code=404, detail="Usuário não encontrado")
     await db.delete(user)
+    await publicar_invalidacao(db, user.codemp, user.codfil, "usuarios", user.codusu)
     await db.commit()
     return {"message": "Usuário removido com sucesso"}
@@ -0,0 +1,57 @@
+# app/schemas/batch.py
+from typing import List, Optional
+from urllib.parse import unquote
+
+from pydantic import BaseModel, Field, field_validator
+
+from app.core.config import settings
+
+# Rotas de streaming (SSE, exportações, downloads): no batch seriam lidas inteiras
+# para a memória, e o /eventos/stream nunca termina
+PREFIXOS_FORA_DO_BATCH = ("eventos",)
+SUFIXOS_FORA_DO_BATCH = ("export", "download")
+
+
+class BatchItem(BaseModel):
+    """Sub-request GET do POST /batch"""
+    id: str = Field(..., min_length=1, max_length=100, description="Identificador do item na resposta")
+    path: str = Field(..., max_length=2000, description="Path e query string, ex.: /contas-pagar?limit=50")
+    if_none_match: Optional[str] = Field(None, max_length=200, description="ETag já conhecido pelo cliente")
+
+    @field_validator("path")
+    @classmethod
+    def validate_path(cls, v):
+        if not v.startswith("/") or v.startswith("//") or "#" in v:
+            raise ValueError("Path deve ser relativo à API, ex.: /auth/me")
+        # Mesmo unquote do executar_item: /%65ventos/stream também é /eventos/stream
+        segmentos = [segmento for segmento in unquote(v.split("?", 1)[0]).split("/") if segmento]
+        if segmentos[:1] == ["batch"]:
+            raise ValueError("Batch dentro de batch não é permitido")
+        if segmentos and (segmentos[0] in PREFIXOS_FORA_DO_BATCH or segmentos[-1] in SUFIXOS_FORA_DO_BATCH):
+            raise ValueError("Rotas de streaming (eventos, exportações e downloads) não podem ir no batch")
+        return v
+
+
+class BatchRequest(BaseModel):
+    """Lista de GETs executados com uma única autenticação"""
+    requests: List[BatchItem] = Field(..., min_length=1, max_length=settings.BATCH_MAX_ITENS)
+
+    @field_validator("requests")
+    @classmethod
+    def validate_ids(cls, v):
+        ids = [item.id for item in v]
+        if len(ids) != len(set(ids)):
+            raise ValueError("Os ids dos itens devem ser únicos")
+        return v
+
+
+class BatchItemResponse(BaseModel):
+    """Resultado de um sub-request (body é o JSON do endpoint, sem alteração)"""
+    id: str
+    status: int
+    headers: dict[str, str] = Field(default_factory=dict)
+    body: Optional[object] = None
+
+
+class BatchResponse(BaseModel):
+    responses: List[BatchItemResponse]
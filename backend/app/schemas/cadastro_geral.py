@@ -1,5 +1,5 @@
 # app/schemas/cadastro_geral.py
-from typing import Optional, Literal
+from typing import Dict, List, Optional, Literal
 from datetime import datetime
 from pydantic import BaseModel, Field, ConfigDict, field_validator
 
@@ -72,3 +72,24 @@ class CadastroGeralListItem(BaseModel):
     statcad: StatusCadastro
     
     model_config = ConfigDict(from_attributes=True)
+
+
+
+class CadastroGeralFacetas(BaseModel):
+    """Contadores por tipo e status calculados junto com a listagem"""
+    tipcad: Dict[str, int] = Field(default_factory=dict)
+    statcad: Dict[str, int] = Field(default_factory=dict)
+
+
+class CadastroGeralListFacetada(BaseModel):
+    """Listagem de Cadastros Gerais com facetas (include=facets)"""
+    items: List[CadastroGeralListItem]
+    facetas: CadastroGeralFacetas
+
+
+class CadastroGeralAlteracoes(BaseModel):
+    """Sincronização incremental (GET /changes)"""
+    upserts: List[CadastroGeralResponse]
+    excluidos: List[int] = Field(description="Chaves excluídas desde o token")
+    token: str = Field(description="Enviar em ?since= na próxima sincronização")
+    tem_mais: bool = Field(description="Há mais alterações: repetir com o novo token")
@@ -1,5 +1,5 @@
 # app/schemas/contas_pagar.py
-from typing import Optional, Literal
+from typing import List, Optional, Literal
 from datetime import date, datetime
 from decimal import Decimal
 from pydantic import BaseModel, Field, ConfigDict, field_validator
@@ -77,6 +77,14 @@ class ContaPagarResponseComNome(ContaPagarResponse):
     model_config = ConfigDict(from_attributes=True)
 
 
+class ContaPagarAlteracoes(BaseModel):
+    """Sincronização incremental (GET /changes)"""
+    upserts: List[ContaPagarResponseComNome]
+    excluidos: List[int] = Field(description="Chaves excluídas desde o token")
+    token: str = Field(description="Enviar em ?since= na próxima sincronização")
+    tem_mais: bool = Field(description="Há mais alterações: repetir com o novo token")
+
+
 class ContaPagarBaixa(BaseModel):
     """Schema para baixa de Conta a Pagar"""
     datpag: date = Field(..., description="Data do pagamento")
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Any, Optional
 from datetime import date
 from decimal import Decimal
 
@@ -42,4 +42,17 @@ class PessoaResponse(PessoaBase):
     pascli: Optional[str] = None
 
     class Config:
-        from_attributes = True  # permite converter de SQLAlchemy → Pydantic
\ No newline at end of file
+        from_attributes = True  # permite converter de SQLAlchemy → Pydantic
+
+
+# Detalhe (GET /pessoas/{codpes}): inclui as colunas largas, que a listagem não carrega
+class PessoaDetalheResponse(PessoaResponse):
+    obspes: Optional[str] = None
+    txtctr: Optional[str] = None
+    logocl: Optional[str] = None
+
+
+# Para listagem paginada por cursor (items contém apenas os campos pedidos em fields=)
+class PessoaListPage(BaseModel):
+    items: list[dict[str, Any]]
+    next_cursor: Optional[str] = None
@@ -0,0 +1,106 @@
+# app/servidor.py
+"""
+Entry point de produção: gunicorn supervisionando N workers do uvicorn.
+
+Uso (na pasta backend):  python -m app.servidor
+
+- O app é importado uma vez no processo mestre (preload) antes do fork
+- Cada worker descarta o pool herdado e abre conexões próprias após o fork
+- Workers são reciclados após WORKER_MAX_REQUESTS (+ jitter) requests
+- SIGHUP reinicia os workers de forma graciosa; SIGTERM drena e encerra
+  (drenagem a partir do sinal, com prazo SHUTDOWN_DRENAGEM_SEGUNDOS: WorkerUvicorn)
+
+Configuração em Settings (WORKERS, BIND_HOST, BIND_PORT, WORKER_*).
+Para desenvolvimento continue usando: python -m app.main (reload).
+"""
+import logging
+import multiprocessing
+import sys
+from typing import List, Optional
+
+from gunicorn.app.base import BaseApplication
+from gunicorn.arbiter import Arbiter
+from uvicorn.server import Server
+from uvicorn.workers import UvicornWorker
+
+from app.core.config import settings
+
+logger = logging.getLogger("app.servidor")
+
+
+def post_fork(server, worker):
+    # Os engines foram criados no mestre (import do app). dispose(close=False) troca o
+    # pool por um novo sem fechar conexões que pertençam a outro processo.
+    from app.database import engine, read_engine
+
+    engine.sync_engine.dispose(close=False)
+    if read_engine is not None:
+        read_engine.sync_engine.dispose(close=False)
+
+
+class ServidorUvicorn(Server):
+    """Server do uvicorn que inicia a drenagem do app antes de esperar as conexões"""
+
+    async def shutdown(self, sockets: Optional[List] = None) -> None:
+        # Roda no sinal (ou ao atingir max_requests), antes da espera pelas conexões
+        from app.core.ciclo_vida import iniciar_desligamento
+
+        iniciar_desligamento()
+        await super().shutdown(sockets)
+
+
+class WorkerUvicorn(UvicornWorker):
+    # Prazo da drenagem: esgotado, o uvicorn cancela os requests e segue para o lifespan
+    CONFIG_KWARGS = {**UvicornWorker.CONFIG_KWARGS, "timeout_graceful_shutdown": settings.SHUTDOWN_DRENAGEM_SEGUNDOS}
+
+    async def _serve(self) -> None:
+        # Mesmo fluxo do UvicornWorker._serve (uvicorn 0.24), com o ServidorUvicorn
+        self.config.app = self.wsgi
+        server = ServidorUvicorn(config=self.config)
+        self._install_sigquit_handler()
+        await server.serve(sockets=self.sockets)
+        if not server.started:
+            sys.exit(Arbiter.WORKER_BOOT_ERROR)
+
+
+def quantidade_workers() -> int:
+    return settings.WORKERS or multiprocessing.cpu_count()
+
+
+class Servidor(BaseApplication):
+    def __init__(self, opcoes: dict):
+        self.opcoes = opcoes
+        super().__init__()
+
+    def load_config(self):
+        for chave, valor in self.opcoes.items():
+            self.cfg.set(chave, valor)
+
+    def load(self):
+        from app.main import app
+
+        return app
+
+
+def main():
+    workers = quantidade_workers()
+    if workers > 1 and not settings.METRICS_MULTIPROC_DIR:
+        logger.warning("METRICS_MULTIPROC_DIR não definido: /metrics mostrará só o worker que responder")
+
+    Servidor({
+        "bind": f"{settings.BIND_HOST}:{settings.BIND_PORT}",
+        "workers": workers,
+        "worker_class": "app.servidor.WorkerUvicorn",
+        "preload_app": True,
+        "post_fork": post_fork,
+        "max_requests": settings.WORKER_MAX_REQUESTS,
+        "max_requests_jitter": settings.WORKER_MAX_REQUESTS_JITTER,
+        "timeout": settings.WORKER_TIMEOUT,
+        # Prazo da drenagem + folga para a limpeza do lifespan (fechar pools, devolver jobs à fila)
+        "graceful_timeout": settings.SHUTDOWN_DRENAGEM_SEGUNDOS + 10,
+        "keepalive": settings.WORKER_KEEPALIVE,
+    }).run()
+
+
+if __name__ == "__main__":
+    main()
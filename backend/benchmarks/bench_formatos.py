@@ -0,0 +1,136 @@
+# benchmarks/bench_formatos.py
+"""
+Benchmark dos formatos de listagem: JSON x colunar (application/x-columnar+json)
+x MessagePack (application/msgpack), em GET /contas-pagar?limit=500.
+
+Uso (na pasta backend):
+
+    python -m benchmarks.bench_formatos
+    python -m benchmarks.bench_formatos --url http://127.0.0.1:8000 --token <JWT>
+
+Sem --url, usa as 500 contas sintéticas do bench_serializacao e mede, por
+formato, os bytes (sem compressão, gzip e brotli), o tempo de CPU para gerar a
+resposta e o tempo de decodificação no cliente até a lista de objetos (no
+colunar, inclui remontar as linhas a partir das colunas e do dicionário). Com
+--url, mede o endpoint real em cada Accept (bytes no fio e tempo total com a
+decodificação).
+"""
+import argparse
+import gzip
+import json
+import time
+import urllib.request
+from typing import Any, List
+
+import orjson
+from pydantic import TypeAdapter
+
+from app.core import respostas
+from app.core.compressao import CompressorGzip, brotli
+from app.core.respostas import MEDIA_TYPE_COLUNAR, MEDIA_TYPE_MSGPACK, OrjsonResponse, msgpack
+from app.schemas.contas_pagar import ContaPagarResponseComNome
+from benchmarks.bench_serializacao import QUANTIDADE, contas_sinteticas, medir
+
+
+def expandir_colunar(conteudo: Any) -> Any:
+    """O que o cliente faz com a resposta colunar: volta para lista de objetos"""
+    if isinstance(conteudo, dict) and "_colunas" in conteudo:
+        colunas = {}
+        for campo, valores in conteudo["_colunas"].items():
+            if isinstance(valores, dict):
+                dicionario = valores["_dicionario"]
+                valores = [None if indice is None else dicionario[indice] for indice in valores["_indices"]]
+            colunas[campo] = valores
+        campos = list(colunas)
+        return [dict(zip(campos, linha)) for linha in zip(*colunas.values())]
+    if isinstance(conteudo, dict):
+        return {chave: expandir_colunar(valor) for chave, valor in conteudo.items()}
+    return conteudo
+
+
+def decodificadores() -> dict:
+    decodificar = {
+        "json": lambda corpo: orjson.loads(corpo),
+        "json (json da stdlib)": lambda corpo: json.loads(corpo),
+        "colunar": lambda corpo: expandir_colunar(orjson.loads(corpo)),
+    }
+    if msgpack is not None:
+        decodificar["msgpack"] = lambda corpo: msgpack.unpackb(corpo)
+    return decodificar
+
+
+def renderizar(formato: str, conteudo: Any) -> bytes:
+    marcador = respostas.formato_resposta.set(formato)
+    try:
+        return OrjsonResponse(conteudo).body
+    finally:
+        respostas.formato_resposta.reset(marcador)
+
+
+def bench_local(repeticoes: int) -> None:
+    adapter = TypeAdapter(List[ContaPagarResponseComNome])
+    conteudo = adapter.dump_python(contas_sinteticas(), mode="json")
+
+    formatos = ["json", "colunar"] + (["msgpack"] if msgpack is not None else [])
+    corpos = {formato: renderizar(formato, conteudo) for formato in formatos}
+    assert expandir_colunar(orjson.loads(corpos["colunar"])) == conteudo
+
+    print(f"GET /contas-pagar?limit={QUANTIDADE} (sintético, média de {repeticoes} execuções)\n")
+    print(f"{'formato':<24} {'bytes':>8} {'gzip':>8} {'brotli':>8} {'gerar (ms)':>11} {'decodificar (ms)':>17}")
+    for nome, decodificar in decodificadores().items():
+        formato = nome.split()[0]
+        corpo = corpos[formato]
+        tamanho_br = len(brotli.compress(corpo, quality=4)) if brotli is not None else ""
+        print(
+            f"{nome:<24} {len(corpo):>8} {len(CompressorGzip().finalizar(corpo)):>8} {tamanho_br:>8} "
+            f"{medir(lambda: renderizar(formato, conteudo), repeticoes):>11.3f} "
+            f"{medir(lambda: decodificar(corpo), repeticoes):>17.3f}"
+        )
+    if msgpack is None:
+        print("\n(msgpack não instalado: formato omitido)")
+
+
+def bench_servidor(url: str, token: str, repeticoes: int) -> None:
+    endpoint = f"{url.rstrip('/')}/contas-pagar?limit={QUANTIDADE}"
+    tipos = {"json": "application/json", "colunar": MEDIA_TYPE_COLUNAR, "msgpack": MEDIA_TYPE_MSGPACK}
+    decodificar = decodificadores()
+    print(f"GET {endpoint} (Accept-Encoding: gzip, média de {repeticoes} requests)\n")
+    print(f"{'formato':<12} {'bytes':>10} {'tempo (ms)':>12}")
+    for formato, accept in tipos.items():
+        if formato not in decodificar:
+            continue
+        tamanho, total = 0, 0.0
+        for _ in range(repeticoes):
+            requisicao = urllib.request.Request(endpoint, headers={
+                "Authorization": f"Bearer {token}",
+                "Accept": accept,
+                "Accept-Encoding": "gzip",
+            })
+            inicio = time.perf_counter()
+            with urllib.request.urlopen(requisicao) as resposta:
+                corpo = resposta.read()  # bytes no fio (urllib não descomprime)
+                if resposta.headers.get("Content-Encoding") == "gzip":
+                    corpo_decodificado = gzip.decompress(corpo)
+                else:
+                    corpo_decodificado = corpo
+            decodificar[formato](corpo_decodificado)
+            total += time.perf_counter() - inicio
+            tamanho = len(corpo)
+        print(f"{formato:<12} {tamanho:>10} {total * 1000 / repeticoes:>12.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="URL base de um servidor rodando (ex.: http://127.0.0.1:8000)")
+    parser.add_argument("--token", help="JWT para o modo --url")
+    parser.add_argument("--repeticoes", type=int, default=50)
+    args = parser.parse_args()
+
+    if args.url:
+        bench_servidor(args.url, args.token or "", args.repeticoes)
+    else:
+        bench_local(args.repeticoes)
+
+
+if __name__ == "__main__":
+    main()
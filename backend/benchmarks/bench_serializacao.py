@@ -0,0 +1,135 @@
+# benchmarks/bench_serializacao.py
+"""
+Benchmark da serialização e compressão de GET /contas-pagar?limit=500.
+
+Uso (na pasta backend):
+
+    python -m benchmarks.bench_serializacao
+    python -m benchmarks.bench_serializacao --url http://127.0.0.1:8000 --token <JWT>
+
+Sem --url, monta 500 contas sintéticas e mede, por resposta, o tempo de CPU de
+cada etapa (serialização do response_model, JSON padrão x orjson, gzip e
+brotli) e o tamanho em bytes. Com --url, mede o endpoint real em cada
+Accept-Encoding (bytes recebidos e tempo total).
+"""
+import argparse
+import gzip
+import time
+import urllib.request
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import List
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.core.compressao import CompressorGzip, brotli
+from app.core.respostas import OrjsonResponse
+from app.schemas.contas_pagar import ContaPagarResponseComNome
+
+QUANTIDADE = 500
+
+
+def contas_sinteticas(quantidade: int = QUANTIDADE) -> list[ContaPagarResponseComNome]:
+    hoje = date.today()
+    return [
+        ContaPagarResponseComNome(
+            codcap=i,
+            codemp=1,
+            codfil=1,
+            codfor=1000 + i % 50,
+            vlrcap=Decimal("1234.56") + i,
+            datven=hoje + timedelta(days=i % 90),
+            datpag=None,
+            statcap="A_PAGAR" if i % 3 else "VENCIDO",
+            catcap="FORNECEDORES",
+            forpag="BOLETO",
+            numpar=1 + i % 12,
+            totpar=12,
+            codgrp=f"GRP-{i // 12:05d}",
+            obscap="Parcela de compra de materiais de escritório",
+            numdoc=f"NF-{i:06d}",
+            datcri=datetime.now(),
+            usucri=1,
+            nomfor=f"Fornecedor Exemplo {i % 50} LTDA",
+        )
+        for i in range(quantidade)
+    ]
+
+
+def medir(funcao, repeticoes: int) -> float:
+    """Tempo médio de CPU por chamada, em ms"""
+    funcao()  # aquece
+    inicio = time.process_time()
+    for _ in range(repeticoes):
+        funcao()
+    return (time.process_time() - inicio) * 1000 / repeticoes
+
+
+def bench_local(repeticoes: int) -> None:
+    contas = contas_sinteticas()
+    adapter = TypeAdapter(List[ContaPagarResponseComNome])
+    # O FastAPI serializa o response_model em modo JSON antes da classe de resposta
+    conteudo = adapter.dump_python(contas, mode="json")
+
+    corpo_padrao = JSONResponse(conteudo).body
+    corpo_orjson = OrjsonResponse(conteudo).body
+
+    linhas = [
+        ("response_model (pydantic, modo json)", medir(lambda: adapter.dump_python(contas, mode="json"), repeticoes), None),
+        ("JSONResponse (json da stdlib)", medir(lambda: JSONResponse(conteudo), repeticoes), len(corpo_padrao)),
+        ("OrjsonResponse", medir(lambda: OrjsonResponse(conteudo), repeticoes), len(corpo_orjson)),
+        ("gzip (compressobj copiado)",
+         medir(lambda: CompressorGzip().finalizar(corpo_orjson), repeticoes),
+         len(CompressorGzip().finalizar(corpo_orjson))),
+        ("gzip (gzip.compress nível 9)",
+         medir(lambda: gzip.compress(corpo_orjson), repeticoes),
+         len(gzip.compress(corpo_orjson))),
+    ]
+    if brotli is not None:
+        from app.core.compressao import CompressorBrotli
+
+        linhas.append((
+            "brotli",
+            medir(lambda: CompressorBrotli().finalizar(corpo_orjson), repeticoes),
+            len(CompressorBrotli().finalizar(corpo_orjson)),
+        ))
+
+    print(f"GET /contas-pagar?limit={QUANTIDADE} (sintético, média de {repeticoes} execuções)\n")
+    print(f"{'etapa':<40} {'CPU (ms)':>10} {'bytes':>10}")
+    for nome, ms, tamanho in linhas:
+        print(f"{nome:<40} {ms:>10.3f} {tamanho if tamanho is not None else '':>10}")
+
+
+def bench_servidor(url: str, token: str, repeticoes: int) -> None:
+    endpoint = f"{url.rstrip('/')}/contas-pagar?limit={QUANTIDADE}"
+    print(f"GET {endpoint} (média de {repeticoes} requests)\n")
+    print(f"{'Accept-Encoding':<20} {'bytes':>10} {'tempo (ms)':>12}")
+    for encoding in ("identity", "gzip", "br"):
+        tamanho, total = 0, 0.0
+        for _ in range(repeticoes):
+            requisicao = urllib.request.Request(
+                endpoint, headers={"Authorization": f"Bearer {token}", "Accept-Encoding": encoding}
+            )
+            inicio = time.perf_counter()
+            with urllib.request.urlopen(requisicao) as resposta:
+                tamanho = len(resposta.read())  # bytes no fio (urllib não descomprime)
+            total += time.perf_counter() - inicio
+        print(f"{encoding:<20} {tamanho:>10} {total * 1000 / repeticoes:>12.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="URL base de um servidor rodando (ex.: http://127.0.0.1:8000)")
+    parser.add_argument("--token", help="JWT para o modo --url")
+    parser.add_argument("--repeticoes", type=int, default=50)
+    args = parser.parse_args()
+
+    if args.url:
+        bench_servidor(args.url, args.token or "", args.repeticoes)
+    else:
+        bench_local(args.repeticoes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# benchmarks/carga_sobrecarga.py
+"""
+Cenário de carga: pool saturado, com e sem o controle de admissão.
+
+Três grupos de clientes em paralelo, sem pausa entre requests, por --duracao:
+
+- baixa prioridade: GET /relatorios/fluxo-caixa de um ano (segura conexão);
+- normal: GET /contas-pagar?limit=50;
+- crítica: GET /auth/me (mesma classe do POST /.../baixar, que altera dados).
+
+Ao final imprime, por grupo, os status recebidos e a latência (p50/p95/p99/máx).
+
+Para saturar com poucos clientes, suba o servidor com um pool pequeno e sem o
+limite por tenant (senão o 429 do tenant segura a carga antes do pool):
+
+    DB_POOL_SIZE=2 DB_MAX_OVERFLOW=0 TENANT_CONCORRENCIA=1000 ADMISSAO_ATIVO=false \\
+        uvicorn app.main:app
+    python -m benchmarks.carga_sobrecarga --url http://127.0.0.1:8000 --token <JWT>
+
+e repita com ADMISSAO_ATIVO=true. Sem o controle, as três classes esperam na
+fila do pool e a latência da crítica vai na direção do pool_timeout (30 s).
+Com ele, os relatórios recebem 503 em milissegundos assim que a espera por
+conexão passa de ADMISSAO_ALVO_ESPERA_SEGUNDOS, e a latência das rotas normal
+e crítica fica limitada.
+"""
+import argparse
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+
+def percentil(valores: list[float], p: float) -> float:
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))]
+
+
+class Resultado:
+    def __init__(self):
+        self.trava = threading.Lock()
+        self.status: Counter = Counter()
+        self.latencias: list[float] = []
+
+    def registrar(self, status: int, duracao: float) -> None:
+        with self.trava:
+            self.status[status] += 1
+            self.latencias.append(duracao)
+
+
+def cliente(url: str, token: str, fim: float, resultado: Resultado) -> None:
+    while time.monotonic() < fim:
+        requisicao = urllib.request.Request(url, headers={"Authorization": f"Bearer {token}"})
+        inicio = time.perf_counter()
+        try:
+            with urllib.request.urlopen(requisicao, timeout=60) as resposta:
+                resposta.read()
+                status = resposta.status
+        except urllib.error.HTTPError as e:
+            e.read()
+            status = e.code
+        except (urllib.error.URLError, TimeoutError):
+            status = 0  # conexão recusada ou timeout do cliente
+        resultado.registrar(status, time.perf_counter() - inicio)
+        if status in (429, 503):
+            time.sleep(0.05)  # cliente bem-comportado: não martela logo após a recusa
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", required=True, help="URL base do servidor (ex.: http://127.0.0.1:8000)")
+    parser.add_argument("--token", required=True, help="JWT de um usuário do tenant de teste")
+    parser.add_argument("--duracao", type=float, default=30.0, help="Segundos de carga")
+    parser.add_argument("--baixa", type=int, default=40, help="Clientes de relatório")
+    parser.add_argument("--normal", type=int, default=10, help="Clientes de listagem")
+    parser.add_argument("--critica", type=int, default=5, help="Clientes de /auth/me")
+    args = parser.parse_args()
+
+    base = args.url.rstrip("/")
+    hoje = date.today()
+    grupos = {
+        "baixa": (f"{base}/relatorios/fluxo-caixa?data_inicio={hoje - timedelta(days=365)}&data_fim={hoje}", args.baixa),
+        "normal": (f"{base}/contas-pagar?limit=50", args.normal),
+        "critica": (f"{base}/auth/me", args.critica),
+    }
+    resultados = {nome: Resultado() for nome in grupos}
+
+    print(f"{sum(q for _, q in grupos.values())} clientes por {args.duracao:.0f}s em {base}\n")
+    fim = time.monotonic() + args.duracao
+    with ThreadPoolExecutor(max_workers=sum(q for _, q in grupos.values())) as executor:
+        for nome, (url, quantidade) in grupos.items():
+            for _ in range(quantidade):
+                executor.submit(cliente, url, args.token, fim, resultados[nome])
+
+    print(f"{'grupo':<8} {'requests':>9} {'status':<28} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9} {'máx (ms)':>9}")
+    for nome, resultado in resultados.items():
+        latencias = resultado.latencias
+        status = " ".join(f"{codigo}:{total}" for codigo, total in sorted(resultado.status.items()))
+        print(
+            f"{nome:<8} {len(latencias):>9} {status:<28} "
+            f"{percentil(latencias, 0.50) * 1000:>9.1f} {percentil(latencias, 0.95) * 1000:>9.1f} "
+            f"{percentil(latencias, 0.99) * 1000:>9.1f} {max(latencias, default=0) * 1000:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
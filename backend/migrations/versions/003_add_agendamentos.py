@@ -0,0 +1,36 @@
+"""Add rfe900agd (estado do agendador de jobs)
+
+Revision ID: 003_add_agendamentos
+Revises: 002_add_cadastros_gerais_licencas_parcelamento
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '003_add_agendamentos'
+down_revision = '002_add_cadastros_gerais_licencas_parcelamento'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'rfe900agd',
+        sa.Column('nomagd', sa.String(length=60), nullable=False, comment='Nome do job'),
+        sa.Column('datexe', sa.DateTime(), nullable=True, comment='Horário agendado da última execução'),
+        sa.Column('datini', sa.DateTime(), nullable=True, comment='Início da última execução'),
+        sa.Column('datfim', sa.DateTime(), nullable=True, comment='Fim da última execução'),
+        sa.Column('statagd', sa.String(length=10), nullable=True, comment='Status da última execução: OK, ERRO'),
+        sa.Column('durexe', sa.Integer(), nullable=True, comment='Duração da última execução (ms)'),
+        sa.Column('resagd', sa.Text(), nullable=True, comment='Resultado da última execução (JSON)'),
+        sa.Column('erragd', sa.Text(), nullable=True, comment='Erro da última execução'),
+        sa.Column('qtdexe', sa.Integer(), nullable=False, server_default='0', comment='Total de execuções'),
+        sa.Column('qtderr', sa.Integer(), nullable=False, server_default='0', comment='Total de execuções com erro'),
+        sa.PrimaryKeyConstraint('nomagd'),
+    )
+
+
+def downgrade():
+    op.drop_table('rfe900agd')
@@ -0,0 +1,48 @@
+"""Add rfe901rel (fila de relatórios assíncronos)
+
+Revision ID: 004_add_relatorios_jobs
+Revises: 003_add_agendamentos
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '004_add_relatorios_jobs'
+down_revision = '003_add_agendamentos'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'rfe901rel',
+        sa.Column('codrel', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('codemp', sa.Integer(), nullable=False, comment='Código da empresa'),
+        sa.Column('codfil', sa.Integer(), nullable=False, comment='Código da filial'),
+        sa.Column('codusu', sa.Integer(), nullable=False, comment='Usuário que solicitou'),
+        sa.Column('glorel', sa.Boolean(), nullable=False, server_default=sa.text('false'), comment='Todos os tenants (superadmin)'),
+        sa.Column('tiprel', sa.String(length=30), nullable=False, comment='Tipo: fluxo-caixa, contas-vencidas'),
+        sa.Column('fmtrel', sa.String(length=4), nullable=False, comment='Formato do resultado: json, csv'),
+        sa.Column('parrel', postgresql.JSONB(), nullable=False, comment='Parâmetros do relatório'),
+        sa.Column('statrel', sa.String(length=12), nullable=False, server_default='PENDENTE', comment='PENDENTE, PROCESSANDO, CONCLUIDO, ERRO'),
+        sa.Column('arqrel', sa.String(length=255), nullable=True, comment='Arquivo do resultado (comprimido)'),
+        sa.Column('tamrel', sa.BigInteger(), nullable=True, comment='Tamanho do arquivo (bytes)'),
+        sa.Column('errrel', sa.Text(), nullable=True, comment='Mensagem de erro'),
+        sa.Column('datcri', sa.DateTime(), nullable=False, server_default=sa.text('now()'), comment='Data de criação'),
+        sa.Column('datini', sa.DateTime(), nullable=True, comment='Início do processamento'),
+        sa.Column('datfim', sa.DateTime(), nullable=True, comment='Fim do processamento'),
+        sa.PrimaryKeyConstraint('codrel'),
+        sa.CheckConstraint("statrel IN ('PENDENTE', 'PROCESSANDO', 'CONCLUIDO', 'ERRO')", name='ck_rfe901rel_statrel'),
+        sa.CheckConstraint("fmtrel IN ('json', 'csv')", name='ck_rfe901rel_fmtrel'),
+    )
+    op.create_index('idx_rfe901rel_fila', 'rfe901rel', ['statrel', 'codrel'])
+    op.create_index('idx_rfe901rel_tenant', 'rfe901rel', ['codemp', 'codfil', 'statrel'])
+
+
+def downgrade():
+    op.drop_index('idx_rfe901rel_tenant', table_name='rfe901rel')
+    op.drop_index('idx_rfe901rel_fila', table_name='rfe901rel')
+    op.drop_table('rfe901rel')
@@ -0,0 +1,77 @@
+"""Add rfe902ver (contador de alterações por tabela/tenant, para ETags)
+
+Revision ID: 005_add_versoes_tabelas
+Revises: 004_add_relatorios_jobs
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '005_add_versoes_tabelas'
+down_revision = '004_add_relatorios_jobs'
+branch_labels = None
+depends_on = None
+
+TABELAS = ['rfe010pes', 'rfe020cap', 'rfe021car', 'rfe022cad', 'rfe023lic']
+
+# Uma linha por tenant afetado por statement (transition tables), não por linha alterada
+FUNCAO = """
+CREATE OR REPLACE FUNCTION rfe902ver_incrementar() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO rfe902ver (tabver, codemp, codfil, numver, datalt)
+        SELECT DISTINCT TG_TABLE_NAME, codemp, codfil, 1, now() FROM novas
+        ON CONFLICT (tabver, codemp, codfil)
+        DO UPDATE SET numver = rfe902ver.numver + 1, datalt = now();
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        -- UPDATE que troca o tenant da linha também invalida o tenant antigo
+        INSERT INTO rfe902ver (tabver, codemp, codfil, numver, datalt)
+        SELECT DISTINCT TG_TABLE_NAME, codemp, codfil, 1, now() FROM antigas
+        ON CONFLICT (tabver, codemp, codfil)
+        DO UPDATE SET numver = rfe902ver.numver + 1, datalt = now();
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+def upgrade():
+    op.create_table(
+        'rfe902ver',
+        sa.Column('tabver', sa.String(length=30), nullable=False, comment='Nome da tabela'),
+        sa.Column('codemp', sa.Integer(), nullable=False, comment='Código da empresa'),
+        sa.Column('codfil', sa.Integer(), nullable=False, comment='Código da filial'),
+        sa.Column('numver', sa.BigInteger(), nullable=False, server_default='0',
+                  comment='Número de alterações (statements)'),
+        sa.Column('datalt', sa.DateTime(), nullable=False, server_default=sa.text('now()'),
+                  comment='Data da última alteração'),
+        sa.PrimaryKeyConstraint('tabver', 'codemp', 'codfil'),
+    )
+
+    op.execute(FUNCAO)
+    for tabela in TABELAS:
+        op.execute(
+            f"CREATE TRIGGER {tabela}_versao_ins AFTER INSERT ON {tabela} "
+            f"REFERENCING NEW TABLE AS novas FOR EACH STATEMENT EXECUTE FUNCTION rfe902ver_incrementar()"
+        )
+        op.execute(
+            f"CREATE TRIGGER {tabela}_versao_upd AFTER UPDATE ON {tabela} "
+            f"REFERENCING OLD TABLE AS antigas NEW TABLE AS novas FOR EACH STATEMENT "
+            f"EXECUTE FUNCTION rfe902ver_incrementar()"
+        )
+        op.execute(
+            f"CREATE TRIGGER {tabela}_versao_del AFTER DELETE ON {tabela} "
+            f"REFERENCING OLD TABLE AS antigas FOR EACH STATEMENT EXECUTE FUNCTION rfe902ver_incrementar()"
+        )
+
+
+def downgrade():
+    for tabela in TABELAS:
+        for sufixo in ('ins', 'upd', 'del'):
+            op.execute(f"DROP TRIGGER IF EXISTS {tabela}_versao_{sufixo} ON {tabela}")
+    op.execute("DROP FUNCTION IF EXISTS rfe902ver_incrementar()")
+    op.drop_table('rfe902ver')
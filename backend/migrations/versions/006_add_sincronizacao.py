@@ -0,0 +1,75 @@
+"""Add rfe903exc (exclusões) e índices (codemp, codfil, datalt) para /changes
+
+Revision ID: 006_add_sincronizacao
+Revises: 005_add_versoes_tabelas
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '006_add_sincronizacao'
+down_revision = '005_add_versoes_tabelas'
+branch_labels = None
+depends_on = None
+
+# tabela -> coluna da chave
+TABELAS = {'rfe020cap': 'codcap', 'rfe021car': 'codcar', 'rfe022cad': 'codcad'}
+
+# Genérica: a chave vem do argumento da trigger
+FUNCAO = """
+CREATE OR REPLACE FUNCTION rfe903exc_registrar() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO rfe903exc (tabexc, codreg, codemp, codfil, datexc)
+    VALUES (TG_TABLE_NAME, (to_jsonb(OLD) ->> TG_ARGV[0])::bigint, OLD.codemp, OLD.codfil, now());
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+def upgrade():
+    op.create_table(
+        'rfe903exc',
+        sa.Column('codexc', sa.BigInteger(), autoincrement=True, nullable=False, comment='Código da exclusão'),
+        sa.Column('tabexc', sa.String(length=30), nullable=False, comment='Nome da tabela'),
+        sa.Column('codreg', sa.BigInteger(), nullable=False, comment='Chave do registro excluído'),
+        sa.Column('codemp', sa.Integer(), nullable=False, comment='Código da empresa'),
+        sa.Column('codfil', sa.Integer(), nullable=False, comment='Código da filial'),
+        sa.Column('datexc', sa.DateTime(), nullable=False, server_default=sa.text('now()'),
+                  comment='Data da exclusão'),
+        sa.PrimaryKeyConstraint('codexc'),
+    )
+    op.create_index('idx_rfe903exc_sync', 'rfe903exc', ['tabexc', 'codemp', 'codfil', 'datexc'])
+    op.create_index('idx_rfe903exc_datexc', 'rfe903exc', ['datexc'])
+
+    op.execute(FUNCAO)
+    for tabela, chave in TABELAS.items():
+        # datalt passa a ser preenchida na criação: o /changes filtra só por ela (com índice)
+        op.execute(f"UPDATE {tabela} SET datalt = datcri WHERE datalt IS NULL")
+        op.alter_column(tabela, 'datalt', nullable=False, server_default=sa.text('now()'))
+        op.create_index(f'idx_{tabela}_sync', tabela, ['codemp', 'codfil', 'datalt'])
+
+        op.execute(
+            f"CREATE TRIGGER {tabela}_exclusao_del AFTER DELETE ON {tabela} "
+            f"FOR EACH ROW EXECUTE FUNCTION rfe903exc_registrar('{chave}')"
+        )
+        # Linha movida de tenant: para o tenant antigo ela foi excluída
+        op.execute(
+            f"CREATE TRIGGER {tabela}_exclusao_tenant AFTER UPDATE OF codemp, codfil ON {tabela} "
+            f"FOR EACH ROW WHEN (OLD.codemp IS DISTINCT FROM NEW.codemp OR OLD.codfil IS DISTINCT FROM NEW.codfil) "
+            f"EXECUTE FUNCTION rfe903exc_registrar('{chave}')"
+        )
+
+
+def downgrade():
+    for tabela in TABELAS:
+        op.execute(f"DROP TRIGGER IF EXISTS {tabela}_exclusao_tenant ON {tabela}")
+        op.execute(f"DROP TRIGGER IF EXISTS {tabela}_exclusao_del ON {tabela}")
+        op.drop_index(f'idx_{tabela}_sync', table_name=tabela)
+        op.alter_column(tabela, 'datalt', nullable=True, server_default=None)
+    op.execute("DROP FUNCTION IF EXISTS rfe903exc_registrar()")
+    op.drop_index('idx_rfe903exc_datexc', table_name='rfe903exc')
+    op.drop_index('idx_rfe903exc_sync', table_name='rfe903exc')
+    op.drop_table('rfe903exc')
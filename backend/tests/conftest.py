@@ -0,0 +1,92 @@
+# tests/conftest.py
+"""
+Configuração comum dos testes (pip install -r requirements-dev.txt).
+
+Os testes de banco rodam no Postgres de TEST_DATABASE_URL, um banco
+descartável: as tabelas dos models são recriadas no início da sessão.
+
+    TEST_DATABASE_URL=postgresql+psycopg://postgres@localhost/rfe_teste pytest
+
+Sem TEST_DATABASE_URL o app sobe com SQLite e os testes marcados com
+pytest.mark.postgres são pulados. O plugin de orçamento de queries fica sempre ativo.
+"""
+import os
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+# Antes de qualquer import do app: settings e engine são criados na importação
+os.environ["DATABASE_URL"] = TEST_DATABASE_URL or "sqlite+aiosqlite://"
+os.environ.setdefault("AGENDADOR_ATIVO", "false")
+
+import httpx
+import pytest
+
+pytest_plugins = ["pytester", "app.core.pytest_queries"]
+
+CODEMP, CODFIL = 1, 1
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "postgres: requer TEST_DATABASE_URL apontando para um Postgres")
+
+
+def pytest_runtest_setup(item):
+    if item.get_closest_marker("postgres") and not (TEST_DATABASE_URL or "").startswith("postgresql"):
+        pytest.skip("requer TEST_DATABASE_URL apontando para um Postgres")
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+def banco():
+    """Recria as tabelas dos models no banco de teste (uma vez por sessão)"""
+    import asyncio
+
+    import app.models  # noqa: F401  registra os models no metadata
+    from app.database import Base, engine
+
+    async def recriar():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+        await engine.dispose()
+
+    asyncio.run(recriar())
+    return engine
+
+
+@pytest.fixture
+def usuario():
+    from app.models.user import User
+
+    return User(codusu=1, nomusu="Teste", logusu="teste", codemp=CODEMP, codfil=CODFIL, isadmin=False, issuper=False)
+
+
+@pytest.fixture
+async def cliente(banco, usuario):
+    """Cliente HTTP do app completo (middlewares incluídos), autenticado como `usuario`"""
+    from app.main import app
+    from app.routers.auth import get_current_user
+
+    app.dependency_overrides[get_current_user] = lambda: usuario
+    try:
+        async with httpx.AsyncClient(app=app, base_url="http://teste") as cliente:
+            yield cliente
+    finally:
+        app.dependency_overrides.clear()
+        await banco.dispose()  # as conexões do pool pertencem ao event loop deste teste
+
+
+@pytest.fixture
+async def fornecedor(cliente):
+    """Pessoa do tenant do usuário de teste; retorna o codpes"""
+    from app.database import AsyncSessionLocal
+    from app.models.pessoa import Pessoa
+
+    async with AsyncSessionLocal() as db:
+        pessoa = Pessoa(nompes="Fornecedor Teste", codemp=CODEMP, codfil=CODFIL)
+        db.add(pessoa)
+        await db.commit()
+        return pessoa.codpes
@@ -0,0 +1,66 @@
+# tests/test_batch.py
+"""POST /batch: sem rotas de streaming e com tempo limite por item"""
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.core.config import settings
+from app.database import get_db
+from app.routers import batch
+from app.routers.auth import get_current_user
+
+pytestmark = pytest.mark.anyio
+
+
+class SessaoFalsa:
+    async def close(self):
+        pass
+
+
+@pytest.fixture
+async def cliente(usuario):
+    app = FastAPI()
+    app.include_router(batch.router)
+
+    @app.get("/rapido")
+    async def rapido():
+        return {"ok": True}
+
+    @app.get("/lento")
+    async def lento():
+        await asyncio.sleep(10)
+
+    app.dependency_overrides[get_current_user] = lambda: usuario
+    app.dependency_overrides[get_db] = SessaoFalsa
+    async with httpx.AsyncClient(app=app, base_url="http://teste") as cliente:
+        yield cliente
+
+
+async def enviar(cliente, *paths: str) -> httpx.Response:
+    return await cliente.post("/batch", json={"requests": [{"id": str(i), "path": p} for i, p in enumerate(paths)]})
+
+
+@pytest.mark.parametrize("path", [
+    "/eventos/stream",
+    "/%65ventos/stream",
+    "/contas-pagar/export?formato=csv",
+    "/relatorios/fluxo-caixa/export",
+    "/relatorios/jobs/7/download/",
+    "/batch",
+])
+async def test_rotas_de_streaming_sao_recusadas(cliente, path):
+    assert (await enviar(cliente, "/rapido", path)).status_code == 422
+
+
+async def test_item_lento_vira_504_sem_segurar_os_outros(cliente, monkeypatch):
+    monkeypatch.setattr(settings, "BATCH_TIMEOUT", 0.2)
+
+    resposta = await asyncio.wait_for(enviar(cliente, "/lento", "/rapido"), 5)
+
+    assert resposta.status_code == 200
+    lento, rapido = resposta.json()["responses"]
+    assert lento["status"] == 504
+    assert lento["body"] == {"detail": "Tempo limite do item esgotado"}
+    assert (rapido["status"], rapido["body"]) == (200, {"ok": True})
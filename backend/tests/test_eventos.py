@@ -0,0 +1,37 @@
+# tests/test_eventos.py
+"""GET /eventos/stream: o cliente só fica inscrito enquanto o stream existe"""
+import pytest
+
+from app.core import eventos
+from app.routers.eventos import gerar_sse
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(autouse=True)
+def sem_banco(monkeypatch):
+    async def calcular_snapshot(tenant):
+        return {"tenant": tenant}
+
+    monkeypatch.setattr(eventos, "calcular_snapshot", calcular_snapshot)
+    monkeypatch.setattr(eventos, "clientes", type(eventos.clientes)(set))
+    monkeypatch.setattr(eventos, "snapshots", {})
+
+
+async def test_resposta_cancelada_antes_do_inicio_nao_inscreve(usuario):
+    stream = gerar_sse(usuario)
+
+    await stream.aclose()  # o StreamingResponse nunca chegou a iterar
+
+    assert not eventos.clientes
+
+
+async def test_inscrito_enquanto_o_stream_existe(usuario):
+    stream = gerar_sse(usuario)
+
+    primeira = await stream.__anext__()
+    assert primeira.startswith(b"event: dashboard\n")
+    assert sum(len(conectados) for conectados in eventos.clientes.values()) == 1
+
+    await stream.aclose()  # desconexão do cliente
+    assert not eventos.clientes
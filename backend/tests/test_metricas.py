@@ -0,0 +1,95 @@
+# tests/test_metricas.py
+"""Modo multiprocesso do /metrics: worker reciclado não faz contador voltar"""
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from app.core import admissao, agendador, metricas, replica
+from app.core.metricas import RegistroMetricas, somar_snapshots
+
+ROTA = "/contas-pagar|GET|200"
+
+
+@pytest.fixture
+def registro(tmp_path):
+    registro = RegistroMetricas()
+    registro.diretorio = tmp_path
+    registro.registrar_gauge("fila", "Itens na fila", lambda: 2.0)
+    return registro
+
+
+@pytest.fixture
+def pid_morto() -> int:
+    processo = subprocess.Popen([sys.executable, "-c", "pass"])
+    processo.wait()
+    return processo.pid
+
+
+def snapshot_worker(diretorio, pid: int, requests: float) -> None:
+    serie = [0.0] * (len(metricas.BUCKETS) + 2)
+    serie[0], serie[-1] = requests, requests * 0.001
+    (diretorio / f"{pid}.json").write_text(json.dumps({
+        "histograma": {ROTA: serie},
+        "gauges": {"fila": {"": 5.0}},
+    }))
+
+
+def contagem(dados: dict) -> float:
+    return sum(dados["histograma"][ROTA][:-1])
+
+
+def test_worker_morto_soma_no_acumulado_e_perde_os_gauges(registro, tmp_path, pid_morto):
+    registro.observar("/contas-pagar", "GET", 200, 0.001)
+    snapshot_worker(tmp_path, pid_morto, 10)
+
+    antes = somar_snapshots(registro.snapshots_workers())
+    depois = somar_snapshots(registro.snapshots_workers())  # snapshot do morto já recolhido
+
+    assert not (tmp_path / f"{pid_morto}.json").exists()
+    assert contagem(antes) == contagem(depois) == 11
+    assert depois["gauges"]["fila"] == {"": 2.0}
+
+
+def test_acumulado_dos_mortos_so_cresce(registro, tmp_path, pid_morto):
+    snapshot_worker(tmp_path, pid_morto, 10)
+    registro.snapshots_workers()
+    snapshot_worker(tmp_path, pid_morto, 4)  # PID reaproveitado por outro worker, que também morreu
+
+    assert contagem(somar_snapshots(registro.snapshots_workers())) == 14
+
+
+def test_worker_novo_com_pid_de_morto_nao_sobrescreve(registro, tmp_path):
+    snapshot_worker(tmp_path, os.getpid(), 10)  # deixado por um worker antigo com o mesmo PID
+
+    registro.recolher_mortos(pid_reaproveitado=os.getpid())
+    registro.gravar_snapshot()
+
+    assert contagem(somar_snapshots(registro.snapshots_workers())) == 10
+
+
+def test_windows_ignora_o_modo_multiprocesso(tmp_path, monkeypatch):
+    monkeypatch.setattr(metricas.sys, "platform", "win32")
+    monkeypatch.setattr(metricas.registro, "diretorio", None)
+
+    metricas.configurar_multiprocesso(str(tmp_path / "metricas"))
+
+    assert metricas.registro.diretorio is None
+    assert not (tmp_path / "metricas").exists()
+
+
+@pytest.mark.parametrize("modulo", [agendador, admissao, replica])
+def test_label_worker_e_do_processo_que_responde(modulo, monkeypatch):
+    """Registro no import (mestre, preload_app); o worker forkado tem outro PID"""
+    monkeypatch.setattr(metricas, "registro", RegistroMetricas())
+    monkeypatch.setattr(agendador, "jobs", {"teste": agendador.Job("teste", "* * * * *", lambda: None)})
+    modulo.registrar_metricas()
+
+    monkeypatch.setattr(metricas.os, "getpid", lambda: 4242)  # depois do fork
+    gauges = metricas.registro.snapshot()["gauges"]
+    labels_worker = [labels for valores in gauges.values() for labels in valores if "worker=" in labels]
+
+    assert labels_worker
+    assert all('worker="4242"' in labels for labels in labels_worker)
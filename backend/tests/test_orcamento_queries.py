@@ -0,0 +1,66 @@
+# tests/test_orcamento_queries.py
+"""Plugin de orçamento de queries (app.core.pytest_queries) no parcelamento de contas a pagar"""
+from pathlib import Path
+
+import pytest
+
+pytestmark = pytest.mark.postgres
+
+PARCELAMENTO = {"totpar": 3, "vlrcap": "300.00", "datven_primeira": "2026-01-10"}
+
+# Mesmo teste com orçamento menor que o real, rodado num pytest separado (pytester)
+TESTE_ESTOURADO = """
+import pytest
+
+@pytest.mark.anyio
+@pytest.mark.query_budget(2)
+async def test_parcelamento(cliente, fornecedor):
+    resposta = await cliente.post(f"/contas-pagar/parcelar/{fornecedor}", json=%r)
+    assert resposta.status_code == 200
+""" % PARCELAMENTO
+
+# Sem marcador, com limite global menor: o request responde normalmente e só o teste falha
+TESTE_LIMITE_GLOBAL = """
+import pytest
+
+from app.core.detector_queries import detector
+
+@pytest.mark.anyio
+async def test_parcelamento(cliente, fornecedor, monkeypatch):
+    monkeypatch.setattr(detector, "orcamento", 2)
+    resposta = await cliente.post(f"/contas-pagar/parcelar/{fornecedor}", json=%r)
+    assert resposta.status_code == 200
+""" % PARCELAMENTO
+
+
+@pytest.mark.anyio
+@pytest.mark.query_budget(6, max_repeticoes=1)
+async def test_parcelamento_dentro_do_orcamento(cliente, fornecedor):
+    resposta = await cliente.post(f"/contas-pagar/parcelar/{fornecedor}", json=PARCELAMENTO)
+
+    assert resposta.status_code == 200
+    assert [conta["numpar"] for conta in resposta.json()] == [1, 2, 3]
+
+
+def rodar_teste(pytester, monkeypatch, codigo: str):
+    backend = Path(__file__).resolve().parents[1]
+    monkeypatch.setenv("PYTHONPATH", str(backend))
+    pytester.makeconftest((backend / "tests" / "conftest.py").read_text(encoding="utf-8"))
+    pytester.makepyfile(test_estourado=codigo)
+    return pytester.runpytest_subprocess()
+
+
+def test_parcelamento_acima_do_orcamento_falha(pytester, monkeypatch):
+    resultado = rodar_teste(pytester, monkeypatch, TESTE_ESTOURADO)
+
+    resultado.assert_outcomes(failed=1)
+    resultado.stdout.fnmatch_lines(["*POST /contas-pagar/parcelar/{codfor} excedeu o orçamento de queries: *"])
+
+
+def test_limite_global_falha_o_teste_e_nao_o_request(pytester, monkeypatch):
+    resultado = rodar_teste(pytester, monkeypatch, TESTE_LIMITE_GLOBAL)
+
+    resultado.assert_outcomes(failed=1)
+    resultado.stdout.fnmatch_lines(["*POST /contas-pagar/parcelar/{codfor} excedeu os limites do detector: *"])
+    resultado.stdout.no_fnmatch_line("*assert 500 == 200*")
+    resultado.stdout.no_fnmatch_line("*Traceback*")
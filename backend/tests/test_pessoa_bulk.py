@@ -0,0 +1,74 @@
+# tests/test_pessoa_bulk.py
+"""POST /pessoas/bulk: reenviar o mesmo corpo atualiza, não duplica (inclusive com NULL na chave)"""
+import json
+
+import pytest
+from sqlalchemy import func, select
+
+from app.database import AsyncSessionLocal
+from app.models.pessoa import Pessoa
+
+pytestmark = [pytest.mark.anyio, pytest.mark.postgres]
+
+# Uma das colunas cpfpes/cnppes sempre NULL (e tippes/codtre às vezes): o caso normal
+PESSOAS = [
+    {"tippes": "F", "nompes": "Bulk Fisica", "cpfpes": "11122233344"},
+    {"tippes": "J", "nompes": "Bulk Juridica", "cnppes": "11222333000144"},
+    {"nompes": "Bulk Sem Documento"},
+]
+
+
+async def enviar(cliente, pessoas: list[dict]) -> list[dict]:
+    corpo = "\n".join(json.dumps(pessoa) for pessoa in pessoas)
+    resposta = await cliente.post("/pessoas/bulk", content=corpo, headers={"Content-Type": "application/x-ndjson"})
+    assert resposta.status_code == 200
+    return [json.loads(linha) for linha in resposta.text.splitlines()]
+
+
+async def total(usuario, nomes: list[str]) -> int:
+    async with AsyncSessionLocal() as db:
+        return await db.scalar(
+            select(func.count()).select_from(Pessoa).where(
+                Pessoa.codemp == usuario.codemp,
+                Pessoa.codfil == usuario.codfil,
+                Pessoa.nompes.in_(nomes),
+            )
+        )
+
+
+async def test_reenvio_atualiza_sem_duplicar(cliente, usuario):
+    primeiro = await enviar(cliente, PESSOAS)
+    segundo = await enviar(cliente, [{**pessoa, "cidpes": "Curitiba"} for pessoa in PESSOAS])
+
+    assert [r["status"] for r in primeiro] == ["CRIADO"] * 3
+    assert [r["status"] for r in segundo] == ["ATUALIZADO"] * 3
+    assert [r["codpes"] for r in segundo] == [r["codpes"] for r in primeiro]
+    assert await total(usuario, [pessoa["nompes"] for pessoa in PESSOAS]) == 3
+    async with AsyncSessionLocal() as db:
+        cidades = await db.scalars(select(Pessoa.cidpes).where(Pessoa.codpes.in_([r["codpes"] for r in segundo])))
+        assert list(cidades) == ["Curitiba"] * 3
+
+
+async def test_homonimos_sem_documento_continuam_permitidos(cliente, usuario):
+    for _ in range(2):
+        resposta = await cliente.post("/pessoas/", json={"nompes": "Bulk Homonimo"})
+        assert resposta.status_code == 201
+
+    resultados = await enviar(cliente, [{"nompes": "Bulk Homonimo"}, {"nompes": "Bulk Outro Nome"}])
+
+    assert resultados[0]["status"] == "ERRO"
+    assert "Chave ambígua" in resultados[0]["erro"]
+    assert resultados[1]["status"] == "CRIADO"
+    assert await total(usuario, ["Bulk Homonimo"]) == 2
+
+
+async def test_erro_de_banco_fica_so_na_linha_com_problema(cliente, usuario):
+    resultados = await enviar(cliente, [
+        {"nompes": "Bulk Valida 1", "cpfpes": "22233344455"},
+        {"nompes": "Bulk Endereco Longo", "endpes": "x" * 150},  # passa no schema, não cabe na coluna
+        {"nompes": "Bulk Valida 2"},
+    ])
+
+    assert [r["status"] for r in resultados] == ["CRIADO", "ERRO", "CRIADO"]
+    assert resultados[1]["erro"]
+    assert await total(usuario, ["Bulk Valida 1", "Bulk Endereco Longo", "Bulk Valida 2"]) == 2
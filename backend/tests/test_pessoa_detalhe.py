@@ -0,0 +1,33 @@
+# tests/test_pessoa_detalhe.py
+"""Colunas largas (grupo textos): só o detalhe carrega e devolve"""
+import pytest
+
+from app.database import AsyncSessionLocal
+from app.models.pessoa import Pessoa
+
+pytestmark = [pytest.mark.anyio, pytest.mark.postgres]
+
+
+@pytest.fixture
+async def pessoa_com_textos(cliente, usuario):
+    async with AsyncSessionLocal() as db:
+        pessoa = Pessoa(
+            nompes="Detalhe Textos", codemp=usuario.codemp, codfil=usuario.codfil,
+            obspes="Observação longa", txtctr="Texto do contrato", logocl="logo.png",
+        )
+        db.add(pessoa)
+        await db.commit()
+        return pessoa.codpes
+
+
+async def test_detalhe_devolve_as_colunas_largas(cliente, pessoa_com_textos):
+    corpo = (await cliente.get(f"/pessoas/{pessoa_com_textos}")).json()
+
+    assert (corpo["obspes"], corpo["txtctr"], corpo["logocl"]) == ("Observação longa", "Texto do contrato", "logo.png")
+
+
+async def test_listagem_nao_devolve_as_colunas_largas(cliente, pessoa_com_textos):
+    itens = (await cliente.get("/pessoas/", params={"limit": 500})).json()["items"]
+
+    item = next(item for item in itens if item["codpes"] == pessoa_com_textos)
+    assert not {"obspes", "txtctr", "logocl"} & set(item)
@@ -0,0 +1,58 @@
+# tests/test_queries_lentas.py
+"""Log de queries lentas: escrita fora do event loop e leitura a partir do fim"""
+import json
+
+import pytest
+
+from app.core import instrumentacao, queries_lentas
+from app.core.config import settings
+from app.core.queries_lentas import linhas_do_fim, listar_queries_lentas
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def arquivo_log(tmp_path, monkeypatch):
+    caminho = tmp_path / "lentas.log"
+    monkeypatch.setattr(settings, "SLOW_QUERY_LOG", str(caminho))
+    return caminho
+
+
+@pytest.fixture
+def log_isolado(arquivo_log, monkeypatch):
+    """configurar_queries_lentas sem mexer no logger e no observador globais"""
+    monkeypatch.setattr(queries_lentas.logger, "handlers", [])
+    monkeypatch.setattr(instrumentacao, "limite_query_lenta", None)
+    monkeypatch.setattr(instrumentacao, "observador_query_lenta", None)
+    queries_lentas.configurar_queries_lentas()
+    return arquivo_log
+
+
+def registro(numero: int, rota: str = "GET /relatorios/dre", tenant=(1, 1)) -> dict:
+    return {"numero": numero, "rota": rota, "tenant": list(tenant), "sql": "SELECT ?"}
+
+
+def test_linhas_do_fim_atravessa_blocos(tmp_path):
+    caminho = tmp_path / "linhas.txt"
+    caminho.write_bytes(b"primeira\nsegunda linha\n\nterceira")
+
+    assert list(linhas_do_fim(caminho, bloco=4)) == [b"terceira", b"", b"segunda linha", b"primeira"]
+
+
+def test_listar_devolve_os_mais_recentes_primeiro_com_filtros(arquivo_log):
+    linhas = [registro(1), registro(2, rota="GET /contas-pagar"), registro(3, tenant=(2, 1)), registro(4)]
+    arquivo_log.write_text("\n".join(json.dumps(r) for r in linhas) + "\nlinha cortada pela rotaç")
+
+    assert [r["numero"] for r in listar_queries_lentas()] == [4, 3, 2, 1]
+    assert [r["numero"] for r in listar_queries_lentas(limite=2)] == [4, 3]
+    assert [r["numero"] for r in listar_queries_lentas(rota="/relatorios", codemp=1)] == [4, 1]
+
+
+async def test_escrita_vai_pela_fila_e_chega_ao_arquivo(log_isolado):
+    queries_lentas.iniciar_escritor_log()
+    try:
+        queries_lentas.escrever_registro(registro(1))
+    finally:
+        await queries_lentas.encerrar_explain()  # esvazia a fila antes de parar a thread
+
+    assert [r["numero"] for r in listar_queries_lentas()] == [1]
@@ -0,0 +1,207 @@
+# tests/test_replica.py
+"""Roteamento de leituras para a réplica (get_read_db, app/core/replica.py)"""
+import asyncio
+
+import httpx
+import pytest
+from fastapi import Depends, FastAPI, HTTPException
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app import database
+from app.core import notificacoes, replica
+from app.core.config import settings
+from app.database import estado_replica, get_read_db
+from app.routers.auth import create_access_token
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def bancos(tmp_path, monkeypatch):
+    """Primário e réplica em dois SQLite; a tabela origem de cada um responde o próprio nome"""
+    engines = {}
+    for nome in ("primario", "replica"):
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / nome}.db")
+        async with engine.begin() as conn:
+            await conn.execute(text("CREATE TABLE origem (nome TEXT)"))
+            await conn.execute(text("INSERT INTO origem VALUES (:nome)"), {"nome": nome})
+        engines[nome] = engine
+
+    monkeypatch.setattr(database, "AsyncSessionLocal", async_sessionmaker(engines["primario"]))
+    monkeypatch.setattr(database, "AsyncSessionLeitura", async_sessionmaker(engines["replica"]))
+    monkeypatch.setattr(replica, "read_engine", engines["replica"])
+    monkeypatch.setattr(estado_replica, "saudavel", False)
+    monkeypatch.setattr(estado_replica, "atraso", None)
+    monkeypatch.setattr(notificacoes, "ativo", True)  # LISTEN de pé
+    monkeypatch.setattr(replica, "escritas", {})
+    monkeypatch.setattr(replica, "primario_ate", 0.0)
+    yield engines
+    for engine in engines.values():
+        await engine.dispose()
+
+
+@pytest.fixture
+def publicadas(monkeypatch) -> list:
+    """Marcas que iriam para o canal rfe_escritas"""
+    publicadas = []
+
+    async def publicar(chave):
+        publicadas.append(chave)
+
+    monkeypatch.setattr(replica, "publicar_escrita", publicar)
+    return publicadas
+
+
+def autorizacao(codusu: int) -> dict:
+    token = create_access_token({"codemp": 1, "codfil": 1, "codusu": codusu})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+async def cliente(bancos, publicadas):
+    app = FastAPI()
+
+    @app.get("/origem")
+    async def origem(db: AsyncSession = Depends(get_read_db)):
+        return await db.scalar(text("SELECT nome FROM origem"))
+
+    @app.post("/gravar", status_code=201)
+    async def gravar():
+        return {}
+
+    @app.post("/recusar")
+    async def recusar():
+        raise HTTPException(status_code=400, detail="Inválido")
+
+    app.add_middleware(replica.LeituraPropriaMiddleware)
+    async with httpx.AsyncClient(app=app, base_url="http://teste.local", headers=autorizacao(1)) as cliente:
+        yield cliente
+
+
+async def origem(cliente, **kwargs) -> str:
+    resposta = await cliente.get("/origem", **kwargs)
+    assert resposta.status_code == 200
+    return resposta.json()
+
+
+async def esperar(condicao, limite: float = 2.0) -> None:
+    async def aguardar():
+        while not condicao():
+            await asyncio.sleep(0.01)
+
+    await asyncio.wait_for(aguardar(), limite)
+
+
+async def test_replica_em_dia_recebe_as_leituras(cliente):
+    await replica.verificar()
+
+    assert estado_replica.saudavel
+    assert await origem(cliente) == "replica"
+
+
+async def test_sem_verificacao_le_do_primario(cliente):
+    assert await origem(cliente) == "primario"
+
+
+async def test_replica_atrasada_volta_ao_primario(cliente, monkeypatch):
+    await replica.verificar()
+    assert await origem(cliente) == "replica"
+
+    async def atraso_alto() -> float:
+        return settings.REPLICA_ATRASO_MAXIMO_SEGUNDOS + 1
+
+    monkeypatch.setattr(replica, "medir_atraso", atraso_alto)
+    await replica.verificar()
+
+    assert not estado_replica.saudavel
+    assert await origem(cliente) == "primario"
+
+
+async def test_replica_fora_do_ar_volta_ao_primario(cliente, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "REPLICA_VERIFICACAO_SEGUNDOS", 0.01)
+    replica.iniciar()
+    try:
+        await esperar(lambda: estado_replica.saudavel)
+        assert await origem(cliente) == "replica"
+
+        # Diretório inexistente: a conexão falha como com o servidor fora do ar
+        fora_do_ar = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'nao-existe' / 'replica.db'}")
+        monkeypatch.setattr(replica, "read_engine", fora_do_ar)
+        await esperar(lambda: not estado_replica.saudavel)
+
+        assert estado_replica.atraso is None
+        assert await origem(cliente) == "primario"
+    finally:
+        await replica.parar()
+
+
+async def test_escrita_leva_so_o_autor_ao_primario(cliente, publicadas):
+    await replica.verificar()
+
+    assert (await cliente.post("/gravar")).status_code == 201
+
+    assert publicadas == [(1, 1, 1)]
+    assert await origem(cliente) == "primario"
+    assert await origem(cliente, headers=autorizacao(2)) == "replica"
+
+
+async def test_marca_expira_depois_da_janela(cliente, monkeypatch):
+    monkeypatch.setattr(settings, "REPLICA_LEITURA_PROPRIA_SEGUNDOS", 0.05)
+    await replica.verificar()
+    await cliente.post("/gravar")
+    assert await origem(cliente) == "primario"
+
+    await asyncio.sleep(0.1)
+    replica.limpar_escritas()
+
+    assert await origem(cliente) == "replica"
+    assert replica.escritas == {}
+
+
+async def test_escrita_avisada_por_outro_worker(cliente):
+    await replica.verificar()
+
+    replica.receber_escrita('{"e": 1, "f": 1, "u": 1}')
+
+    assert await origem(cliente) == "primario"
+    assert await origem(cliente, headers=autorizacao(2)) == "replica"
+
+
+async def test_sem_listen_ou_logo_apos_reconectar_tudo_no_primario(cliente, monkeypatch):
+    await replica.verificar()
+    monkeypatch.setattr(notificacoes, "ativo", False)
+    assert await origem(cliente) == "primario"
+
+    monkeypatch.setattr(notificacoes, "ativo", True)
+    replica.reconectado()  # marcas publicadas durante a queda se perderam
+    assert await origem(cliente, headers=autorizacao(2)) == "primario"
+
+
+async def test_leitura_e_escrita_recusada_nao_marcam(cliente, publicadas):
+    await replica.verificar()
+
+    await cliente.get("/origem")
+    await cliente.post("/recusar")
+
+    assert publicadas == []
+    assert await origem(cliente) == "replica"
+
+
+@pytest.mark.postgres
+async def test_marca_publicada_chega_ao_listen(banco, monkeypatch):
+    import psycopg
+
+    monkeypatch.setattr(replica, "escritas", {})
+
+    conn = await psycopg.AsyncConnection.connect(notificacoes.dsn(), autocommit=True)
+    async with conn:
+        await conn.execute(f"LISTEN {replica.CANAL_ESCRITAS}")
+        try:
+            await replica.publicar_escrita((1, 1, 7))
+            notificacao = await asyncio.wait_for(anext(aiter(conn.notifies())), 2)
+        finally:
+            await banco.dispose()
+
+    replica.receber_escrita(notificacao.payload)
+    assert (1, 1, 7) in replica.escritas
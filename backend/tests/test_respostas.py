@@ -0,0 +1,51 @@
+# tests/test_respostas.py
+"""Decimal no JSON: o formato depende de como a rota devolve (ver app/core/respostas.py)"""
+from decimal import Decimal
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from pydantic import BaseModel
+
+from app.core.respostas import OrjsonResponse
+
+pytestmark = pytest.mark.anyio
+
+VALOR = Decimal("1234.10")
+
+
+class Conta(BaseModel):
+    vlrcap: Decimal
+
+
+@pytest.fixture
+async def cliente():
+    app = FastAPI(default_response_class=OrjsonResponse)
+
+    @app.get("/schema", response_model=Conta)
+    async def com_schema():
+        return {"vlrcap": VALOR}
+
+    @app.get("/dict", response_model=dict)
+    async def com_dict():
+        return {"vlrcap": VALOR}
+
+    @app.get("/sem-response-model")
+    async def sem_response_model():
+        return {"vlrcap": VALOR}
+
+    @app.get("/direta")
+    async def direta():
+        return OrjsonResponse({"vlrcap": VALOR})
+
+    async with httpx.AsyncClient(app=app, base_url="http://teste") as cliente:
+        yield cliente
+
+
+@pytest.mark.parametrize("path", ["/schema", "/dict", "/direta"])
+async def test_decimal_sai_como_string(cliente, path):
+    assert (await cliente.get(path)).text == '{"vlrcap":"1234.10"}'
+
+
+async def test_sem_response_model_o_fastapi_converte_em_float(cliente):
+    assert (await cliente.get("/sem-response-model")).text == '{"vlrcap":1234.1}'